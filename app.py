@@ -13,6 +13,8 @@ from collections import deque
 import threading
 
 from src.simple_trading_bot import SimpleTradingBot
+from src.exchange_registry import exchange_registry
+from src.rate_limiter import Priority, set_priority
 
 # Setup logging with custom handler
 logging.basicConfig(
@@ -41,6 +43,11 @@ class WebLogHandler(logging.Handler):
 web_handler = WebLogHandler()
 logging.getLogger().addHandler(web_handler)
 
+@app.before_request
+def dashboard_priority():
+    """Exchange calls made while serving the dashboard queue behind trading"""
+    set_priority(Priority.DASHBOARD)
+
 @app.route('/')
 def index():
     """Main dashboard page - Premium Version"""
@@ -102,11 +109,11 @@ def get_status():
     
     # Calculate unrealized P&L from open positions only
     unrealized_pnl = 0
-    for symbol, pos in bot.positions.items():
+    current_prices = bot.get_position_prices()
+    for symbol, pos in list(bot.positions.items()):
         try:
-            ticker = bot.data_fetcher.get_ticker(symbol)
-            if ticker:
-                current_price = ticker['last']
+            if symbol in current_prices:
+                current_price = current_prices[symbol]
                 entry_price = pos.get('entry_price', current_price)
                 amount = pos.get('amount', 0)
                 position_pnl = (current_price - entry_price) * amount
@@ -282,24 +289,22 @@ def get_logs():
 def get_market_data():
     """Get real-time market data"""
     try:
-        from src.data_fetcher import MarketDataFetcher
-        fetcher = MarketDataFetcher()
+        from src.data_fetcher import get_shared_fetcher
+        fetcher = get_shared_fetcher()
         
         market_data = []
         symbols = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
+        tickers = fetcher.get_tickers(symbols)
         
         for symbol in symbols:
-            try:
-                ticker = fetcher.get_ticker(symbol)
-                if ticker:
-                    market_data.append({
-                        'symbol': symbol,
-                        'price': ticker.get('last', 0),
-                        'change_24h': ticker.get('percentage', 0),
-                        'volume': ticker.get('baseVolume', 0)
-                    })
-            except Exception as e:
-                logging.error(f"Error fetching {symbol}: {e}")
+            ticker = tickers.get(symbol)
+            if ticker:
+                market_data.append({
+                    'symbol': symbol,
+                    'price': ticker.get('last', 0),
+                    'change_24h': ticker.get('percentage', 0),
+                    'volume': ticker.get('baseVolume', 0)
+                })
         
         return jsonify({'market_data': market_data})
     except Exception as e:
@@ -328,13 +333,22 @@ def diagnostics():
         'BINANCE_API_SECRET': 'SET' if os.getenv('BINANCE_API_SECRET') else 'NOT SET'
     }
     
+    from src.data_fetcher import get_shared_fetcher
+    from src.indicator_cache import get_shared_indicator_cache
+    
+    # Connect once; if the exchange cannot be reached the stats below are None and the error is reported
+    fetcher = None
+    fetcher_error = None
+    try:
+        fetcher = get_shared_fetcher()
+    except Exception as e:
+        fetcher_error = str(e)
+    
     # Try to fetch real balance from Binance
     balance_info = None
-    balance_error = None
-    if config.BINANCE_API_KEY and config.BINANCE_API_SECRET:
+    balance_error = fetcher_error
+    if fetcher is not None and config.BINANCE_API_KEY and config.BINANCE_API_SECRET:
         try:
-            from src.data_fetcher import MarketDataFetcher
-            fetcher = MarketDataFetcher()
             balance_info = fetcher.get_account_balance('USDT')
         except Exception as e:
             balance_error = str(e)
@@ -353,6 +367,13 @@ def diagnostics():
             'used': balance_info['used'] if balance_info else None,
             'error': balance_error
         } if config.TRADING_MODE == 'live' else 'N/A (paper mode)',
+        'exchange_startup': exchange_registry.get_metrics(),
+        'exchange_error': fetcher_error,
+        'quote_cache': fetcher.quote_cache.stats() if fetcher else None,
+        'rate_limiter': fetcher.rate_limiter.stats() if fetcher else None,
+        'hedged_reads': fetcher.hedged_reads.stats() if fetcher and fetcher.hedged_reads else None,
+        'exchange_health': fetcher.exchange_guard.stats() if fetcher else None,
+        'indicator_cache': get_shared_indicator_cache().stats(),
         'status': 'OK' if config.TRADING_MODE == 'live' and config.BINANCE_API_KEY and balance_info else 'WARNING',
         'message': 'Live mode configured correctly' if config.TRADING_MODE == 'live' and balance_info else 'Running in PAPER mode - set TRADING_MODE=live in Render environment variables'
     }
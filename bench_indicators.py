@@ -0,0 +1,56 @@
+"""
+Benchmark of the indicator backends
+
+Times TechnicalIndicators.add_all_indicators with the ta and NumPy backends
+on synthetic candles, then a 200-symbol scan computed symbol by symbol and
+as one indicator panel. Usage: python bench_indicators.py [rows ...] (default: 500 100000)
+"""
+import sys
+import time
+import logging
+
+from src.indicator_panel import indicator_frames
+from test_indicator_parity import compute, make_candles
+
+PANEL_SYMBOLS = 200
+
+
+def best_of(function, repeats: int) -> float:
+    """Fastest of `repeats` runs, in seconds"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(sizes):
+    print(f"{'rows':>8}  {'ta':>10}  {'numpy':>10}  {'speedup':>8}")
+    for rows in sizes:
+        candles = make_candles(rows)
+        repeats = 3 if rows > 10_000 else 20
+        compute(candles, 'numpy')  # Warm-up
+        ta_seconds = best_of(lambda: compute(candles, 'ta'), repeats)
+        numpy_seconds = best_of(lambda: compute(candles, 'numpy'), repeats)
+        print(f"{rows:>8}  {ta_seconds * 1000:>8.2f}ms  {numpy_seconds * 1000:>8.2f}ms  "
+              f"{ta_seconds / numpy_seconds:>7.1f}x")
+
+
+def main_panel(sizes):
+    print(f"\n{PANEL_SYMBOLS} symbols, NumPy backend")
+    print(f"{'rows':>8}  {'1 symbol':>10}  {'loop':>10}  {'panel':>10}  {'speedup':>8}")
+    for rows in sizes:
+        candles = {f'SYM{seed}/USDT': make_candles(rows, seed=seed) for seed in range(PANEL_SYMBOLS)}
+        first = next(iter(candles.values()))
+        single_seconds = best_of(lambda: compute(first, 'numpy'), 20)
+        loop_seconds = best_of(lambda: [compute(window, 'numpy') for window in candles.values()], 3)
+        panel_seconds = best_of(lambda: indicator_frames(candles), 5)
+        print(f"{rows:>8}  {single_seconds * 1000:>8.2f}ms  {loop_seconds * 1000:>8.1f}ms  "
+              f"{panel_seconds * 1000:>8.2f}ms  {loop_seconds / panel_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main([int(rows) for rows in sys.argv[1:]] or [500, 100_000])
+    main_panel([100, 500])
@@ -4,6 +4,22 @@ from dotenv import load_dotenv
 # Force reload on every import to pick up .env changes
 load_dotenv(override=True)
 
+
+def _mock_symbols(value: str) -> list:
+    """MOCK_SYMBOLS is a comma separated list or a count of generated symbols"""
+    if not value.strip().isdigit():
+        return value.split(',')
+    count = int(value)
+    return (['BTC/USDT', 'ETH/USDT'] + [f'MOCK{i:04d}/USDT' for i in range(max(0, count - 2))])[:count]
+
+
+# Synthetic exchange for offline load testing (EXCHANGE=mock)
+MOCK_SYMBOLS = _mock_symbols(os.getenv('MOCK_SYMBOLS', '500'))
+
+# TRADING_PAIRS=* trades every mock symbol
+_TRADING_PAIRS = os.getenv('TRADING_PAIRS', 'BTC/USDT,ETH/USDT')
+_TRADING_PAIRS = MOCK_SYMBOLS if _TRADING_PAIRS == '*' else _TRADING_PAIRS.split(',')
+
 class Config:
     # API Configuration
     BINANCE_API_KEY = os.getenv('BINANCE_API_KEY', '')
@@ -16,8 +32,32 @@ class Config:
     STOP_LOSS_PERCENTAGE = float(os.getenv('STOP_LOSS_PERCENTAGE', 0.015))  # 1.5% stop loss
     TAKE_PROFIT_PERCENTAGE = float(os.getenv('TAKE_PROFIT_PERCENTAGE', 0.04))  # 4% take profit
     
+    # Exchange discovery (the winning exchange is remembered so restarts skip probing)
+    EXCHANGE_CHOICE_FILE = os.getenv('EXCHANGE_CHOICE_FILE', 'exchange_choice.json')
+    EXCHANGE_CHOICE_TTL_HOURS = float(os.getenv('EXCHANGE_CHOICE_TTL_HOURS', 24))
+    EXCHANGE_PROBE_GRACE_SECONDS = float(os.getenv('EXCHANGE_PROBE_GRACE_SECONDS', 2))
+    
+    # Hedged reads: tickers, candles and order books also go to a second exchange when the primary is slow
+    HEDGED_READS = os.getenv('HEDGED_READS', 'false').lower() == 'true'
+    HEDGE_AFTER_MS = float(os.getenv('HEDGE_AFTER_MS', 0))  # 0 = adaptive (primary's p95 latency)
+    HEDGE_SECONDARY_EXCHANGE = os.getenv('HEDGE_SECONDARY_EXCHANGE', '')  # '' = fastest other probed exchange
+    
+    # Record every exchange call to a gzip log, or serve a run entirely from such a log (no network)
+    EXCHANGE_RECORD_FILE = os.getenv('EXCHANGE_RECORD_FILE', '')
+    EXCHANGE_REPLAY_FILE = os.getenv('EXCHANGE_REPLAY_FILE', '')
+    EXCHANGE_REPLAY_LATENCY = float(os.getenv('EXCHANGE_REPLAY_LATENCY', 0))  # 1.0 = recorded latencies, 0 = none
+    
+    # Mock exchange (EXCHANGE=mock): synthetic prices, books, trades and fills for MOCK_SYMBOLS
+    MOCK_SYMBOLS = MOCK_SYMBOLS
+    MOCK_PRICE_MODEL = os.getenv('MOCK_PRICE_MODEL', 'random_walk')  # 'random_walk' or 'regime'
+    MOCK_LATENCY_MS = float(os.getenv('MOCK_LATENCY_MS', 0))  # Mean simulated round trip
+    MOCK_ERROR_RATE = float(os.getenv('MOCK_ERROR_RATE', 0))  # Share of calls failing with a network error
+    MOCK_SEED = int(os.getenv('MOCK_SEED', 42))
+    MOCK_BALANCE_USDT = float(os.getenv('MOCK_BALANCE_USDT', 10000))
+    MOCK_HISTORY_DAYS = int(os.getenv('MOCK_HISTORY_DAYS', 60))
+    
     # Trading Pairs (High liquidity coins only)
-    TRADING_PAIRS = os.getenv('TRADING_PAIRS', 'BTC/USDT,ETH/USDT').split(',')
+    TRADING_PAIRS = _TRADING_PAIRS
     
     # Risk Management
     MAX_DAILY_LOSS = float(os.getenv('MAX_DAILY_LOSS', 500))
@@ -26,15 +66,77 @@ class Config:
     # Database
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///trading.db')
     
+    # Local candle store (only new bars are downloaded, the rest is served from DATABASE_URL)
+    CANDLE_STORE_ENABLED = os.getenv('CANDLE_STORE_ENABLED', 'true').lower() == 'true'
+    
+    # Columnar export of the candle store for backtests and training (python -m src.candle_archive)
+    CANDLE_ARCHIVE_DIR = os.getenv('CANDLE_ARCHIVE_DIR', 'candle_archive')
+    CANDLE_ARCHIVE_FORMAT = os.getenv('CANDLE_ARCHIVE_FORMAT', 'arrow')  # 'arrow' (memory-mapped) or 'parquet'
+    
+    # Candles kept in memory per (symbol, timeframe) by the live bots
+    MARKET_STATE_CAPACITY = int(os.getenv('MARKET_STATE_CAPACITY', 500))
+    
+    # Live bots update indicators incrementally per candle instead of recomputing the whole window
+    STREAMING_INDICATORS = os.getenv('STREAMING_INDICATORS', 'true').lower() == 'true'
+    
+    # Live bots compute the indicators of all trading pairs once per cycle as one (symbols, bars)
+    # NumPy panel (src.indicator_panel, with any INDICATOR_BACKEND); used instead of streaming indicators
+    INDICATOR_PANELS = os.getenv('INDICATOR_PANELS', 'false').lower() == 'true'
+    
+    # Indicator frames, ML predictions and strategy signals are reused while the candles are unchanged
+    INDICATOR_CACHE_ENTRIES = int(os.getenv('INDICATOR_CACHE_ENTRIES', 512))
+    INDICATOR_CACHE_MB = float(os.getenv('INDICATOR_CACHE_MB', 64))
+    
+    # Tickers / last prices are reused for this long (dashboard polling and bots share them)
+    QUOTE_CACHE_TTL_SECONDS = float(os.getenv('QUOTE_CACHE_TTL_SECONDS', 3))
+    
+    # Exchange request weight budget per minute (0 = the exchange's published limit)
+    RATE_LIMIT_WEIGHT_PER_MINUTE = float(os.getenv('RATE_LIMIT_WEIGHT_PER_MINUTE', 0))
+    
+    # Exchange calls: network errors are retried with jittered exponential backoff (async calls; synchronous
+    # ones try once and leave it to the next cycle), and an endpoint failing CIRCUIT_FAILURE_RATE of its
+    # last CIRCUIT_WINDOW_CALLS calls (once CIRCUIT_MIN_CALLS are known) is skipped for CIRCUIT_OPEN_SECONDS
+    RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', 3))  # Tries per async call, 1 = no retries
+    RETRY_BASE_DELAY_MS = float(os.getenv('RETRY_BASE_DELAY_MS', 250))
+    RETRY_MAX_DELAY_MS = float(os.getenv('RETRY_MAX_DELAY_MS', 4000))
+    RETRY_BUDGET_SECONDS = float(os.getenv('RETRY_BUDGET_SECONDS', 10))  # Most backoff one call may wait in total
+    CIRCUIT_WINDOW_CALLS = int(os.getenv('CIRCUIT_WINDOW_CALLS', 50))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 5))
+    CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))
+    
+    # Streaming market data: exit checks react to every ticker, analysis runs on candle close
+    MARKET_FEED = os.getenv('MARKET_FEED', 'none')  # 'none' (trading cycle only), 'polling' or 'replay'
+    FEED_POLL_SECONDS = float(os.getenv('FEED_POLL_SECONDS', 5))
+    FEED_REPLAY_FILE = os.getenv('FEED_REPLAY_FILE', 'market_feed.jsonl')
+    FEED_REPLAY_SPEED = float(os.getenv('FEED_REPLAY_SPEED', 1.0))  # 2.0 = twice as fast, 0 = as fast as possible
+    FEED_RECORD_FILE = os.getenv('FEED_RECORD_FILE', '')  # Append live feed events here for later replay
+    
+    # Order book: local books are reused for this long; with MAX_SLIPPAGE_BPS set, market orders whose
+    # expected slippage is above it (or that the visible book cannot fill) are skipped
+    ORDER_BOOK_MAX_AGE_SECONDS = float(os.getenv('ORDER_BOOK_MAX_AGE_SECONDS', 2))
+    SENTIMENT_DEPTH_BPS = float(os.getenv('SENTIMENT_DEPTH_BPS', 25))  # Band around the mid for book imbalance
+    MAX_SLIPPAGE_BPS = float(os.getenv('MAX_SLIPPAGE_BPS', 0))  # 0 = no pre-trade check (opt-in, e.g. 50)
+    
+    # Public trades are kept per symbol with rolling buy/sell totals over these windows (seconds)
+    TRADE_TAPE_WINDOWS = [int(w) for w in os.getenv('TRADE_TAPE_WINDOWS', '60,300,900').split(',')]
+    SENTIMENT_TRADE_WINDOW_SECONDS = int(os.getenv('SENTIMENT_TRADE_WINDOW_SECONDS', 300))
+    
     # Timeframes for analysis
     TIMEFRAMES = ['1m', '5m', '15m', '30m', '1h', '4h', '1d']
     PRIMARY_TIMEFRAME = '15m'  # 15-30 min recommended
     
+    # Multi-timeframe data is resampled locally from one stored base timeframe
+    MTF_BASE_TIMEFRAME = os.getenv('MTF_BASE_TIMEFRAME', '1m')
+    MTF_HISTORY_DAYS = int(os.getenv('MTF_HISTORY_DAYS', 30))  # Base history kept for the higher timeframes
+    
     # ML Model Configuration
     MODEL_RETRAIN_INTERVAL = 24  # hours
+    TRAINING_HISTORY_DAYS = int(os.getenv('TRAINING_HISTORY_DAYS', 365))  # 1h candles backfilled for full training
     PREDICTION_CONFIDENCE_THRESHOLD = 0.55  # Lowered to allow more trades in paper mode
     
     # Technical Indicators Configuration
+    INDICATOR_BACKEND = os.getenv('INDICATOR_BACKEND', 'ta')  # 'ta' or 'numpy' (vectorized, parity-tested against ta)
     RSI_PERIOD = 14
     RSI_OVERBOUGHT = 70
     RSI_OVERSOLD = 30
@@ -54,9 +156,10 @@ class Config:
 # NOTE: Set your actual capital in USDT (e.g., 23 for ₹2000, 50 for ₹4000, etc.)
 INITIAL_CAPITAL = float(os.getenv('INITIAL_CAPITAL', '10000'))  # Default 10000 for paper, change for live
 TRADING_MODE = os.getenv('TRADING_MODE', 'paper')
-TRADING_PAIRS = os.getenv('TRADING_PAIRS', 'BTC/USDT,ETH/USDT').split(',')  # High liquidity pairs only
+TRADING_PAIRS = _TRADING_PAIRS  # High liquidity pairs only
 
-# Exchange selection (use 'auto' to try all exchanges, or specify: 'binance', 'kucoin', 'okx', 'bybit', 'kraken')
+# Exchange selection (use 'auto' to try all exchanges, or specify: 'binance', 'kucoin', 'okx', 'bybit', 'kraken',
+# or 'mock' for the synthetic local exchange)
 EXCHANGE = os.getenv('EXCHANGE', 'auto')
 
 # Proxy settings (for accessing Binance from restricted regions)
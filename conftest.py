@@ -0,0 +1,16 @@
+"""
+pytest settings for the repository root
+
+The test_*.py scripts below are manual checks against a live exchange, a
+running dashboard or real API keys: they do their work at import time, so
+pytest must not collect them. Run them directly (python test_balance.py).
+"""
+
+collect_ignore = [
+    'test_api_permissions.py',
+    'test_balance.py',
+    'test_binance_connection.py',
+    'test_bot_health.py',
+    'test_full_system.py',
+    'test_mode_switch_api.py',
+]
@@ -0,0 +1,446 @@
+import asyncio
+import time
+import ccxt
+import ccxt.async_support as ccxt_async
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+from config import Config
+from src.data_fetcher import Candles, MarketDataMixin
+from src.exchange_registry import exchange_registry
+from src.order_book import OrderBook
+from src.trade_tape import TradeTape
+from src.rate_limiter import Priority
+from src.retry_policy import CircuitOpenError, retry_attempts
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMarketDataFetcher(MarketDataMixin):
+    """
+    Asyncio counterpart of MarketDataFetcher built on ccxt.async_support
+
+    Offers the MarketDataFetcher reads and orders as coroutines, plus batch
+    helpers that gather many reads into one round of concurrent requests.
+    It is not a MarketDataFetcher (its methods must be awaited); both share
+    MarketDataMixin. Candle store reads and writes run in a worker thread so
+    they do not block the event loop.
+
+    Usage:
+        async with AsyncMarketDataFetcher() as fetcher:
+            frames = await fetcher.get_multi_symbol_data(['BTC/USDT', 'ETH/USDT'])
+    """
+
+    def __init__(self, exchange_name: str = 'auto', max_concurrency: int = 10):
+        # Connection happens in connect(), __init__ cannot await
+        self.config = Config()
+        self.exchange_name = exchange_name
+        self.exchange = None
+        self.exchange_selection = {}
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self.candle_store = self._initialize_candle_store()
+        self.order_books: Dict[str, OrderBook] = {}
+        self.trade_tapes = {}
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def connect(self):
+        """Connect to the fastest reachable exchange"""
+        if self.exchange is None:
+            self.exchange = await self._initialize_exchange()
+            self._configure_exchange(self.exchange)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.rate_limiter = exchange_registry.get_rate_limiter(
+                self.exchange_name, self.config.RATE_LIMIT_WEIGHT_PER_MINUTE or None)
+            self.exchange_guard = exchange_registry.get_exchange_guard(self.exchange_name)
+        return self
+
+    async def close(self):
+        """Release the exchange's HTTP session"""
+        if self.exchange is not None:
+            await self.exchange.close()
+            self.exchange = None
+
+    def _configure_exchange(self, exchange):
+        """Apply credentials and proxies (aiohttp takes a single proxy URL)"""
+        super()._configure_exchange(exchange)
+        from config import HTTP_PROXY, HTTPS_PROXY
+        if HTTP_PROXY or HTTPS_PROXY:
+            exchange.aiohttp_proxy = HTTPS_PROXY or HTTP_PROXY
+
+    async def _initialize_exchange(self):
+        """Connect to the fastest reachable exchange (see MarketDataFetcher._initialize_exchange)"""
+        started = time.perf_counter()
+
+        cached = await asyncio.to_thread(self._load_exchange_choice)
+        if cached is not None:
+            try:
+                exchange = getattr(ccxt_async, cached['exchange_id'])(self.EXCHANGE_OPTIONS)
+                self._record_exchange_selection(cached['exchange_id'], 'cache', started,
+                                                cached.get('probe_latencies_ms', {}))
+                return exchange
+            except Exception as e:
+                logger.warning(f"Cached exchange choice unusable, probing again: {e}")
+
+        tasks = {asyncio.ensure_future(self._probe_exchange(exchange_id, name)): exchange_id
+                 for exchange_id, name in self._exchanges_to_try()}
+        probes = {}
+        pending = set(tasks)
+        deadline = None
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                result = task.result()
+                if result is not None:
+                    probes[tasks[task]] = result
+                    if deadline is None:
+                        deadline = time.perf_counter() + self.config.EXCHANGE_PROBE_GRACE_SECONDS
+        for task in pending:
+            task.cancel()
+
+        if not probes:
+            logger.error("Failed to connect to any exchange! Check your internet connection.")
+            raise Exception("Could not connect to any cryptocurrency exchange")
+
+        exchange_id = self._select_exchange(probes)
+        for other_id, (_, exchange) in probes.items():
+            if other_id != exchange_id:
+                await exchange.close()
+
+        latencies = {ex_id: round(latency, 1) for ex_id, (latency, _) in probes.items()}
+        await asyncio.to_thread(self._save_exchange_choice, exchange_id, latencies)
+        self._record_exchange_selection(exchange_id, 'probe', started, latencies)
+        return probes[exchange_id][1]
+
+    async def _probe_exchange(self, exchange_id: str, exchange_name: str) -> Optional[Tuple[float, object]]:
+        """Time a ticker request against one exchange, returns (latency_ms, exchange) or None"""
+        exchange = None
+        try:
+            logger.info(f"Trying to connect to {exchange_name}...")
+            exchange = getattr(ccxt_async, exchange_id)(self.EXCHANGE_OPTIONS)
+            started = time.perf_counter()
+            ticker = await exchange.fetch_ticker('BTC/USDT')
+            latency_ms = (time.perf_counter() - started) * 1000
+            if ticker and 'last' in ticker:
+                logger.info(f"[OK] {exchange_name} reachable ({latency_ms:.0f} ms)")
+                return latency_ms, exchange
+        except asyncio.CancelledError:
+            if exchange is not None:
+                await exchange.close()
+            raise
+        except Exception as e:
+            logger.warning(f"[FAIL] {exchange_name} failed: {str(e)[:150]}")
+
+        if exchange is not None:
+            await exchange.close()
+        return None
+
+    async def _call(self, method: str, *args, **kwargs):
+        """
+        Run one exchange request, bounded by the concurrency limit and the shared rate limiter
+
+        Network errors are retried with backoff (awaited, not slept) and an
+        endpoint whose circuit is open raises CircuitOpenError at once.
+        """
+        return await self.exchange_guard.call_async(method, lambda: self._send(method, args, kwargs))
+
+    async def _send(self, method: str, args: tuple, kwargs: Dict):
+        """One request, no retries (the concurrency slot is not held during backoff)"""
+        priority = Priority.ORDER if method in self.ORDER_METHODS else None
+        async with self._semaphore:
+            await self.rate_limiter.acquire_async(self.rate_limiter.weight(method), priority)
+            try:
+                return await getattr(self.exchange, method)(*args, **kwargs)
+            except ccxt.RateLimitExceeded:
+                self.rate_limiter.penalize()
+                raise
+
+    async def get_ohlcv(self, symbol: str, timeframe: str = '15m',
+                        limit: int = 500, since: Optional[int] = None, retries: int = None) -> pd.DataFrame:
+        """Fetch OHLCV data as a DataFrame (see MarketDataFetcher.get_ohlcv)"""
+        return (await self.get_candles(symbol, timeframe, limit, since, retries)).to_frame()
+
+    async def get_candles(self, symbol: str, timeframe: str = '15m',
+                          limit: int = 500, since: Optional[int] = None, retries: int = None) -> Candles:
+        """Fetch OHLCV data (see MarketDataFetcher.get_candles)"""
+        fetch_since, fetch_limit, serve_from_store = since, limit, False
+        if since is None and self.candle_store is not None:
+            fetch_since, fetch_limit, serve_from_store = await asyncio.to_thread(
+                self._plan_incremental_fetch, symbol, timeframe, limit)
+
+        try:
+            with retry_attempts(None if retries is None else retries + 1):
+                ohlcv = await self._call('fetch_ohlcv', symbol, timeframe, fetch_since, fetch_limit)
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping OHLCV for {symbol}: {e}")
+            return Candles.from_ohlcv([])
+        except ccxt.NetworkError as e:
+            logger.error(f"Network error fetching OHLCV for {symbol} after retries: {e}")
+            return Candles.from_ohlcv([])
+        except Exception as e:
+            logger.error(f"Error fetching OHLCV for {symbol}: {e}")
+            return Candles.from_ohlcv([])
+
+        if self.candle_store is not None and ohlcv:
+            await asyncio.to_thread(self.candle_store.upsert, self.exchange_name, symbol, timeframe, ohlcv)
+
+        if serve_from_store:
+            ohlcv = await asyncio.to_thread(self.candle_store.load, self.exchange_name, symbol, timeframe,
+                                            limit=limit)
+
+        if not ohlcv:
+            logger.warning(f"Empty OHLCV data for {symbol}")
+            return Candles.from_ohlcv([])
+
+        return Candles.from_ohlcv(ohlcv)
+
+    async def get_ohlcv_batch(self, requests: List[Tuple[str, str]],
+                              limit: int = 500) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Fetch many (symbol, timeframe) series as one gathered batch
+
+        Returns:
+            Dict mapping (symbol, timeframe) to its DataFrame (failed series are omitted)
+        """
+        frames = await asyncio.gather(*[self.get_ohlcv(symbol, tf, limit=limit) for symbol, tf in requests])
+        return {key: df for key, df in zip(requests, frames) if not df.empty}
+
+    async def get_multi_symbol_data(self, symbols: List[str], timeframe: str = '15m',
+                                    limit: int = 500) -> Dict[str, pd.DataFrame]:
+        """Fetch one timeframe for many symbols concurrently"""
+        batch = await self.get_ohlcv_batch([(symbol, timeframe) for symbol in symbols], limit=limit)
+        return {symbol: df for (symbol, _), df in batch.items()}
+
+    async def get_multi_timeframe_data(self, symbol: str, timeframes: List[str] = None) -> Dict[str, pd.DataFrame]:
+        """Fetch data for multiple timeframes concurrently"""
+        if timeframes is None:
+            timeframes = self.config.TIMEFRAMES
+
+        batch = await self.get_ohlcv_batch([(symbol, tf) for tf in timeframes], limit=500)
+        return {tf: df for (_, tf), df in batch.items()}
+
+    async def backfill_ohlcv(self, symbol: str, timeframe: str = '1h',
+                             start: Union[str, datetime, int, None] = None,
+                             end: Union[str, datetime, int, None] = None,
+                             max_workers: int = 4) -> pd.DataFrame:
+        """Download a historical date range (see MarketDataFetcher.backfill_ohlcv)"""
+        start_ms, end_ms, pages = await asyncio.to_thread(self._plan_backfill_pages, symbol, timeframe, start, end)
+        if not pages and end_ms < start_ms:
+            return pd.DataFrame()
+
+        page_slots = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch_page(page_start, expected):
+            async with page_slots:
+                return await self._fetch_ohlcv_page(symbol, timeframe, page_start, expected)
+
+        collected = []
+        failed = 0
+        for candles in await asyncio.gather(*[fetch_page(page_start, expected) for page_start, expected in pages]):
+            if candles is None:
+                failed += 1
+            else:
+                await asyncio.to_thread(self._store_backfill_page, symbol, timeframe, candles, start_ms, end_ms,
+                                        collected)
+
+        return await asyncio.to_thread(self._finish_backfill, symbol, timeframe, start_ms, end_ms, collected, failed)
+
+    async def _fetch_ohlcv_page(self, symbol: str, timeframe: str, since: int, limit: int) -> Optional[List[list]]:
+        """Fetch a single backfill page (None if it failed)"""
+        try:
+            return await self._call('fetch_ohlcv', symbol, timeframe, since, limit)
+        except ccxt.NetworkError as e:
+            logger.error(f"Network error backfilling {symbol} page {since}: {e}")
+        except Exception as e:
+            logger.error(f"Error backfilling {symbol} page {since}: {e}")
+        return None
+
+    async def get_ticker(self, symbol: str) -> Dict:
+        """Get current ticker information"""
+        try:
+            ticker = await self._call('fetch_ticker', symbol)
+            return self._format_ticker(symbol, ticker)
+        except Exception as e:
+            logger.error(f"Error fetching ticker for {symbol}: {e}")
+            return None
+
+    async def get_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get tickers for many symbols in one round trip (see MarketDataFetcher.get_tickers)"""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        if self.exchange.has.get('fetchTickers'):
+            try:
+                tickers = await self._call('fetch_tickers', symbols)
+                return {symbol: self._format_ticker(symbol, tickers[symbol])
+                        for symbol in symbols if symbol in tickers}
+            except Exception as e:
+                logger.warning(f"Bulk ticker fetch failed, falling back to single requests: {e}")
+
+        results = await asyncio.gather(*[self.get_ticker(symbol) for symbol in symbols])
+        return {symbol: ticker for symbol, ticker in zip(symbols, results) if ticker}
+
+    async def get_last_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Last traded price per symbol from a single bulk ticker request"""
+        tickers = await self.get_tickers(symbols)
+        return {symbol: ticker['last'] for symbol, ticker in tickers.items() if ticker.get('last')}
+
+    async def get_order_book(self, symbol: str, limit: int = 20) -> Dict:
+        """Get order book data"""
+        try:
+            order_book = await self._call('fetch_order_book', symbol, limit)
+            return {
+                'bids': order_book['bids'],
+                'asks': order_book['asks'],
+                'timestamp': order_book['timestamp']
+            }
+        except Exception as e:
+            logger.error(f"Error fetching order book for {symbol}: {e}")
+            return {'bids': [], 'asks': []}
+
+    async def get_local_order_book(self, symbol: str, depth: int = 50, max_age: float = None) -> OrderBook:
+        """Local order book for symbol, refreshed with a snapshot when stale (see MarketDataFetcher.get_local_order_book)"""
+        if max_age is None:
+            max_age = self.config.ORDER_BOOK_MAX_AGE_SECONDS
+        book = self.order_books.get(symbol)
+        if book is None:
+            book = self.order_books.setdefault(symbol, OrderBook(symbol))
+        if book.age() <= max_age and not book.empty:
+            return book
+        try:
+            snapshot = await self._call('fetch_order_book', symbol, depth)
+            book.apply_snapshot(snapshot['bids'], snapshot['asks'], snapshot.get('timestamp'), snapshot.get('nonce'),
+                                self.exchange_name)
+        except Exception as e:
+            logger.error(f"Error fetching order book for {symbol}: {e}")
+        return book
+
+    async def estimate_slippage(self, symbol: str, side: str, notional: float) -> Optional[float]:
+        """Expected cost of a market order against the mid price, in basis points (see MarketDataFetcher.estimate_slippage)"""
+        book = await self.get_local_order_book(symbol)
+        if book.empty:
+            return None
+        slippage = book.slippage_bps(side, notional=notional)
+        return float('inf') if slippage is None else slippage
+
+    async def get_recent_trades(self, symbol: str, limit: int = 100) -> pd.DataFrame:
+        """Newest trades from the symbol's trade tape (after fetching any new ones)"""
+        try:
+            return (await self.update_trade_tape(symbol)).tail(limit)
+        except Exception as e:
+            logger.error(f"Error fetching trades for {symbol}: {e}")
+            return pd.DataFrame()
+
+    async def update_trade_tape(self, symbol: str) -> TradeTape:
+        """Append the trades made since the last update to the symbol's TradeTape"""
+        tape = self._trade_tape(symbol)
+        since = self._trade_since(tape)
+        for _ in range(self.TRADE_PAGES_PER_UPDATE):
+            trades = await self._call('fetch_trades', symbol, since=since, limit=self.TRADE_PAGE_LIMIT)
+            tape.add(trades)
+            if since is None or len(trades) < self.TRADE_PAGE_LIMIT or trades[-1]['timestamp'] <= since:
+                break
+            since = trades[-1]['timestamp']
+        return tape
+
+    async def get_market_sentiment(self, symbol: str) -> Dict:
+        """Calculate market sentiment, fetching order book and new trades concurrently"""
+        try:
+            order_book, tape = await asyncio.gather(
+                self.get_order_book(symbol, limit=50),
+                self.update_trade_tape(symbol)
+            )
+            trade_flow = tape.window(self.config.SENTIMENT_TRADE_WINDOW_SECONDS, now=self.exchange.milliseconds())
+            return self._compute_sentiment(OrderBook.from_ccxt(symbol, order_book), trade_flow)
+        except Exception as e:
+            logger.error(f"Error calculating sentiment for {symbol}: {e}")
+            return {'sentiment_score': 50, 'interpretation': 'neutral'}
+
+    async def get_account_balance(self, currency: str = 'USDT') -> Dict:
+        """Fetch account balance from exchange"""
+        try:
+            balance = await self._call('fetch_balance')
+            return self._format_balance(balance, currency)
+        except Exception as e:
+            logger.error(f"Error fetching balance for {currency}: {e}")
+            return None
+
+    async def place_market_order(self, symbol: str, side: str, amount: float, test_mode: bool = False) -> Dict:
+        """Place a market order on the exchange (see MarketDataFetcher.place_market_order)"""
+        try:
+            if not self._has_credentials():
+                logger.error("API credentials not configured - cannot place orders")
+                return None
+
+            logger.info(f"{'TEST ' if test_mode else ''}Placing {side.upper()} market order: {amount} {symbol}")
+
+            if test_mode and hasattr(self.exchange, 'create_test_order'):
+                order = await self._call('create_test_order', symbol, 'market', side, amount)
+                logger.info(f"[OK] Test order successful: {order}")
+            else:
+                order = await self._call('create_market_order', symbol, side, amount)
+                logger.info(f"[OK] Live order placed: {order.get('id', 'N/A')}")
+
+            return self._format_market_order(order, symbol, side, amount)
+
+        except ccxt.InsufficientFunds as e:
+            logger.error(f"Insufficient funds for {side} {amount} {symbol}: {e}")
+            return {'success': False, 'error': 'insufficient_funds', 'message': str(e)}
+        except ccxt.InvalidOrder as e:
+            logger.error(f"Invalid order for {symbol}: {e}")
+            return {'success': False, 'error': 'invalid_order', 'message': str(e)}
+        except Exception as e:
+            logger.error(f"Error placing {side} order for {symbol}: {e}")
+            return {'success': False, 'error': 'unknown', 'message': str(e)}
+
+    async def place_limit_order(self, symbol: str, side: str, amount: float, price: float,
+                                test_mode: bool = False) -> Dict:
+        """Place a limit order on the exchange (see MarketDataFetcher.place_limit_order)"""
+        try:
+            if not self._has_credentials():
+                logger.error("API credentials not configured - cannot place orders")
+                return None
+
+            logger.info(f"{'TEST ' if test_mode else ''}Placing {side.upper()} limit order: {amount} {symbol} @ ${price}")
+
+            if test_mode and hasattr(self.exchange, 'create_test_order'):
+                order = await self._call('create_test_order', symbol, 'limit', side, amount, price)
+                logger.info(f"[OK] Test limit order successful")
+            else:
+                order = await self._call('create_limit_order', symbol, side, amount, price)
+                logger.info(f"[OK] Live limit order placed: {order.get('id', 'N/A')}")
+
+            return self._format_limit_order(order, symbol, side, amount, price)
+
+        except Exception as e:
+            logger.error(f"Error placing limit order for {symbol}: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def cancel_order(self, order_id: str, symbol: str) -> bool:
+        """Cancel an open order"""
+        try:
+            await self._call('cancel_order', order_id, symbol)
+            logger.info(f"[OK] Order {order_id} cancelled for {symbol}")
+            return True
+        except Exception as e:
+            logger.error(f"Error cancelling order {order_id}: {e}")
+            return False
+
+    async def get_open_orders(self, symbol: str = None) -> List[Dict]:
+        """Get all open orders"""
+        try:
+            return await self._call('fetch_open_orders', symbol)
+        except Exception as e:
+            logger.error(f"Error fetching open orders: {e}")
+            return []
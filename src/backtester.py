@@ -1,10 +1,11 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Callable
+from typing import Dict, Iterable, List, Callable, Union
 from datetime import datetime
 import logging
 from config import Config
 from src.risk_manager import RiskManager
+from src.data_fetcher import Candles, as_frame
 
 logger = logging.getLogger(__name__)
 
@@ -19,20 +20,25 @@ class Backtester:
         self.trades = []
         self.equity_curve = []
         
-    def run_backtest(self, df: pd.DataFrame, strategy_func: Callable, 
+    def run_backtest(self, df: Union[pd.DataFrame, Candles, Iterable], strategy_func: Callable, 
                      symbol: str = 'BTC/USDT') -> Dict:
         """
         Run backtest on historical data
         
+        History longer than memory can be passed as chunks in time order,
+        e.g. CandleArchive.iter_months(..., overlap=n) with indicators added
+        per chunk. Bars a chunk repeats from the previous one (its warmup for
+        the indicators) are not traded again, and positions carry over.
+        
         Args:
-            df: DataFrame with OHLCV and indicators
-            strategy_func: Function that returns trading signals
+            df: DataFrame (or Candles) with OHLCV and indicators, or an iterable of them
+            strategy_func: Function that returns trading signals (gets the current chunk up to the bar)
             symbol: Trading pair symbol
         
         Returns:
             Dict with backtest results
         """
-        logger.info(f"Running backtest on {len(df)} candles")
+        chunks = [df] if isinstance(df, (pd.DataFrame, Candles)) else df
         
         self.capital = self.initial_capital
         self.positions = []
@@ -41,75 +47,90 @@ class Backtester:
         
         risk_manager = RiskManager()
         
-        for i in range(100, len(df)):  # Start after 100 candles for indicator warmup
-            current_data = df.iloc[:i+1]
-            current_price = df.iloc[i]['close']
-            timestamp = df.index[i]
+        bars = 0
+        final_price = final_timestamp = None
+        for chunk in chunks:
+            df = as_frame(chunk)
+            logger.info(f"Running backtest on {len(df)} candles")
             
-            # Get strategy signal
-            signal_result = strategy_func(current_data)
-            signal = signal_result.get('signal', 'HOLD')
-            confidence = signal_result.get('confidence', 0)
+            # Read prices and times from arrays instead of building a row per step
+            closes = df['close'].to_numpy()
+            timestamps = df.index
+            first = 0 if final_timestamp is None else int(timestamps.searchsorted(final_timestamp, side='right'))
             
-            # Update existing positions
-            for position in self.positions:
-                position['current_price'] = current_price
+            for i in range(first, len(df)):
+                bars += 1
+                if bars <= 100:  # Start after 100 candles for indicator warmup
+                    continue
+                current_data = df.iloc[:i+1]
+                current_price = closes[i]
+                timestamp = timestamps[i]
                 
-                # Calculate P&L
-                if position['side'] == 'LONG':
-                    position['pnl'] = (current_price - position['entry_price']) * position['size']
-                    pnl_pct = (current_price - position['entry_price']) / position['entry_price']
-                else:
-                    position['pnl'] = (position['entry_price'] - current_price) * position['size']
-                    pnl_pct = (position['entry_price'] - current_price) / position['entry_price']
+                # Get strategy signal
+                signal_result = strategy_func(current_data)
+                signal = signal_result.get('signal', 'HOLD')
+                confidence = signal_result.get('confidence', 0)
                 
-                # Check exit conditions
-                should_exit = False
-                exit_reason = ''
+                # Update existing positions
+                for position in self.positions:
+                    position['current_price'] = current_price
+                    
+                    # Calculate P&L
+                    if position['side'] == 'LONG':
+                        position['pnl'] = (current_price - position['entry_price']) * position['size']
+                        pnl_pct = (current_price - position['entry_price']) / position['entry_price']
+                    else:
+                        position['pnl'] = (position['entry_price'] - current_price) * position['size']
+                        pnl_pct = (position['entry_price'] - current_price) / position['entry_price']
+                    
+                    # Check exit conditions
+                    should_exit = False
+                    exit_reason = ''
+                    
+                    if position['side'] == 'LONG':
+                        if current_price <= position['stop_loss']:
+                            should_exit = True
+                            exit_reason = 'Stop Loss'
+                        elif current_price >= position['take_profit']:
+                            should_exit = True
+                            exit_reason = 'Take Profit'
+                    elif position['side'] == 'SHORT':
+                        if current_price >= position['stop_loss']:
+                            should_exit = True
+                            exit_reason = 'Stop Loss'
+                        elif current_price <= position['take_profit']:
+                            should_exit = True
+                            exit_reason = 'Take Profit'
+                    
+                    if should_exit:
+                        self._close_position(position, current_price, timestamp, exit_reason)
                 
-                if position['side'] == 'LONG':
-                    if current_price <= position['stop_loss']:
-                        should_exit = True
-                        exit_reason = 'Stop Loss'
-                    elif current_price >= position['take_profit']:
-                        should_exit = True
-                        exit_reason = 'Take Profit'
-                elif position['side'] == 'SHORT':
-                    if current_price >= position['stop_loss']:
-                        should_exit = True
-                        exit_reason = 'Stop Loss'
-                    elif current_price <= position['take_profit']:
-                        should_exit = True
-                        exit_reason = 'Take Profit'
+                # Remove closed positions
+                self.positions = [p for p in self.positions if p.get('status') != 'CLOSED']
                 
-                if should_exit:
-                    self._close_position(position, current_price, timestamp, exit_reason)
-            
-            # Remove closed positions
-            self.positions = [p for p in self.positions if p.get('status') != 'CLOSED']
-            
-            # Check for new entry signals
-            if len(self.positions) < self.config.MAX_OPEN_POSITIONS:
-                if signal == 'BUY' and confidence >= self.config.PREDICTION_CONFIDENCE_THRESHOLD:
-                    self._open_position('LONG', current_price, timestamp, confidence, symbol)
-                elif signal == 'SELL' and confidence >= self.config.PREDICTION_CONFIDENCE_THRESHOLD:
-                    self._open_position('SHORT', current_price, timestamp, confidence, symbol)
-            
-            # Record equity
-            total_equity = self.capital
-            for position in self.positions:
-                total_equity += position.get('pnl', 0)
+                # Check for new entry signals
+                if len(self.positions) < self.config.MAX_OPEN_POSITIONS:
+                    if signal == 'BUY' and confidence >= self.config.PREDICTION_CONFIDENCE_THRESHOLD:
+                        self._open_position('LONG', current_price, timestamp, confidence, symbol)
+                    elif signal == 'SELL' and confidence >= self.config.PREDICTION_CONFIDENCE_THRESHOLD:
+                        self._open_position('SHORT', current_price, timestamp, confidence, symbol)
+                
+                # Record equity
+                total_equity = self.capital
+                for position in self.positions:
+                    total_equity += position.get('pnl', 0)
+                
+                self.equity_curve.append({
+                    'timestamp': timestamp,
+                    'equity': total_equity,
+                    'cash': self.capital,
+                    'positions': len(self.positions)
+                })
             
-            self.equity_curve.append({
-                'timestamp': timestamp,
-                'equity': total_equity,
-                'cash': self.capital,
-                'positions': len(self.positions)
-            })
+            if len(df):
+                final_price, final_timestamp = closes[-1], timestamps[-1]
         
         # Close all remaining positions at the end
-        final_price = df.iloc[-1]['close']
-        final_timestamp = df.index[-1]
         for position in self.positions:
             self._close_position(position, final_price, final_timestamp, 'Backtest End')
         
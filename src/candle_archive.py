@@ -0,0 +1,273 @@
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from config import Config
+from src.candle_store import CandleStore
+from src.data_fetcher import Candles, MarketDataFetcher
+
+# Try to import pyarrow (optional, only needed for the archive)
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TimeLike = Union[str, datetime, int, None]
+
+EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def _month_start(ms: int) -> int:
+    moment = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _next_month(ms: int) -> int:
+    moment = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _month_name(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+
+def _symbol_dir(symbol: str) -> str:
+    """BTC/USDT -> BTC-USDT, BTC/USDT:USDT -> BTC-USDT_USDT"""
+    return symbol.replace('/', '-').replace(':', '_')
+
+
+class CandleArchive:
+    """
+    Columnar candle history on disk, one file per symbol and month
+
+    Files live at root/<exchange>/<timeframe>/<symbol>/<YYYY-MM>.<ext> with
+    int64 timestamp and float64 open, high, low, close and volume columns.
+    The default 'arrow' format is uncompressed Arrow IPC, which is memory
+    mapped on read: only the months of the requested range are touched and
+    repeated research runs read from the page cache. load() copies the range
+    into one in-memory Candles, so it needs RAM for the whole range;
+    iter_months() holds one month at a time, and Backtester.run_backtest and
+    MLPredictor.train accept its chunks for datasets larger than RAM.
+    'parquet' files are zstd-compressed, smaller to keep or share, but are
+    decompressed on every read.
+    """
+
+    def __init__(self, root: str = None, file_format: str = None):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("The candle archive needs pyarrow. Install with: pip install pyarrow")
+        self.root = root or Config.CANDLE_ARCHIVE_DIR
+        self.file_format = file_format or Config.CANDLE_ARCHIVE_FORMAT
+        if self.file_format not in EXTENSIONS:
+            raise ValueError(f"Unknown archive format '{self.file_format}', use one of {list(EXTENSIONS)}")
+        self.extension = EXTENSIONS[self.file_format]
+
+    def _series_dir(self, exchange: str, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, exchange, timeframe, _symbol_dir(symbol))
+
+    def _month_files(self, exchange: str, symbol: str, timeframe: str,
+                     start: int = None, end: int = None) -> List[str]:
+        """Month files of a series overlapping [start, end], oldest first"""
+        directory = self._series_dir(exchange, symbol, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        first = _month_name(start) if start is not None else ''
+        last = _month_name(end) if end is not None else '9999-99'
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith(self.extension) and first <= name[:7] <= last]
+
+    def export(self, store: CandleStore, exchange: str, symbol: str, timeframe: str,
+               start: TimeLike = None, end: TimeLike = None) -> int:
+        """
+        Write the stored candles of one series to month files
+
+        Months already in the archive are merged (stored candles win on equal
+        timestamps), so exports can be repeated as the store grows.
+
+        Returns:
+            Number of candles written
+        """
+        first = store.first_timestamp(exchange, symbol, timeframe)
+        last = store.last_timestamp(exchange, symbol, timeframe)
+        if first is None:
+            return 0
+        if start is not None:
+            first = max(first, MarketDataFetcher._to_milliseconds(start))
+        if end is not None:
+            last = min(last, MarketDataFetcher._to_milliseconds(end))
+
+        written = 0
+        month = _month_start(first)
+        while month <= last:
+            following = _next_month(month)
+            # One month at a time keeps memory flat whatever the length of the history
+            rows = store.load(exchange, symbol, timeframe, max(month, first), min(following - 1, last))
+            if rows:
+                candles = Candles.from_ohlcv(rows)
+                self._write_month(exchange, symbol, timeframe, month, candles)
+                written += len(candles)
+            month = following
+        logger.info(f"Archived {written} {symbol} {timeframe} candles from {exchange}")
+        return written
+
+    def export_store(self, store: CandleStore, exchange: str = None, timeframe: str = None) -> Dict[Tuple, int]:
+        """
+        Export every series in the candle store (optionally one exchange / timeframe)
+
+        Returns:
+            Dict mapping (exchange, symbol, timeframe) to candles written
+        """
+        results = {}
+        for series_exchange, symbol, series_timeframe in store.series():
+            if exchange not in (None, series_exchange) or timeframe not in (None, series_timeframe):
+                continue
+            results[(series_exchange, symbol, series_timeframe)] = self.export(
+                store, series_exchange, symbol, series_timeframe)
+        return results
+
+    def _write_month(self, exchange: str, symbol: str, timeframe: str, month: int, candles: Candles):
+        directory = self._series_dir(exchange, symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, _month_name(month) + self.extension)
+        if os.path.exists(path):
+            old = self._read_file(path)
+            # New candles go first so np.unique keeps them over archived ones at the same timestamp
+            timestamps, first = np.unique(np.concatenate([candles.timestamps, old.timestamps]), return_index=True)
+            values = np.concatenate([candles.values, old.values], axis=1)[:, first]
+            candles = Candles(timestamps, values)
+
+        columns = {'timestamp': pa.array(candles.timestamps, pa.int64())}
+        columns.update((name, pa.array(candles.values[i])) for i, name in enumerate(Candles.COLUMNS))
+        table = pa.table(columns).replace_schema_metadata(
+            {'exchange': exchange, 'symbol': symbol, 'timeframe': timeframe})
+
+        # Write next to the target and rename, so a reader never maps a half-written file
+        temporary = path + '.tmp'
+        if self.file_format == 'arrow':
+            with pa.OSFile(temporary, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            pq.write_table(table, temporary, compression='zstd')
+        os.replace(temporary, path)
+
+    def _read_table(self, path: str) -> 'pa.Table':
+        if self.file_format == 'arrow':
+            return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        return pq.read_table(path, memory_map=True)
+
+    def _read_schema(self, path: str) -> 'pa.Schema':
+        if self.file_format == 'arrow':
+            return ipc.open_file(pa.memory_map(path, 'r')).schema
+        return pq.read_schema(path)
+
+    def _read_file(self, path: str) -> Candles:
+        table = self._read_table(path)
+        values = np.empty((len(Candles.COLUMNS), table.num_rows))
+        for i, name in enumerate(Candles.COLUMNS):
+            values[i] = table.column(name).to_numpy()
+        return Candles(table.column('timestamp').to_numpy(), values)
+
+    def _month_slices(self, exchange: str, symbol: str, timeframe: str, start: TimeLike,
+                      end: TimeLike) -> Iterator[Tuple['pa.Table', int, int]]:
+        """(table, first row, end row) of each month file inside [start, end]"""
+        start_ms = MarketDataFetcher._to_milliseconds(start) if start is not None else None
+        end_ms = MarketDataFetcher._to_milliseconds(end) if end is not None else None
+        for path in self._month_files(exchange, symbol, timeframe, start_ms, end_ms):
+            table = self._read_table(path)
+            timestamps = table.column('timestamp').to_numpy()
+            lo = int(np.searchsorted(timestamps, start_ms, side='left')) if start_ms is not None else 0
+            hi = int(np.searchsorted(timestamps, end_ms, side='right')) if end_ms is not None else len(timestamps)
+            if hi > lo:
+                yield table, lo, hi
+
+    @staticmethod
+    def _to_candles(slices: Sequence[Tuple['pa.Table', int, int]]) -> Candles:
+        """Copy month slices into one Candles (the only copy of the mapped data)"""
+        total = sum(hi - lo for _, lo, hi in slices)
+        timestamps = np.empty(total, dtype=np.int64)
+        values = np.empty((len(Candles.COLUMNS), total))
+        position = 0
+        for table, lo, hi in slices:
+            size = hi - lo
+            timestamps[position:position + size] = table.column('timestamp').to_numpy()[lo:hi]
+            for i, name in enumerate(Candles.COLUMNS):
+                values[i, position:position + size] = table.column(name).to_numpy()[lo:hi]
+            position += size
+        return Candles(timestamps, values)
+
+    def load(self, exchange: str, symbol: str, timeframe: str,
+             start: TimeLike = None, end: TimeLike = None) -> Candles:
+        """
+        Candles of one series between start and end (inclusive)
+
+        Args:
+            start: Oldest bar as a date string, datetime or epoch ms (default: all)
+            end: Newest bar, same forms as start
+
+        Returns:
+            Candles (empty if nothing is archived in the range), a copy of
+            the whole range in memory (see iter_months() for long ranges)
+        """
+        return self._to_candles(list(self._month_slices(exchange, symbol, timeframe, start, end)))
+
+    def load_many(self, exchange: str, symbols: Sequence[str], timeframe: str,
+                  start: TimeLike = None, end: TimeLike = None) -> Dict[str, Candles]:
+        """load() for several symbols (symbols with nothing archived are omitted)"""
+        loaded = {symbol: self.load(exchange, symbol, timeframe, start, end) for symbol in symbols}
+        return {symbol: candles for symbol, candles in loaded.items() if not candles.empty}
+
+    def iter_months(self, exchange: str, symbol: str, timeframe: str,
+                    start: TimeLike = None, end: TimeLike = None, overlap: int = 0) -> Iterator[Candles]:
+        """
+        Candles one month at a time, for passes over more history than fits in memory
+
+        Args:
+            overlap: Bars of the previous month to repeat at the start of each
+                chunk, as warmup for indicators computed per chunk
+        """
+        previous = None
+        for month in self._month_slices(exchange, symbol, timeframe, start, end):
+            candles = self._to_candles([month])
+            if overlap and previous is not None:
+                head = previous.tail(overlap)
+                candles = Candles(np.concatenate([head.timestamps, candles.timestamps]),
+                                  np.concatenate([head.values, candles.values], axis=1))
+            previous = candles
+            yield candles
+
+    def symbols(self, exchange: str, timeframe: str) -> List[str]:
+        """Symbols with archived candles for an exchange and timeframe"""
+        directory = os.path.join(self.root, exchange, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        symbols = []
+        for name in sorted(os.listdir(directory)):
+            files = [f for f in sorted(os.listdir(os.path.join(directory, name))) if f.endswith(self.extension)]
+            if files:
+                schema = self._read_schema(os.path.join(directory, name, files[0]))
+                symbols.append((schema.metadata or {}).get(b'symbol', name.encode()).decode())
+        return symbols
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export stored candles to the columnar archive')
+    parser.add_argument('--exchange', help='Only this exchange (default: all stored)')
+    parser.add_argument('--timeframe', help='Only this timeframe (default: all stored)')
+    parser.add_argument('--format', choices=sorted(EXTENSIONS), help='arrow (memory-mapped) or parquet')
+    parser.add_argument('--root', help=f'Archive directory (default: {Config.CANDLE_ARCHIVE_DIR})')
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    archive = CandleArchive(arguments.root, arguments.format)
+    exported = archive.export_store(CandleStore(), arguments.exchange, arguments.timeframe)
+    print(f"Exported {sum(exported.values())} candles in {len(exported)} series to {archive.root}")
@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+import logging
+from typing import List, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_path_from_url(database_url: str) -> Optional[str]:
+    """Return the file path of a sqlite:/// URL, or None for other databases"""
+    prefix = 'sqlite:///'
+    if not database_url or not database_url.startswith(prefix):
+        return None
+    return database_url[len(prefix):] or ':memory:'
+
+
+class CandleStore:
+    """Durable on-disk OHLCV candle store keyed by (exchange, symbol, timeframe)"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (or create) the candle store
+
+        Args:
+            path: SQLite file path. Defaults to the file behind Config.DATABASE_URL
+        """
+        if path is None:
+            path = sqlite_path_from_url(Config.DATABASE_URL)
+            if path is None:
+                raise ValueError(f"Candle store requires a sqlite:/// DATABASE_URL, got {Config.DATABASE_URL}")
+
+        self.path = path
+        self._lock = threading.Lock()
+
+        # One connection shared by the bot thread and the web threads, serialised by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candles (
+                exchange TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                PRIMARY KEY (exchange, symbol, timeframe, timestamp)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+        logger.info(f"Candle store opened at {path}")
+
+    def upsert(self, exchange: str, symbol: str, timeframe: str, candles: List[list]) -> int:
+        """
+        Insert or replace candles
+
+        Args:
+            candles: Rows of [timestamp_ms, open, high, low, close, volume] as returned by ccxt
+
+        Returns:
+            Number of rows written
+        """
+        if not candles:
+            return 0
+
+        rows = [(exchange, symbol, timeframe, int(c[0]), c[1], c[2], c[3], c[4], c[5]) for c in candles]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def last_timestamp(self, exchange: str, symbol: str, timeframe: str) -> Optional[int]:
+        """Get the timestamp (ms) of the newest stored candle"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MAX(timestamp) FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ?',
+                (exchange, symbol, timeframe)
+            ).fetchone()
+        return row[0] if row else None
+
+    def first_timestamp(self, exchange: str, symbol: str, timeframe: str) -> Optional[int]:
+        """Get the timestamp (ms) of the oldest stored candle"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MIN(timestamp) FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ?',
+                (exchange, symbol, timeframe)
+            ).fetchone()
+        return row[0] if row else None
+
+    def series(self) -> List[Tuple[str, str, str]]:
+        """Every stored (exchange, symbol, timeframe)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT exchange, symbol, timeframe FROM candles ORDER BY exchange, symbol, timeframe'
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def count(self, exchange: str, symbol: str, timeframe: str, start: int, end: int) -> int:
+        """Count stored candles with start <= timestamp <= end"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COUNT(*) FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ? '
+                'AND timestamp >= ? AND timestamp <= ?',
+                (exchange, symbol, timeframe, start, end)
+            ).fetchone()
+        return row[0]
+
+    def load(self, exchange: str, symbol: str, timeframe: str, start: Optional[int] = None,
+             end: Optional[int] = None, limit: Optional[int] = None) -> List[list]:
+        """
+        Load stored candles in ascending timestamp order
+
+        Args:
+            start: Oldest timestamp (ms) to include
+            end: Newest timestamp (ms) to include
+            limit: Only return the newest `limit` candles of the range
+
+        Returns:
+            Rows of [timestamp_ms, open, high, low, close, volume]
+        """
+        query = ('SELECT timestamp, open, high, low, close, volume FROM candles '
+                 'WHERE exchange = ? AND symbol = ? AND timeframe = ?')
+        params = [exchange, symbol, timeframe]
+        if start is not None:
+            query += ' AND timestamp >= ?'
+            params.append(start)
+        if end is not None:
+            query += ' AND timestamp <= ?'
+            params.append(end)
+
+        if limit is not None:
+            query += ' ORDER BY timestamp DESC LIMIT ?'
+            params.append(limit)
+        else:
+            query += ' ORDER BY timestamp ASC'
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        if limit is not None:
+            rows.reverse()
+        return [list(row) for row in rows]
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
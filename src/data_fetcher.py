@@ -1,24 +1,180 @@
 import ccxt
+import numpy as np
 import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import contextvars
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
+import json
 import logging
+import os
+import threading
+import time
 from config import Config
+from src.candle_store import CandleStore
+from src.exchange_recorder import RecordingExchange, ReplayExchange
+from src.exchange_registry import exchange_registry
+from src.hedged_reads import HedgedReader
+from src.order_book import OrderBook
+from src.quote_cache import QuoteCache
+from src.trade_tape import TradeTape
+from src.rate_limiter import Priority
+from src.retry_policy import CircuitOpenError, retry_attempts
 
 logger = logging.getLogger(__name__)
 
-class MarketDataFetcher:
-    """Fetches real-time and historical crypto market data"""
+class Candles:
+    """
+    OHLCV bars held in contiguous NumPy arrays
     
-    def __init__(self, exchange_name: str = 'auto'):
-        self.config = Config()
-        self.exchange_name = exchange_name
-        self.exchange = self._initialize_exchange()
-        
+    `timestamps` is an int64 array of bar open times in epoch milliseconds and
+    `values` a float64 array of shape (5, n) with one contiguous row per column
+    in COLUMNS order, so reading a column is a plain array view. to_frame()
+    wraps the same memory in a DataFrame without copying, only when a caller
+    needs one (frames share memory with the arrays).
+    """
+    
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    
+    __slots__ = ('timestamps', 'values', '_index')
+    
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray):
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.strides[1] != values.itemsize:
+            # Views into a larger buffer are kept as long as every column row is contiguous
+            values = np.ascontiguousarray(values).reshape(len(self.COLUMNS), len(self.timestamps))
+        self.values = values
+        self._index = None
+    
+    @classmethod
+    def from_ohlcv(cls, ohlcv: List[list]) -> 'Candles':
+        """Build from ccxt rows ([timestamp, open, high, low, close, volume])"""
+        if not ohlcv:
+            return cls(np.empty(0, dtype=np.int64), np.empty((len(cls.COLUMNS), 0)))
+        rows = np.asarray(ohlcv, dtype=np.float64)
+        return cls(rows[:, 0].astype(np.int64), rows[:, 1:6].T)
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'Candles':
+        """Build from a timestamp-indexed OHLCV DataFrame"""
+        timestamps = pd.DatetimeIndex(df.index).as_unit('ms').asi8
+        return cls(timestamps, df[list(cls.COLUMNS)].to_numpy(dtype=np.float64).T)
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+    
+    def __getitem__(self, key):
+        """A column array by name, or a Candles view for a slice"""
+        if isinstance(key, str):
+            return self.values[self.COLUMNS.index(key)]
+        return Candles(self.timestamps[key], self.values[:, key])
+    
+    @property
+    def open(self) -> np.ndarray:
+        return self.values[0]
+    
+    @property
+    def high(self) -> np.ndarray:
+        return self.values[1]
+    
+    @property
+    def low(self) -> np.ndarray:
+        return self.values[2]
+    
+    @property
+    def close(self) -> np.ndarray:
+        return self.values[3]
+    
+    @property
+    def volume(self) -> np.ndarray:
+        return self.values[4]
+    
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Bar open times as a DatetimeIndex (a view on `timestamps`)"""
+        if self._index is None:
+            self._index = pd.DatetimeIndex(self.timestamps.view('datetime64[ms]'), name='timestamp')
+        return self._index
+    
+    def tail(self, n: int) -> 'Candles':
+        return self[max(0, len(self) - n):]
+    
+    def copy(self) -> 'Candles':
+        """Candles owning their memory (e.g. to keep a ring buffer window past its next update)"""
+        return Candles(self.timestamps.copy(), self.values.copy())
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Timestamp-indexed OHLCV DataFrame over the same memory"""
+        return pd.DataFrame(self.values.T, index=self.index, columns=list(self.COLUMNS), copy=False)
+    
+    def __repr__(self) -> str:
+        if self.empty:
+            return 'Candles(0 bars)'
+        return f"Candles({len(self)} bars, {self.index[0]} .. {self.index[-1]})"
+
+
+def as_frame(data: Union[Candles, pd.DataFrame]) -> pd.DataFrame:
+    """DataFrame view of Candles (DataFrames pass through unchanged)"""
+    return data.to_frame() if isinstance(data, Candles) else data
+
+
+class MarketDataMixin:
+    """
+    Exchange settings and the request-free parts of a market data fetcher
+    
+    Shared by MarketDataFetcher and AsyncMarketDataFetcher: exchange choice,
+    candle store planning and response formatting. Nothing here talks to
+    the exchange; candle store helpers are plain blocking calls (the async
+    fetcher runs them in a worker thread).
+    """
+    
+    EXCHANGE_CANDIDATES = [
+        ('binance', 'Binance'),
+        ('kucoin', 'KuCoin'),
+        ('okx', 'OKX'),
+        ('bybit', 'Bybit'),
+        ('kraken', 'Kraken'),
+    ]
+    
+    EXCHANGE_OPTIONS = {
+        # Every call is throttled by the shared RateLimiter (src.rate_limiter), ccxt's own
+        # limiter would delay each call a second time
+        'enableRateLimit': False,
+        'timeout': 15000,  # 15 second timeout
+        'options': {
+            'defaultType': 'spot',
+            'recvWindow': 10000  # 10 second receive window
+        }
+    }
+    
+    # Maximum candles returned by one fetch_ohlcv call, per exchange
+    OHLCV_PAGE_LIMITS = {
+        'binance': 1000,
+        'kucoin': 1500,
+        'okx': 300,
+        'bybit': 1000,
+        'kraken': 720,
+    }
+    DEFAULT_OHLCV_PAGE_LIMIT = 500
+    
+    # Trades per fetch_trades call and pages per trade tape update
+    TRADE_PAGE_LIMIT = 1000
+    TRADE_PAGES_PER_UPDATE = 5
+    
+    # Exchange methods that always jump the rate limiter queue
+    ORDER_METHODS = ('create_market_order', 'create_limit_order', 'create_test_order', 'cancel_order')
+    
+    def _configure_exchange(self, exchange):
+        """Apply API credentials and proxy settings to an exchange client"""
         # Set API credentials if available (for authenticated requests like balance)
         if self.config.BINANCE_API_KEY and self.config.BINANCE_API_SECRET:
-            self.exchange.apiKey = self.config.BINANCE_API_KEY
-            self.exchange.secret = self.config.BINANCE_API_SECRET
+            exchange.apiKey = self.config.BINANCE_API_KEY
+            exchange.secret = self.config.BINANCE_API_SECRET
             logger.info("API credentials configured for authenticated requests")
         
         # Configure proxy if set (for accessing Binance from restricted regions)
@@ -29,132 +185,713 @@ class MarketDataFetcher:
                 proxies['http'] = HTTP_PROXY
             if HTTPS_PROXY:
                 proxies['https'] = HTTPS_PROXY
-            self.exchange.proxies = proxies
+            exchange.proxies = proxies
             logger.info(f"Proxy configured for exchange access")
-        
-    def _initialize_exchange(self):
-        """Initialize exchange connection with automatic fallback"""
+    
+    def _initialize_candle_store(self) -> Optional[CandleStore]:
+        """Open the on-disk candle store (None if disabled or unavailable)"""
+        if not self.config.CANDLE_STORE_ENABLED:
+            return None
+        try:
+            return CandleStore()
+        except Exception as e:
+            logger.warning(f"Candle store unavailable, fetching full history every call: {e}")
+            return None
+    
+    def _exchanges_to_try(self) -> List[tuple]:
+        """Candidate (exchange_id, display name) pairs in connection order"""
         # Try exchanges in order - Binance first (works for most regions)
-        exchanges_to_try = [
-            ('binance', 'Binance'),
-            ('kucoin', 'KuCoin'),
-            ('okx', 'OKX'),
-            ('bybit', 'Bybit'),
-            ('kraken', 'Kraken'),
-        ]
+        exchanges_to_try = list(self.EXCHANGE_CANDIDATES)
         
         # If specific exchange requested, try it first
         if self.exchange_name != 'auto' and self.exchange_name != 'binance':
             exchanges_to_try.insert(0, (self.exchange_name, self.exchange_name.title()))
         
-        for exchange_id, exchange_name in exchanges_to_try:
-            try:
-                logger.info(f"Trying to connect to {exchange_name}...")
-                exchange_class = getattr(ccxt, exchange_id)
-                exchange = exchange_class({
-                    'enableRateLimit': True,
-                    'timeout': 15000,  # 15 second timeout
-                    'options': {
-                        'defaultType': 'spot',
-                        'recvWindow': 10000  # 10 second receive window
-                    }
-                })
-                
-                # Test connection with a simple ticker fetch (faster than load_markets)
-                try:
-                    ticker = exchange.fetch_ticker('BTC/USDT')
-                    if ticker and 'last' in ticker:
-                        self.exchange_name = exchange_id
-                        logger.info(f"[OK] Successfully connected to {exchange_name}!")
-                        return exchange
-                except Exception as test_error:
-                    logger.warning(f"[FAIL] {exchange_name} connection test failed: {str(test_error)[:100]}")
+        return exchanges_to_try
+    
+    def _select_exchange(self, probes: Dict[str, tuple]) -> str:
+        """Pick the explicitly requested exchange if reachable, otherwise the fastest"""
+        if self.exchange_name in probes:
+            return self.exchange_name
+        return min(probes, key=lambda exchange_id: probes[exchange_id][0])
+    
+    def _record_exchange_selection(self, exchange_id: str, source: str, started: float,
+                                   latencies: Dict[str, float]):
+        """Remember which exchange was chosen and how long choosing took"""
+        self.exchange_name = exchange_id
+        self.exchange_selection = {
+            'exchange_id': exchange_id,
+            'source': source,
+            'selection_seconds': round(time.perf_counter() - started, 3),
+            'probe_latencies_ms': latencies
+        }
+        logger.info(f"[OK] Successfully connected to {exchange_id} "
+                    f"({source}, selected in {self.exchange_selection['selection_seconds']:.2f}s)")
+    
+    def _load_exchange_choice(self) -> Optional[Dict]:
+        """Read the persisted exchange choice if it is fresh and matches the request"""
+        path = self.config.EXCHANGE_CHOICE_FILE
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                choice = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable exchange choice file {path}: {e}")
+            return None
+        
+        age_hours = (time.time() - choice.get('saved_at', 0)) / 3600
+        if choice.get('requested') != self.exchange_name or age_hours > self.config.EXCHANGE_CHOICE_TTL_HOURS:
+            return None
+        return choice
+    
+    def _save_exchange_choice(self, exchange_id: str, latencies: Dict[str, float]):
+        """Persist the discovered exchange so the next start can skip probing"""
+        path = self.config.EXCHANGE_CHOICE_FILE
+        if not path:
+            return
+        try:
+            with open(path, 'w') as f:
+                json.dump({
+                    'requested': self.exchange_name,
+                    'exchange_id': exchange_id,
+                    'probe_latencies_ms': latencies,
+                    'saved_at': time.time()
+                }, f)
+        except Exception as e:
+            logger.warning(f"Could not persist exchange choice to {path}: {e}")
+    
+    def _plan_incremental_fetch(self, symbol: str, timeframe: str, limit: int):
+        """
+        Decide how much of a `limit`-bar window has to come from the exchange
+        
+        Returns:
+            (since, limit, serve_from_store) for the exchange request. Falls back to a
+            full download when nothing is stored yet or the stored window has gaps.
+        """
+        full_fetch = (None, limit, False)
+        try:
+            tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+            last_ts = self.candle_store.last_timestamp(self.exchange_name, symbol, timeframe)
+            if last_ts is None:
+                return full_fetch
+            
+            now_ms = self.exchange.milliseconds()
+            current_bar = now_ms - now_ms % tf_ms
+            window_start = current_bar - (limit - 1) * tf_ms
+            if last_ts < window_start:
+                return full_fetch
+            
+            # Stored window must be contiguous up to the newest stored bar
+            expected = (last_ts - window_start) // tf_ms + 1
+            if self.candle_store.count(self.exchange_name, symbol, timeframe, window_start, last_ts) < expected:
+                return full_fetch
+            
+            # Re-fetch the newest stored bar as well, it may still have been forming
+            missing = (current_bar - last_ts) // tf_ms + 1
+            return last_ts, int(min(limit, max(2, missing))), True
+        except Exception as e:
+            logger.warning(f"Candle store lookup failed for {symbol} {timeframe}: {e}")
+            return full_fetch
+    
+    def _plan_backfill_pages(self, symbol: str, timeframe: str, start, end):
+        """
+        Split a backfill range into pages that still need downloading
+        
+        Returns:
+            (start_ms, end_ms, [(page_start_ms, page_size), ...])
+        """
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        start_ms = self._to_milliseconds(start if start is not None else self.config.BACKTEST_START_DATE)
+        end_ms = self._to_milliseconds(end) if end is not None else self.exchange.milliseconds()
+        start_ms -= start_ms % tf_ms
+        end_ms -= end_ms % tf_ms
+        
+        if end_ms < start_ms:
+            logger.warning(f"Backfill range for {symbol} is empty")
+            return start_ms, end_ms, []
+        
+        page_limit = self.OHLCV_PAGE_LIMITS.get(self.exchange_name, self.DEFAULT_OHLCV_PAGE_LIMIT)
+        page_span = page_limit * tf_ms
+        pages = []
+        for page_start in range(start_ms, end_ms + 1, page_span):
+            page_end = min(page_start + page_span - tf_ms, end_ms)
+            expected = (page_end - page_start) // tf_ms + 1
+            
+            # Resume: skip pages already fully stored (the newest page is always refreshed)
+            if self.candle_store is not None and page_end < end_ms:
+                stored = self.candle_store.count(self.exchange_name, symbol, timeframe, page_start, page_end)
+                if stored >= expected:
                     continue
-                
+            pages.append((page_start, expected))
+        
+        total_pages = (end_ms - start_ms) // page_span + 1
+        logger.info(f"Backfilling {symbol} {timeframe}: {len(pages)}/{total_pages} pages to download")
+        return start_ms, end_ms, pages
+    
+    def _store_backfill_page(self, symbol: str, timeframe: str, candles: List[list],
+                             start_ms: int, end_ms: int, collected: List[list]):
+        """Persist one downloaded page (or keep it in memory without a candle store)"""
+        candles = [c for c in candles if start_ms <= c[0] <= end_ms]
+        if self.candle_store is not None:
+            self.candle_store.upsert(self.exchange_name, symbol, timeframe, candles)
+        else:
+            collected.extend(candles)
+    
+    def _finish_backfill(self, symbol: str, timeframe: str, start_ms: int, end_ms: int,
+                         collected: List[list], failed: int) -> pd.DataFrame:
+        """Assemble the backfilled range into a DataFrame"""
+        if failed:
+            logger.warning(f"{failed} backfill pages failed for {symbol} {timeframe} - run again to resume")
+        
+        if self.candle_store is not None:
+            collected = self.candle_store.load(self.exchange_name, symbol, timeframe, start=start_ms, end=end_ms)
+        else:
+            collected = sorted({c[0]: c for c in collected}.values(), key=lambda c: c[0])
+        
+        if not collected:
+            logger.warning(f"No historical data for {symbol} {timeframe}")
+            return pd.DataFrame()
+        
+        df = Candles.from_ohlcv(collected).to_frame()
+        logger.info(f"Backfill complete for {symbol} {timeframe}: {len(df)} candles")
+        return df
+    
+    @staticmethod
+    def _to_milliseconds(value: Union[str, datetime, int]) -> int:
+        """Convert a date string, datetime or ms timestamp to epoch milliseconds (UTC)"""
+        if isinstance(value, (int, float)):
+            return int(value)
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        return int(timestamp.value // 10**6)
+    
+    @staticmethod
+    def _format_ticker(symbol: str, ticker: Dict) -> Dict:
+        """Convert a ccxt ticker to the dict returned by get_ticker"""
+        return {
+            'symbol': symbol,
+            'last': ticker.get('last', 0),
+            'bid': ticker.get('bid', 0),
+            'ask': ticker.get('ask', 0),
+            'volume': ticker.get('quoteVolume', 0),
+            'baseVolume': ticker.get('baseVolume', 0),
+            'percentage': ticker.get('percentage', 0),
+            'change_24h': ticker.get('percentage', 0),
+            'timestamp': datetime.now()
+        }
+    
+    def _trade_tape(self, symbol: str) -> TradeTape:
+        tape = self.trade_tapes.get(symbol)
+        if tape is None:
+            tape = self.trade_tapes.setdefault(symbol, TradeTape(symbol, self.config.TRADE_TAPE_WINDOWS))
+        return tape
+    
+    def _trade_since(self, tape: TradeTape) -> Optional[int]:
+        """Cursor for the next fetch_trades call (None = newest trades)"""
+        if tape.cursor is None or tape.cursor < self.exchange.milliseconds() - max(tape.windows) * 1000:
+            return None
+        return tape.cursor
+    
+    def _compute_sentiment(self, order_book: OrderBook, trade_flow: Dict) -> Dict:
+        """Score sentiment from an order book and a TradeTape window"""
+        # Calculate bid/ask pressure
+        total_bids, total_asks = order_book.depth_within()
+        
+        bid_ask_ratio = total_bids / (total_asks + 1e-10)
+        
+        # Buy/sell pressure from taker volume (1.0 when there were no trades)
+        buy_sell_ratio = trade_flow['buy_sell_ratio']
+        
+        # Overall sentiment score (0-100, 50 is neutral)
+        sentiment_score = min(100, max(0, 50 * (bid_ask_ratio + buy_sell_ratio)))
+        
+        return {
+            'sentiment_score': sentiment_score,
+            'bid_ask_ratio': bid_ask_ratio,
+            'buy_sell_ratio': buy_sell_ratio,
+            'book_imbalance': order_book.imbalance(self.config.SENTIMENT_DEPTH_BPS),
+            'trade_count': trade_flow['trade_count'],
+            'vwap': trade_flow['vwap'],
+            'weighted_mid': order_book.weighted_mid(),
+            'interpretation': self._interpret_sentiment(sentiment_score)
+        }
+    
+    def _interpret_sentiment(self, score: float) -> str:
+        """Interpret sentiment score"""
+        if score >= 70:
+            return 'very_bullish'
+        elif score >= 55:
+            return 'bullish'
+        elif score >= 45:
+            return 'neutral'
+        elif score >= 30:
+            return 'bearish'
+        else:
+            return 'very_bearish'
+    
+    @staticmethod
+    def _format_balance(balance: Dict, currency: str) -> Dict:
+        """Extract one currency from a ccxt balance structure"""
+        if currency in balance:
+            return {
+                'currency': currency,
+                'total': balance[currency].get('total', 0),
+                'free': balance[currency].get('free', 0),
+                'used': balance[currency].get('used', 0),
+                'timestamp': datetime.now()
+            }
+        else:
+            logger.warning(f"Currency {currency} not found in balance")
+            return {
+                'currency': currency,
+                'total': 0,
+                'free': 0,
+                'used': 0,
+                'timestamp': datetime.now()
+            }
+    
+    def _has_credentials(self) -> bool:
+        """True if orders can be signed (the mock exchange needs no API keys)"""
+        if not any(getattr(self.exchange, 'requiredCredentials', {'apiKey': True}).values()):
+            return True
+        return bool(self.config.BINANCE_API_KEY and self.config.BINANCE_API_SECRET)
+    
+    @staticmethod
+    def _format_market_order(order: Dict, symbol: str, side: str, amount: float) -> Dict:
+        """Convert a ccxt market order to the dict returned by place_market_order"""
+        return {
+            'success': True,
+            'order_id': order.get('id'),
+            'symbol': symbol,
+            'side': side,
+            'type': 'market',
+            'amount': order.get('amount', amount),
+            'filled': order.get('filled', 0),
+            'price': order.get('price', 0),
+            'average': order.get('average', 0),
+            'cost': order.get('cost', 0),
+            'status': order.get('status', 'unknown'),
+            'timestamp': datetime.now(),
+            'raw_order': order
+        }
+    
+    @staticmethod
+    def _format_limit_order(order: Dict, symbol: str, side: str, amount: float, price: float) -> Dict:
+        """Convert a ccxt limit order to the dict returned by place_limit_order"""
+        return {
+            'success': True,
+            'order_id': order.get('id'),
+            'symbol': symbol,
+            'side': side,
+            'type': 'limit',
+            'amount': order.get('amount', amount),
+            'price': price,
+            'status': order.get('status', 'open'),
+            'timestamp': datetime.now(),
+            'raw_order': order
+        }
+
+
+class MarketDataFetcher(MarketDataMixin):
+    """Fetches real-time and historical crypto market data"""
+    
+    def __init__(self, exchange_name: str = 'auto', shared: bool = True):
+        """
+        Args:
+            exchange_name: 'auto' or a ccxt exchange id
+            shared: Reuse the process-wide exchange client instead of opening a new connection
+        """
+        self.config = Config()
+        self.exchange_name = exchange_name
+        self.exchange_selection = {}
+        if shared:
+            self.exchange_name, self.exchange = exchange_registry.get_exchange(exchange_name, self._connect)
+            self.exchange_selection = exchange_registry.get_metrics(exchange_name).get('selection', {})
+        else:
+            self.exchange_name, self.exchange, _ = self._connect()
+        
+        # Request-weight budget shared with every other client of this exchange
+        self.rate_limiter = exchange_registry.get_rate_limiter(
+            self.exchange_name, self.config.RATE_LIMIT_WEIGHT_PER_MINUTE or None)
+        
+        # Backoff retries and per-endpoint circuit breakers, also shared per exchange
+        self.exchange_guard = exchange_registry.get_exchange_guard(self.exchange_name)
+        
+        # Local candle store so get_ohlcv only downloads bars it has not seen yet
+        self.candle_store = self._initialize_candle_store()
+        
+        # Tickers served from memory for a few seconds, identical in-flight requests coalesced
+        self.quote_cache = QuoteCache(self.config.QUOTE_CACHE_TTL_SECONDS)
+        
+        # Local L2 books, refreshed from a snapshot once older than ORDER_BOOK_MAX_AGE_SECONDS
+        self.order_books: Dict[str, OrderBook] = {}
+        
+        # Public trades per symbol, fetched incrementally from a since cursor
+        self.trade_tapes: Dict[str, TradeTape] = {}
+        
+        # Higher timeframes built locally from MTF_BASE_TIMEFRAME, per symbol
+        self._resamplers = {}
+        self._resamplers_lock = threading.Lock()  # Only guards the dicts, a backfill holds the symbol's lock
+        self._resampler_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        
+        # Slow market data reads are repeated on a second exchange (orders stay on this one)
+        self.hedged_reads = None
+        if self.config.HEDGED_READS:
+            self.hedged_reads = HedgedReader(self.exchange_name, self._request, self.config.HEDGE_AFTER_MS)
+            threading.Thread(target=self._connect_hedge_secondary, name='hedge-connect', daemon=True).start()
+    
+    def _connect(self):
+        """Open a new configured exchange connection, returns (exchange_id, exchange, selection info)"""
+        if self.exchange_name == 'mock':
+            from src.mock_exchange import create_mock_exchange
+            exchange = create_mock_exchange()
+            self.exchange_selection = {'exchange_id': 'mock', 'source': 'config',
+                                       'symbols': len(exchange.symbols), 'price_model': exchange.model}
+            return 'mock', exchange, self.exchange_selection
+        
+        if self.config.EXCHANGE_REPLAY_FILE:
+            # Offline run: every response comes from a recording
+            exchange = ReplayExchange(self.config.EXCHANGE_REPLAY_FILE, self.config.EXCHANGE_REPLAY_LATENCY)
+            self.exchange_name = exchange.id
+            self.exchange_selection = {'exchange_id': exchange.id, 'source': 'replay',
+                                       'replay_file': self.config.EXCHANGE_REPLAY_FILE}
+            return self.exchange_name, exchange, self.exchange_selection
+        
+        exchange = self._initialize_exchange()
+        self._configure_exchange(exchange)
+        if self.config.EXCHANGE_RECORD_FILE:
+            exchange = RecordingExchange(exchange, self.config.EXCHANGE_RECORD_FILE)
+        return self.exchange_name, exchange, self.exchange_selection
+    
+    def _connect_hedge_secondary(self):
+        """Connect the exchange that hedged reads fall back to (runs in the background)"""
+        secondary_id = self.config.HEDGE_SECONDARY_EXCHANGE or self._pick_hedge_secondary()
+        if not secondary_id or secondary_id == self.exchange_name:
+            logger.warning("No secondary exchange for hedged reads, reading from the primary only")
+            return
+        
+        def connect():
+            exchange = getattr(ccxt, secondary_id)(self.EXCHANGE_OPTIONS)
+            # Public data only: proxies apply, the primary's API keys do not
+            from config import HTTP_PROXY, HTTPS_PROXY
+            if HTTP_PROXY or HTTPS_PROXY:
+                exchange.proxies = {k: v for k, v in (('http', HTTP_PROXY), ('https', HTTPS_PROXY)) if v}
+            return secondary_id, exchange, {}
+        
+        try:
+            _, exchange = exchange_registry.get_exchange(secondary_id, connect)
+        except Exception as e:
+            logger.warning(f"Could not connect {secondary_id} for hedged reads: {e}")
+            return
+        limiter = exchange_registry.get_rate_limiter(secondary_id)
+        guard = exchange_registry.get_exchange_guard(secondary_id)
+        
+        def send(method, args, kwargs):
+            limiter.acquire(limiter.weight(method))
+            return getattr(exchange, method)(*args, **kwargs)
+        
+        def call(method, *args, **kwargs):
+            # The primary is already in flight, so a failed hedge is not worth a retry
+            return guard.call(method, lambda: send(method, args, kwargs), attempts=1)
+        
+        self.hedged_reads.set_secondary(secondary_id, call)
+    
+    def _pick_hedge_secondary(self) -> Optional[str]:
+        """Fastest other exchange from the startup probe, else the next fallback candidate"""
+        latencies = self.exchange_selection.get('probe_latencies_ms', {})
+        others = [ex_id for ex_id in sorted(latencies, key=latencies.get) if ex_id != self.exchange_name]
+        if others:
+            return others[0]
+        candidates = [ex_id for ex_id, _ in self.EXCHANGE_CANDIDATES if ex_id != self.exchange_name]
+        return candidates[0] if candidates else None
+    
+    def _initialize_exchange(self):
+        """
+        Connect to the fastest reachable exchange
+        
+        A choice persisted by a previous start is reused while it is fresh.
+        Otherwise all candidates are probed concurrently and ranked by the
+        round-trip latency of a ticker request; once the first exchange
+        answers, the others get EXCHANGE_PROBE_GRACE_SECONDS to respond.
+        """
+        started = time.perf_counter()
+        
+        cached = self._load_exchange_choice()
+        if cached is not None:
+            try:
+                exchange = getattr(ccxt, cached['exchange_id'])(self.EXCHANGE_OPTIONS)
+                self._record_exchange_selection(cached['exchange_id'], 'cache', started,
+                                                cached.get('probe_latencies_ms', {}))
+                return exchange
             except Exception as e:
-                error_msg = str(e)[:150]
-                logger.warning(f"[FAIL] {exchange_name} failed: {error_msg}")
-                continue
+                logger.warning(f"Cached exchange choice unusable, probing again: {e}")
+        
+        candidates = self._exchanges_to_try()
+        probes = {}
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        futures = {executor.submit(self._probe_exchange, exchange_id, name): exchange_id
+                   for exchange_id, name in candidates}
+        pending = set(futures)
+        deadline = None
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    probes[futures[future]] = result
+                    if deadline is None:
+                        deadline = time.perf_counter() + self.config.EXCHANGE_PROBE_GRACE_SECONDS
+        # Slow probes are abandoned, their threads finish on their own
+        executor.shutdown(wait=False)
+        
+        if not probes:
+            logger.error("Failed to connect to any exchange! Check your internet connection.")
+            raise Exception("Could not connect to any cryptocurrency exchange")
         
-        # If all fail, raise error
-        logger.error("Failed to connect to any exchange! Check your internet connection.")
-        raise Exception("Could not connect to any cryptocurrency exchange")
+        exchange_id = self._select_exchange(probes)
+        latencies = {ex_id: round(latency, 1) for ex_id, (latency, _) in probes.items()}
+        self._save_exchange_choice(exchange_id, latencies)
+        self._record_exchange_selection(exchange_id, 'probe', started, latencies)
+        return probes[exchange_id][1]
+    
+    def _probe_exchange(self, exchange_id: str, exchange_name: str) -> Optional[Tuple[float, object]]:
+        """Time a ticker request against one exchange, returns (latency_ms, exchange) or None"""
+        try:
+            logger.info(f"Trying to connect to {exchange_name}...")
+            exchange = getattr(ccxt, exchange_id)(self.EXCHANGE_OPTIONS)
+            
+            # Test connection with a simple ticker fetch (faster than load_markets)
+            started = time.perf_counter()
+            ticker = exchange.fetch_ticker('BTC/USDT')
+            latency_ms = (time.perf_counter() - started) * 1000
+            if ticker and 'last' in ticker:
+                logger.info(f"[OK] {exchange_name} reachable ({latency_ms:.0f} ms)")
+                return latency_ms, exchange
+        except Exception as e:
+            logger.warning(f"[FAIL] {exchange_name} connection test failed: {str(e)[:100]}")
+        return None
     
     def get_ohlcv(self, symbol: str, timeframe: str = '15m', 
-                   limit: int = 500, since: Optional[int] = None, retries: int = 2) -> pd.DataFrame:
+                   limit: int = 500, since: Optional[int] = None, retries: int = None) -> pd.DataFrame:
+        """
+        Fetch OHLCV (Open, High, Low, Close, Volume) data as a DataFrame
+        
+        Same as get_candles(...).to_frame(); prefer get_candles when only a
+        few columns are read.
+        """
+        return self.get_candles(symbol, timeframe, limit, since, retries).to_frame()
+    
+    def get_candles(self, symbol: str, timeframe: str = '15m',
+                    limit: int = 500, since: Optional[int] = None, retries: int = None) -> Candles:
         """
         Fetch OHLCV (Open, High, Low, Close, Volume) data
         
+        When the candle store is enabled and `since` is not given, only the bars
+        newer than the last stored candle are downloaded and the rest of the
+        window is served locally.
+        
         Args:
             symbol: Trading pair (e.g., 'BTC/USDT')
             timeframe: Candle timeframe (e.g., '1m', '5m', '15m', '1h', '4h', '1d')
             limit: Number of candles to fetch
             since: Timestamp in milliseconds
-            retries: Number of retry attempts
+            retries: Retry attempts after a network error (default none, the next call tries again)
             
         Returns:
-            DataFrame with OHLCV data
+            Candles (empty if the fetch failed)
         """
-        import time
+        fetch_since, fetch_limit, serve_from_store = since, limit, False
+        if since is None and self.candle_store is not None:
+            fetch_since, fetch_limit, serve_from_store = self._plan_incremental_fetch(symbol, timeframe, limit)
         
-        for attempt in range(retries + 1):
-            try:
-                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since, limit)
-                
-                if not ohlcv or len(ohlcv) == 0:
-                    logger.warning(f"Empty OHLCV data for {symbol}")
-                    return pd.DataFrame()
-                
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                df.set_index('timestamp', inplace=True)
-                
-                return df
-                
-            except ccxt.NetworkError as e:
-                if attempt < retries:
-                    logger.warning(f"Network error fetching {symbol}, retrying ({attempt + 1}/{retries})...")
-                    time.sleep(2)  # Wait 2 seconds before retry
+        try:
+            with retry_attempts(None if retries is None else retries + 1):
+                ohlcv, source = self._read('fetch_ohlcv', symbol, timeframe, fetch_since, fetch_limit)
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping OHLCV for {symbol}: {e}")
+            return Candles.from_ohlcv([])
+        except ccxt.NetworkError as e:
+            logger.error(f"Network error fetching OHLCV for {symbol} after retries: {e}")
+            return Candles.from_ohlcv([])
+        except Exception as e:
+            logger.error(f"Error fetching OHLCV for {symbol}: {e}")
+            return Candles.from_ohlcv([])
+        
+        if source != self.exchange_name:
+            # Another venue's bars are served, and stored under that venue, never as this exchange's history
+            if self.candle_store is not None and ohlcv:
+                self.candle_store.upsert(source, symbol, timeframe, ohlcv)
+            if serve_from_store and ohlcv:
+                stored = self.candle_store.load(self.exchange_name, symbol, timeframe, limit=limit)
+                merged = {bar[0]: bar for bar in stored}
+                merged.update((bar[0], bar) for bar in ohlcv)
+                ohlcv = [merged[ts] for ts in sorted(merged)][-limit:]
+            return Candles.from_ohlcv(ohlcv)
+        
+        if self.candle_store is not None and ohlcv:
+            self.candle_store.upsert(self.exchange_name, symbol, timeframe, ohlcv)
+        
+        if serve_from_store:
+            ohlcv = self.candle_store.load(self.exchange_name, symbol, timeframe, limit=limit)
+        
+        if not ohlcv or len(ohlcv) == 0:
+            logger.warning(f"Empty OHLCV data for {symbol}")
+            return Candles.from_ohlcv([])
+        
+        return Candles.from_ohlcv(ohlcv)
+    
+    def backfill_ohlcv(self, symbol: str, timeframe: str = '1h',
+                       start: Union[str, datetime, int, None] = None,
+                       end: Union[str, datetime, int, None] = None,
+                       max_workers: int = 4) -> pd.DataFrame:
+        """
+        Download a historical date range page by page
+        
+        The range is split into exchange-limit-sized pages which are fetched
+        concurrently. Pages are written to the candle store as they arrive, and
+        pages already complete in the store are skipped, so an interrupted
+        backfill resumes where it stopped. Failed requests are retried by the
+        exchange guard only (see src.retry_policy), a page that still fails is
+        reported and fetched on the next run.
+        
+        Args:
+            symbol: Trading pair (e.g., 'BTC/USDT')
+            timeframe: Candle timeframe
+            start: Start date ('2023-01-01', datetime or ms). Defaults to Config.BACKTEST_START_DATE
+            end: End date, defaults to now
+            max_workers: Number of pages fetched in parallel
+            
+        Returns:
+            DataFrame with OHLCV data for the whole range
+        """
+        start_ms, end_ms, pages = self._plan_backfill_pages(symbol, timeframe, start, end)
+        if not pages and end_ms < start_ms:
+            return pd.DataFrame()
+        
+        collected = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            # Page workers run in the caller's context so its request priority carries over
+            futures = [
+                executor.submit(contextvars.copy_context().run,
+                                self._fetch_ohlcv_page, symbol, timeframe, page_start, expected)
+                for page_start, expected in pages
+            ]
+            for future in as_completed(futures):
+                candles = future.result()
+                if candles is None:
+                    failed += 1
                 else:
-                    logger.error(f"Network error fetching OHLCV for {symbol} after {retries} retries: {e}")
-                    return pd.DataFrame()
-                    
-            except ccxt.RateLimitExceeded as e:
-                logger.warning(f"Rate limit exceeded for {symbol}, waiting...")
-                time.sleep(5)  # Wait longer for rate limits
-                if attempt >= retries:
-                    logger.error(f"Rate limit exceeded for {symbol} after retries")
-                    return pd.DataFrame()
-                    
-            except Exception as e:
-                logger.error(f"Error fetching OHLCV for {symbol}: {e}")
-                return pd.DataFrame()
+                    self._store_backfill_page(symbol, timeframe, candles, start_ms, end_ms, collected)
+        
+        return self._finish_backfill(symbol, timeframe, start_ms, end_ms, collected, failed)
+    
+    def _fetch_ohlcv_page(self, symbol: str, timeframe: str, since: int, limit: int) -> Optional[List[list]]:
+        """Fetch a single backfill page (None if it failed)"""
+        try:
+            return self._request('fetch_ohlcv', symbol, timeframe, since, limit)
+        except ccxt.NetworkError as e:
+            logger.error(f"Network error backfilling {symbol} page {since}: {e}")
+        except Exception as e:
+            logger.error(f"Error backfilling {symbol} page {since}: {e}")
+        return None
+    
+    def _request(self, method: str, *args, **kwargs):
+        """
+        Call an exchange method once the shared rate limiter grants its weight
+        
+        Orders go first; other calls queue by the priority of the calling
+        context (see src.rate_limiter.request_priority). A rate limit error
+        from the exchange pauses the limiter for every caller. Network errors
+        are raised without waiting in backoff (unless the caller asked for
+        retries) and an endpoint that keeps failing is skipped
+        (CircuitOpenError) until it recovers, see src.retry_policy.
+        """
+        return self.exchange_guard.call(method, lambda: self._send(method, args, kwargs))
+    
+    def _send(self, method: str, args: tuple, kwargs: Dict):
+        """One rate-limited request, no retries"""
+        priority = Priority.ORDER if method in self.ORDER_METHODS else None
+        self.rate_limiter.acquire(self.rate_limiter.weight(method), priority)
+        try:
+            return getattr(self.exchange, method)(*args, **kwargs)
+        except ccxt.RateLimitExceeded:
+            self.rate_limiter.penalize()
+            raise
+    
+    def _read(self, method: str, *args, **kwargs) -> Tuple[object, str]:
+        """
+        Public market data read, hedged to the secondary exchange when enabled
         
-        return pd.DataFrame()
+        Returns:
+            (response, id of the exchange that answered)
+        """
+        if self.hedged_reads is None:
+            return self._request(method, *args, **kwargs), self.exchange_name
+        return self.hedged_reads.read(method, *args, **kwargs)
     
     def get_ticker(self, symbol: str) -> Dict:
-        """Get current ticker information"""
+        """Get current ticker information (cached for QUOTE_CACHE_TTL_SECONDS)"""
+        return self.quote_cache.get(symbol, lambda: self._fetch_ticker(symbol))
+    
+    def _fetch_ticker(self, symbol: str) -> Optional[Dict]:
+        """Fetch a ticker from the exchange, bypassing the quote cache"""
         try:
-            ticker = self.exchange.fetch_ticker(symbol)
-            return {
-                'symbol': symbol,
-                'last': ticker.get('last', 0),
-                'bid': ticker.get('bid', 0),
-                'ask': ticker.get('ask', 0),
-                'volume': ticker.get('quoteVolume', 0),
-                'baseVolume': ticker.get('baseVolume', 0),
-                'percentage': ticker.get('percentage', 0),
-                'change_24h': ticker.get('percentage', 0),
-                'timestamp': datetime.now()
-            }
+            ticker, _ = self._read('fetch_ticker', symbol)
+            return self._format_ticker(symbol, ticker)
         except Exception as e:
             logger.error(f"Error fetching ticker for {symbol}: {e}")
             return None
     
+    def get_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Get tickers for many symbols in one round trip
+        
+        Uses the exchange's multi-symbol endpoint (fetch_tickers) where it
+        exists and falls back to concurrent single-symbol requests otherwise.
+        
+        Args:
+            symbols: Trading pairs (e.g., ['BTC/USDT', 'ETH/USDT'])
+            
+        Returns:
+            Dict mapping symbol to the same ticker dict as get_ticker (failed symbols are omitted)
+        """
+        return self.quote_cache.get_many(symbols, self._fetch_tickers)
+    
+    def _fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch tickers from the exchange, bypassing the quote cache"""
+        if not symbols:
+            return {}
+        
+        if self.exchange.has.get('fetchTickers'):
+            try:
+                tickers, _ = self._read('fetch_tickers', symbols)
+                return {symbol: self._format_ticker(symbol, tickers[symbol])
+                        for symbol in symbols if symbol in tickers}
+            except Exception as e:
+                logger.warning(f"Bulk ticker fetch failed, falling back to single requests: {e}")
+        
+        # Workers run in the caller's context (request priority, retry settings)
+        with ThreadPoolExecutor(max_workers=min(len(symbols), 8)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, self._fetch_ticker, symbol)
+                       for symbol in symbols]
+            results = [future.result() for future in futures]
+        return {symbol: ticker for symbol, ticker in zip(symbols, results) if ticker}
+    
+    def get_last_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Last traded price per symbol from a single bulk ticker request"""
+        tickers = self.get_tickers(symbols)
+        return {symbol: ticker['last'] for symbol, ticker in tickers.items() if ticker.get('last')}
+    
     def get_order_book(self, symbol: str, limit: int = 20) -> Dict:
         """Get order book data"""
         try:
-            order_book = self.exchange.fetch_order_book(symbol, limit)
+            order_book = self._request('fetch_order_book', symbol, limit)
             return {
                 'bids': order_book['bids'],
                 'asks': order_book['asks'],
@@ -164,81 +901,188 @@ class MarketDataFetcher:
             logger.error(f"Error fetching order book for {symbol}: {e}")
             return {'bids': [], 'asks': []}
     
+    def get_local_order_book(self, symbol: str, depth: int = 50, max_age: float = None,
+                             primary_only: bool = False) -> OrderBook:
+        """
+        Local order book for symbol, refreshed with a snapshot when stale
+        
+        Snapshots are hedged reads, so a book may come from the secondary
+        exchange (see OrderBook.venue); that is fine for display and sentiment
+        but not for checks before an order on this exchange.
+        
+        Args:
+            symbol: Trading pair (e.g., 'BTC/USDT')
+            depth: Levels per side requested for a snapshot
+            max_age: Seconds a book may be reused, defaults to Config.ORDER_BOOK_MAX_AGE_SECONDS
+            primary_only: Only return a book from this exchange (snapshot not hedged)
+            
+        Returns:
+            OrderBook (empty if the exchange could not be reached and no usable book was held)
+        """
+        if max_age is None:
+            max_age = self.config.ORDER_BOOK_MAX_AGE_SECONDS
+        book = self.order_books.get(symbol)
+        if book is None:
+            book = self.order_books.setdefault(symbol, OrderBook(symbol))
+        usable = not primary_only or book.venue == self.exchange_name
+        if book.age() <= max_age and not book.empty and usable:
+            return book
+        try:
+            if primary_only:
+                snapshot, venue = self._request('fetch_order_book', symbol, depth), self.exchange_name
+            else:
+                snapshot, venue = self._read('fetch_order_book', symbol, depth)
+            book.apply_snapshot(snapshot['bids'], snapshot['asks'], snapshot.get('timestamp'), snapshot.get('nonce'),
+                                venue)
+        except Exception as e:
+            logger.error(f"Error fetching order book for {symbol}: {e}")
+        if primary_only and book.venue != self.exchange_name:
+            return OrderBook(symbol)
+        return book
+    
+    def estimate_slippage(self, symbol: str, side: str, notional: float) -> Optional[float]:
+        """
+        Expected cost of a market order against the mid price, in basis points
+        
+        Only a book from this exchange is used, never a hedged snapshot from
+        the secondary one.
+        
+        Returns:
+            Slippage in bps, inf if the visible book cannot fill the order, or
+            None if no order book is available
+        """
+        book = self.get_local_order_book(symbol, primary_only=True)
+        if book.empty:
+            return None
+        slippage = book.slippage_bps(side, notional=notional)
+        return float('inf') if slippage is None else slippage
+    
     def get_recent_trades(self, symbol: str, limit: int = 100) -> pd.DataFrame:
-        """Get recent trades"""
+        """Newest trades from the symbol's trade tape (after fetching any new ones)"""
         try:
-            trades = self.exchange.fetch_trades(symbol, limit=limit)
-            df = pd.DataFrame(trades)
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df[['timestamp', 'price', 'amount', 'side']]
+            return self.update_trade_tape(symbol).tail(limit)
         except Exception as e:
             logger.error(f"Error fetching trades for {symbol}: {e}")
             return pd.DataFrame()
     
-    def get_multi_timeframe_data(self, symbol: str, timeframes: List[str] = None) -> Dict[str, pd.DataFrame]:
-        """Fetch data for multiple timeframes"""
+    def update_trade_tape(self, symbol: str) -> TradeTape:
+        """
+        Append the trades made since the last update to the symbol's TradeTape
+        
+        A new tape, or one more than the longest window (Config.TRADE_TAPE_WINDOWS)
+        behind, starts from the newest page of trades, so its windows fill up
+        over the next updates. Otherwise up to TRADE_PAGES_PER_UPDATE pages
+        are fetched from the cursor.
+        """
+        tape = self._trade_tape(symbol)
+        since = self._trade_since(tape)
+        for _ in range(self.TRADE_PAGES_PER_UPDATE):
+            trades = self._request('fetch_trades', symbol, since=since, limit=self.TRADE_PAGE_LIMIT)
+            tape.add(trades)
+            if since is None or len(trades) < self.TRADE_PAGE_LIMIT or trades[-1]['timestamp'] <= since:
+                break
+            since = trades[-1]['timestamp']
+        return tape
+    
+    def get_multi_timeframe_data(self, symbol: str, timeframes: List[str] = None,
+                                 limit: int = 500) -> Dict[str, pd.DataFrame]:
+        """
+        Get candles for multiple timeframes
+        
+        With the candle store enabled, every timeframe that is a multiple of
+        Config.MTF_BASE_TIMEFRAME and whose `limit` bars fit in MTF_HISTORY_DAYS
+        is resampled locally from stored base bars, so a call costs one request
+        for the new base bars instead of one per timeframe. The first call per
+        symbol backfills only as much base history as those timeframes need.
+        Other timeframes, any resampled timeframe with fewer than `limit` bars,
+        or all of them without a store, are fetched directly.
+        
+        Args:
+            symbol: Trading pair (e.g., 'BTC/USDT')
+            timeframes: Timeframes to return, defaults to Config.TIMEFRAMES
+            limit: Maximum candles per timeframe
+            
+        Returns:
+            Dict mapping timeframe to an OHLCV DataFrame (the last bar may be forming)
+        """
+        from src.resampler import can_resample
+        
         if timeframes is None:
             timeframes = self.config.TIMEFRAMES
         
+        base = self.config.MTF_BASE_TIMEFRAME
+        history_ms = self.config.MTF_HISTORY_DAYS * 24 * 60 * 60 * 1000
+        derived = [tf for tf in timeframes
+                   if self.candle_store is not None and can_resample(base, tf)
+                   and self.exchange.parse_timeframe(tf) * 1000 * limit <= history_ms]
+        
         multi_data = {}
+        if derived:
+            try:
+                for tf, df in self._resample(symbol, base, derived, limit).items():
+                    if len(df) >= limit:
+                        multi_data[tf] = df
+                        logger.info(f"Resampled {len(df)} candles for {symbol} on {tf} from {base}")
+            except Exception as e:
+                logger.error(f"Error resampling {symbol} from {base}, fetching timeframes directly: {e}")
+        
         for tf in timeframes:
+            if tf in multi_data:
+                continue
             try:
-                df = self.get_ohlcv(symbol, tf, limit=500)
+                df = self.get_ohlcv(symbol, tf, limit=limit)
                 if not df.empty:
                     multi_data[tf] = df
                     logger.info(f"Fetched {len(df)} candles for {symbol} on {tf}")
             except Exception as e:
                 logger.error(f"Error fetching {tf} data for {symbol}: {e}")
         
-        return multi_data
+        return {tf: multi_data[tf] for tf in timeframes if tf in multi_data}
+    
+    def _resample(self, symbol: str, base: str, timeframes: List[str], limit: int) -> Dict[str, pd.DataFrame]:
+        """
+        Feed base bars downloaded since the last call into the symbol's resampler
+        and return a copy of each timeframe's newest `limit` bars
+        
+        Runs under the symbol's own lock, so a first backfill does not hold up
+        other symbols.
+        """
+        from src.resampler import IncrementalResampler
+        
+        with self._resamplers_lock:
+            lock = self._resampler_locks.setdefault((symbol, base), threading.Lock())
+        
+        with lock:
+            resampler = self._resamplers.get((symbol, base))
+            if (resampler is None or resampler.capacity < limit
+                    or not set(timeframes) <= set(resampler.timeframes)):
+                resampler = IncrementalResampler(base, timeframes, capacity=limit)
+                with self._resamplers_lock:
+                    self._resamplers[(symbol, base)] = resampler
+            
+            start = resampler.last_base_timestamp
+            if start is None:
+                # Enough base bars for `limit` bars of the longest timeframe, plus a partial first bar
+                span = max(self.exchange.parse_timeframe(tf) for tf in resampler.timeframes) * 1000 * (limit + 2)
+                start = self.exchange.milliseconds() - min(span, self.config.MTF_HISTORY_DAYS * 24 * 60 * 60 * 1000)
+            # backfill_ohlcv skips stored pages, so this only downloads the newest bars
+            df = self.backfill_ohlcv(symbol, base, start=start)
+            if not df.empty:
+                resampler.update(Candles.from_frame(df))
+            return {tf: resampler.window(tf, limit).to_frame().copy() for tf in timeframes}
     
     def get_market_sentiment(self, symbol: str) -> Dict:
-        """Calculate market sentiment from order book and recent trades"""
+        """Calculate market sentiment from the order book and the trade flow of the last few minutes"""
         try:
-            order_book = self.get_order_book(symbol, limit=50)
-            trades = self.get_recent_trades(symbol, limit=100)
-            
-            # Calculate bid/ask pressure
-            total_bids = sum([bid[1] for bid in order_book['bids']])
-            total_asks = sum([ask[1] for ask in order_book['asks']])
-            
-            bid_ask_ratio = total_bids / (total_asks + 1e-10)
-            
-            # Calculate buy/sell pressure from trades
-            if not trades.empty:
-                buy_volume = trades[trades['side'] == 'buy']['amount'].sum()
-                sell_volume = trades[trades['side'] == 'sell']['amount'].sum()
-                buy_sell_ratio = buy_volume / (sell_volume + 1e-10)
-            else:
-                buy_sell_ratio = 1.0
-            
-            # Overall sentiment score (0-100, 50 is neutral)
-            sentiment_score = min(100, max(0, 50 * (bid_ask_ratio + buy_sell_ratio)))
-            
-            return {
-                'sentiment_score': sentiment_score,
-                'bid_ask_ratio': bid_ask_ratio,
-                'buy_sell_ratio': buy_sell_ratio,
-                'interpretation': self._interpret_sentiment(sentiment_score)
-            }
+            order_book = self.get_local_order_book(symbol, depth=50)
+            tape = self.update_trade_tape(symbol)
+            trade_flow = tape.window(self.config.SENTIMENT_TRADE_WINDOW_SECONDS, now=self.exchange.milliseconds())
+            return self._compute_sentiment(order_book, trade_flow)
             
         except Exception as e:
             logger.error(f"Error calculating sentiment for {symbol}: {e}")
             return {'sentiment_score': 50, 'interpretation': 'neutral'}
     
-    def _interpret_sentiment(self, score: float) -> str:
-        """Interpret sentiment score"""
-        if score >= 70:
-            return 'very_bullish'
-        elif score >= 55:
-            return 'bullish'
-        elif score >= 45:
-            return 'neutral'
-        elif score >= 30:
-            return 'bearish'
-        else:
-            return 'very_bearish'
-    
     def get_account_balance(self, currency: str = 'USDT') -> Dict:
         """
         Fetch account balance from exchange
@@ -251,25 +1095,8 @@ class MarketDataFetcher:
         """
         try:
             # Fetch balance from exchange
-            balance = self.exchange.fetch_balance()
-            
-            if currency in balance:
-                return {
-                    'currency': currency,
-                    'total': balance[currency].get('total', 0),
-                    'free': balance[currency].get('free', 0),
-                    'used': balance[currency].get('used', 0),
-                    'timestamp': datetime.now()
-                }
-            else:
-                logger.warning(f"Currency {currency} not found in balance")
-                return {
-                    'currency': currency,
-                    'total': 0,
-                    'free': 0,
-                    'used': 0,
-                    'timestamp': datetime.now()
-                }
+            balance = self._request('fetch_balance')
+            return self._format_balance(balance, currency)
         except Exception as e:
             logger.error(f"Error fetching balance for {currency}: {e}")
             return None
@@ -288,7 +1115,7 @@ class MarketDataFetcher:
             Order result dictionary or None if error
         """
         try:
-            if not self.config.BINANCE_API_KEY or not self.config.BINANCE_API_SECRET:
+            if not self._has_credentials():
                 logger.error("API credentials not configured - cannot place orders")
                 return None
             
@@ -296,27 +1123,13 @@ class MarketDataFetcher:
             
             # Use test order for safety (Binance only)
             if test_mode and hasattr(self.exchange, 'create_test_order'):
-                order = self.exchange.create_test_order(symbol, 'market', side, amount)
+                order = self._request('create_test_order', symbol, 'market', side, amount)
                 logger.info(f"[OK] Test order successful: {order}")
             else:
-                order = self.exchange.create_market_order(symbol, side, amount)
+                order = self._request('create_market_order', symbol, side, amount)
                 logger.info(f"[OK] Live order placed: {order.get('id', 'N/A')}")
             
-            return {
-                'success': True,
-                'order_id': order.get('id'),
-                'symbol': symbol,
-                'side': side,
-                'type': 'market',
-                'amount': order.get('amount', amount),
-                'filled': order.get('filled', 0),
-                'price': order.get('price', 0),
-                'average': order.get('average', 0),
-                'cost': order.get('cost', 0),
-                'status': order.get('status', 'unknown'),
-                'timestamp': datetime.now(),
-                'raw_order': order
-            }
+            return self._format_market_order(order, symbol, side, amount)
             
         except ccxt.InsufficientFunds as e:
             logger.error(f"Insufficient funds for {side} {amount} {symbol}: {e}")
@@ -343,31 +1156,20 @@ class MarketDataFetcher:
             Order result dictionary or None if error
         """
         try:
-            if not self.config.BINANCE_API_KEY or not self.config.BINANCE_API_SECRET:
+            if not self._has_credentials():
                 logger.error("API credentials not configured - cannot place orders")
                 return None
             
             logger.info(f"{'TEST ' if test_mode else ''}Placing {side.upper()} limit order: {amount} {symbol} @ ${price}")
             
             if test_mode and hasattr(self.exchange, 'create_test_order'):
-                order = self.exchange.create_test_order(symbol, 'limit', side, amount, price)
+                order = self._request('create_test_order', symbol, 'limit', side, amount, price)
                 logger.info(f"[OK] Test limit order successful")
             else:
-                order = self.exchange.create_limit_order(symbol, side, amount, price)
+                order = self._request('create_limit_order', symbol, side, amount, price)
                 logger.info(f"[OK] Live limit order placed: {order.get('id', 'N/A')}")
             
-            return {
-                'success': True,
-                'order_id': order.get('id'),
-                'symbol': symbol,
-                'side': side,
-                'type': 'limit',
-                'amount': order.get('amount', amount),
-                'price': price,
-                'status': order.get('status', 'open'),
-                'timestamp': datetime.now(),
-                'raw_order': order
-            }
+            return self._format_limit_order(order, symbol, side, amount, price)
             
         except Exception as e:
             logger.error(f"Error placing limit order for {symbol}: {e}")
@@ -376,7 +1178,7 @@ class MarketDataFetcher:
     def cancel_order(self, order_id: str, symbol: str) -> bool:
         """Cancel an open order"""
         try:
-            self.exchange.cancel_order(order_id, symbol)
+            self._request('cancel_order', order_id, symbol)
             logger.info(f"[OK] Order {order_id} cancelled for {symbol}")
             return True
         except Exception as e:
@@ -386,9 +1188,23 @@ class MarketDataFetcher:
     def get_open_orders(self, symbol: str = None) -> List[Dict]:
         """Get all open orders"""
         try:
-            orders = self.exchange.fetch_open_orders(symbol)
+            orders = self._request('fetch_open_orders', symbol)
             return orders
         except Exception as e:
             logger.error(f"Error fetching open orders: {e}")
             return []
 
+
+_shared_fetcher = None
+_shared_fetcher_lock = threading.Lock()
+
+
+def get_shared_fetcher() -> MarketDataFetcher:
+    """Get the process-wide MarketDataFetcher (created on first use)"""
+    global _shared_fetcher
+    if _shared_fetcher is None:
+        with _shared_fetcher_lock:
+            if _shared_fetcher is None:
+                from config import EXCHANGE
+                _shared_fetcher = MarketDataFetcher(EXCHANGE)
+    return _shared_fetcher
@@ -0,0 +1,207 @@
+import atexit
+import gzip
+import json
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+# Exchange methods that talk to the network (everything else is local ccxt helpers)
+RECORDED_PREFIXES = ('fetch_', 'create_', 'cancel_', 'edit_')
+RECORDED_METHODS = ('load_markets',)
+
+
+def _is_recorded(name: str) -> bool:
+    return name in RECORDED_METHODS or name.startswith(RECORDED_PREFIXES)
+
+
+def _call_key(method: str, args: list, kwargs: Dict) -> str:
+    return json.dumps([method, args, kwargs], sort_keys=True, default=str)
+
+
+class ReplayMissError(ccxt.ExchangeError):
+    """A replayed exchange was asked for a call that is not in the recording"""
+
+
+class RecordingExchange:
+    """
+    Proxy around a ccxt exchange that logs every network call
+
+    Each call is written as one JSON line to a gzip file: wall clock time,
+    method, arguments, latency and the response (or the exception raised).
+    Everything else (markets, parse_timeframe, credentials ...) is passed
+    through to the wrapped client, so the proxy can stand in for it anywhere.
+    """
+
+    def __init__(self, exchange, path: str):
+        object.__setattr__(self, '_exchange', exchange)
+        object.__setattr__(self, 'path', path)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_file', gzip.open(path, 'at'))
+        object.__setattr__(self, 'calls_recorded', 0)
+        self._write({'type': 'header', 'exchange_id': exchange.id, 't': exchange.milliseconds()})
+        atexit.register(self.close)
+        logger.info(f"Recording {exchange.id} calls to {path}")
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._exchange, name)
+        if callable(attribute) and _is_recorded(name):
+            return lambda *args, **kwargs: self._call(name, attribute, args, kwargs)
+        return attribute
+
+    def __setattr__(self, name: str, value):
+        setattr(self._exchange, name, value)
+
+    def _call(self, method: str, function, args: tuple, kwargs: Dict):
+        entry = {'type': 'call', 't': self._exchange.milliseconds(), 'method': method,
+                 'args': list(args), 'kwargs': kwargs}
+        started = time.perf_counter()
+        try:
+            response = function(*args, **kwargs)
+        except Exception as e:
+            entry['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            entry['error'] = {'type': type(e).__name__, 'message': str(e)}
+            self._write(entry)
+            raise
+        entry['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        entry['response'] = response
+        self._write(entry)
+        return response
+
+    def _write(self, entry: Dict):
+        line = json.dumps(entry, default=str, separators=(',', ':')) + '\n'
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                object.__setattr__(self, 'calls_recorded', self.calls_recorded + (entry['type'] == 'call'))
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        """Finish the gzip stream (also done at interpreter exit)"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ReplayExchange:
+    """
+    Serves the responses of a RecordingExchange log without any network
+
+    Calls are matched on method and arguments and answered in recorded
+    order; a call whose exact arguments were not recorded (e.g. a `since`
+    computed from the clock) falls back to the next response for the same
+    method and symbol, then for the same method. When a match runs out of
+    recorded responses its last one is repeated. Recorded errors are raised
+    again as the same ccxt exception type.
+
+    milliseconds() follows the recording: it returns the time of the first
+    call not yet replayed, so code that derives cursors from the exchange
+    clock asks for the same ranges as during recording. With latency_scale
+    > 0 every response is delayed by its recorded latency times the scale.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 0.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        header = None
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if entry.get('type') == 'header':
+                    header = header or entry
+                elif entry.get('type') == 'call':
+                    self._entries.append(entry)
+        if header is None:
+            raise ValueError(f"{path} is not an exchange recording (no header)")
+
+        self.id = header['exchange_id']
+        # Offline client for the local helpers (parse_timeframe, market metadata ...)
+        self._client = getattr(ccxt, self.id)({'enableRateLimit': False})
+        self._start_time = header['t']
+        self._next = 0  # Position of the first entry not served yet
+        self._exact = defaultdict(deque)
+        self._by_symbol = defaultdict(deque)
+        self._by_method = defaultdict(deque)
+        self._last: Dict[str, Dict] = {}
+        for position, entry in enumerate(self._entries):
+            entry['position'] = position
+            self._exact[_call_key(entry['method'], entry['args'], entry['kwargs'])].append(entry)
+            self._by_symbol[(entry['method'], self._symbol(entry['args']))].append(entry)
+            self._by_method[entry['method']].append(entry)
+        self.calls_replayed = 0
+        self.misses = 0
+        logger.info(f"Replaying {len(self._entries)} recorded {self.id} calls from {path}")
+
+    def __getattr__(self, name: str):
+        if _is_recorded(name):
+            return lambda *args, **kwargs: self._replay(name, list(args), kwargs)
+        return getattr(self._client, name)
+
+    @staticmethod
+    def _symbol(args: list) -> Optional[str]:
+        return args[0] if args and isinstance(args[0], str) else None
+
+    def milliseconds(self) -> int:
+        with self._lock:
+            if self._next < len(self._entries):
+                return self._entries[self._next]['t']
+            return self._entries[-1]['t'] if self._entries else self._start_time
+
+    def _take(self, queue: deque) -> Optional[Dict]:
+        while queue and queue[0].get('served'):
+            queue.popleft()
+        return queue[0] if queue else None
+
+    def _replay(self, method: str, args: list, kwargs: Dict):
+        key = _call_key(method, json.loads(json.dumps(args, default=str)), kwargs)
+        with self._lock:
+            entry = (self._take(self._exact[key])
+                     or self._take(self._by_symbol[(method, self._symbol(args))])
+                     or self._take(self._by_method[method]))
+            if entry is not None:
+                entry['served'] = True
+                self._next = max(self._next, entry['position'] + 1)
+                while self._next < len(self._entries) and self._entries[self._next].get('served'):
+                    self._next += 1
+                self._last[key] = self._last[(method, self._symbol(args))] = self._last[method] = entry
+            else:
+                entry = self._last.get(key) or self._last.get((method, self._symbol(args))) or self._last.get(method)
+            if entry is None:
+                self.misses += 1
+                raise ReplayMissError(f"No recorded {method} call for {args} {kwargs}")
+            self.calls_replayed += 1
+
+        if self.latency_scale > 0:
+            time.sleep(entry['latency_ms'] / 1000 * self.latency_scale)
+        if 'error' in entry:
+            error_type = getattr(ccxt, entry['error']['type'], ccxt.ExchangeError)
+            if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+                error_type = ccxt.ExchangeError
+            raise error_type(entry['error']['message'])
+        response = entry['response']
+        if method == 'load_markets' and isinstance(response, dict):
+            self._client.set_markets(list(response.values()))
+        return json.loads(json.dumps(response))  # Callers may mutate what they get
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'recorded_calls': len(self._entries),
+                'calls_replayed': self.calls_replayed,
+                'misses': self.misses,
+                'unserved': sum(1 for entry in self._entries if not entry.get('served'))
+            }
@@ -0,0 +1,105 @@
+import threading
+import time
+import logging
+from typing import Callable, Dict, Tuple
+
+from src.rate_limiter import RateLimiter
+from src.retry_policy import ExchangeGuard
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeRegistry:
+    """
+    Process-wide registry of connected exchange clients
+
+    The first caller for a given exchange name pays for discovery, connection
+    and load_markets; every later caller (bot, web endpoints, test scripts)
+    gets the same client back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Tuple[str, object]] = {}
+        self._metrics: Dict[str, Dict] = {}
+        self._rate_limiters: Dict[str, RateLimiter] = {}
+        self._guards: Dict[str, ExchangeGuard] = {}
+        self._connect_locks: Dict[str, threading.Lock] = {}  # One per exchange name being connected
+
+    def get_exchange(self, exchange_name: str, connect: Callable[[], Tuple[str, object, Dict]]) -> Tuple[str, object]:
+        """
+        Get the shared client for an exchange name, connecting on first use
+
+        Args:
+            exchange_name: Requested exchange ('auto' or a ccxt id)
+            connect: Callable returning (exchange_id, exchange, selection_info) for a fresh connection
+
+        Returns:
+            (exchange_id, exchange) of the shared client
+        """
+        with self._lock:
+            if exchange_name in self._clients:
+                return self._clients[exchange_name]
+            connect_lock = self._connect_locks.setdefault(exchange_name, threading.Lock())
+        
+        # Probing and load_markets can take seconds: only callers of the same name wait for them,
+        # the registry lock (rate limiters, guards, metrics) stays free
+        with connect_lock:
+            with self._lock:
+                if exchange_name in self._clients:
+                    return self._clients[exchange_name]
+            started = time.perf_counter()
+            exchange_id, exchange, selection = connect()
+            connected = time.perf_counter()
+            self._load_markets(exchange_id, exchange)
+            with self._lock:
+                self._clients[exchange_name] = (exchange_id, exchange)
+                self._metrics[exchange_name] = {
+                    'exchange_id': exchange_id,
+                    'connect_seconds': round(connected - started, 3),
+                    'load_markets_seconds': round(time.perf_counter() - connected, 3),
+                    'selection': selection
+                }
+            logger.info(f"Registered shared {exchange_id} client for '{exchange_name}'")
+            return exchange_id, exchange
+
+    @staticmethod
+    def _load_markets(exchange_id: str, exchange):
+        """Load market metadata once so later calls reuse the cached markets"""
+        try:
+            exchange.load_markets()
+            logger.info(f"Loaded {len(exchange.markets or {})} markets from {exchange_id}")
+        except Exception as e:
+            logger.warning(f"Could not load markets from {exchange_id}: {str(e)[:100]}")
+
+    def get_rate_limiter(self, exchange_id: str, weight_per_minute: float = None) -> RateLimiter:
+        """The request-weight budget shared by every client of an exchange"""
+        with self._lock:
+            if exchange_id not in self._rate_limiters:
+                self._rate_limiters[exchange_id] = RateLimiter.for_exchange(exchange_id, weight_per_minute)
+            return self._rate_limiters[exchange_id]
+
+    def get_exchange_guard(self, exchange_id: str) -> ExchangeGuard:
+        """Retry policy and circuit breakers shared by every client of an exchange"""
+        with self._lock:
+            if exchange_id not in self._guards:
+                self._guards[exchange_id] = ExchangeGuard.from_config(exchange_id)
+            return self._guards[exchange_id]
+
+    def get_metrics(self, exchange_name: str = None) -> Dict:
+        """Startup metrics (exchange selection and market loading times) per exchange name"""
+        with self._lock:
+            if exchange_name is not None:
+                return dict(self._metrics.get(exchange_name, {}))
+            return {name: dict(metrics) for name, metrics in self._metrics.items()}
+
+    def clear(self):
+        """Forget all shared clients (next get_exchange reconnects)"""
+        with self._lock:
+            self._clients.clear()
+            self._metrics.clear()
+            self._rate_limiters.clear()
+            self._guards.clear()
+
+
+exchange_registry = ExchangeRegistry()
@@ -0,0 +1,182 @@
+import contextvars
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """Recent call latencies and error counts per exchange"""
+
+    def __init__(self, window: int = 1000):
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, exchange_id: str, seconds: float, ok: bool = True):
+        with self._lock:
+            if ok:
+                self._samples[exchange_id].append(seconds * 1000)
+            else:
+                self._errors[exchange_id] += 1
+
+    def percentile(self, exchange_id: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """q-th percentile latency in ms (None with fewer than min_samples calls)"""
+        with self._lock:
+            samples = list(self._samples.get(exchange_id, ()))
+        if len(samples) < min_samples:
+            return None
+        return float(np.percentile(samples, q))
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            exchanges = set(self._samples) | set(self._errors)
+            samples = {exchange_id: list(self._samples.get(exchange_id, ())) for exchange_id in exchanges}
+            errors = dict(self._errors)
+        return {
+            exchange_id: {
+                'calls': len(values),
+                'errors': errors.get(exchange_id, 0),
+                'p50_ms': round(float(np.percentile(values, 50)), 1) if values else None,
+                'p99_ms': round(float(np.percentile(values, 99)), 1) if values else None,
+            }
+            for exchange_id, values in samples.items()
+        }
+
+
+def _valid(response: Any) -> bool:
+    """A response worth returning (empty candle lists and price-less tickers are not)"""
+    if response is None:
+        return False
+    if isinstance(response, (list, dict)) and not response:
+        return False
+    if isinstance(response, dict) and 'last' in response and not response['last']:
+        return False
+    return True
+
+
+class HedgedReader:
+    """
+    Send a public market-data read to a second exchange when the first is slow
+
+    The primary exchange is asked first. If it has not answered within the
+    hedge delay (or failed), the same call goes to the secondary exchange and
+    the first valid response wins; the slower request finishes in the
+    background and still counts towards its exchange's latency statistics.
+    With hedge_after_ms <= 0 the delay follows the primary's recent p95.
+    Until a secondary is attached, reads go to the primary only.
+    """
+
+    HEDGED_METHODS = ('fetch_ticker', 'fetch_tickers', 'fetch_ohlcv', 'fetch_order_book')
+
+    # Adaptive hedge delay bounds and the value used before enough samples exist
+    MIN_HEDGE_MS = 50
+    MAX_HEDGE_MS = 1000
+    DEFAULT_HEDGE_MS = 500
+
+    def __init__(self, primary_id: str, primary_call: Callable[..., Any], hedge_after_ms: float = 0,
+                 max_workers: int = 16):
+        self.primary_id = primary_id
+        self._primary_call = primary_call
+        self.secondary_id = None
+        self._secondary_call = None
+        self.hedge_after_ms = hedge_after_ms
+        self.latency = LatencyStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedged-read')
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.hedges = 0
+        self.wins: Dict[str, int] = defaultdict(int)
+
+    def set_secondary(self, exchange_id: str, call: Callable[..., Any]):
+        self.secondary_id = exchange_id
+        self._secondary_call = call
+        logger.info(f"Hedging market data reads from {self.primary_id} to {exchange_id}")
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before asking the secondary"""
+        if self.hedge_after_ms > 0:
+            return self.hedge_after_ms / 1000
+        p95 = self.latency.percentile(self.primary_id, 95, min_samples=20)
+        if p95 is None:
+            return self.DEFAULT_HEDGE_MS / 1000
+        return min(max(p95, self.MIN_HEDGE_MS), self.MAX_HEDGE_MS) / 1000
+
+    def read(self, method: str, *args, **kwargs) -> Tuple[Any, str]:
+        """
+        Run an exchange read, hedged if a secondary is attached
+
+        Returns:
+            (response, id of the exchange that answered)
+        """
+        with self._lock:
+            self.reads += 1
+        if self._secondary_call is None or method not in self.HEDGED_METHODS:
+            return self._timed(self.primary_id, self._primary_call, method, args, kwargs), self.primary_id
+
+        futures = {self._submit(self.primary_id, self._primary_call, method, args, kwargs): self.primary_id}
+        done, _ = wait(futures, timeout=self.hedge_delay())
+        if done:
+            primary = next(iter(done))
+            if primary.exception() is None and _valid(primary.result()):
+                return self._win(primary.result(), self.primary_id)
+
+        with self._lock:
+            self.hedges += 1
+        futures[self._submit(self.secondary_id, self._secondary_call, method, args, kwargs)] = self.secondary_id
+
+        pending = set(futures)
+        fallback, error = None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                exchange_id = futures[future]
+                if future.exception() is not None:
+                    if error is None or exchange_id == self.primary_id:
+                        error = future.exception()
+                    continue
+                if _valid(future.result()):
+                    return self._win(future.result(), exchange_id)
+                if fallback is None or exchange_id == self.primary_id:
+                    fallback = (future.result(), exchange_id)
+        if fallback is not None:
+            return fallback
+        raise error
+
+    def _submit(self, exchange_id: str, call: Callable, method: str, args: tuple, kwargs: Dict):
+        # Worker threads run in the caller's context so request priorities carry over
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, self._timed, exchange_id, call, method, args, kwargs)
+
+    def _timed(self, exchange_id: str, call: Callable, method: str, args: tuple, kwargs: Dict):
+        started = time.perf_counter()
+        try:
+            response = call(method, *args, **kwargs)
+        except Exception:
+            self.latency.record(exchange_id, time.perf_counter() - started, ok=False)
+            raise
+        self.latency.record(exchange_id, time.perf_counter() - started)
+        return response
+
+    def _win(self, response: Any, exchange_id: str) -> Tuple[Any, str]:
+        with self._lock:
+            self.wins[exchange_id] += 1
+        return response, exchange_id
+
+    def stats(self) -> Dict:
+        """Hedge counts, wins and p50/p99 latency per exchange"""
+        with self._lock:
+            counters = {'reads': self.reads, 'hedges': self.hedges, 'wins': dict(self.wins)}
+        return {
+            'primary': self.primary_id,
+            'secondary': self.secondary_id,
+            'hedge_after_ms': round(self.hedge_delay() * 1000, 1),
+            **counters,
+            'latency': self.latency.summary()
+        }
@@ -0,0 +1,144 @@
+import sys
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from src.data_fetcher import Candles
+
+logger = logging.getLogger(__name__)
+
+
+def series_fingerprint(data) -> Tuple:
+    """
+    Identity of a candle series: (bars, first open time, last open time, last bar)
+
+    The last bar is the one still forming, its OHLCV values are part of the
+    fingerprint so an update of the forming bar gives a new key while an
+    unchanged series (no new trade, no new bar) keeps the same one.
+    Accepts Candles or a timestamp-indexed OHLCV DataFrame.
+    """
+    if len(data) == 0:
+        return (0,)
+    if isinstance(data, Candles):
+        return (len(data), int(data.timestamps[0]), int(data.timestamps[-1]), data.values[:, -1].tobytes())
+    first, last = pd.DatetimeIndex(data.index[[0, -1]]).as_unit('ms').asi8
+    last_bar = np.array([data[column].to_numpy()[-1] for column in Candles.COLUMNS], dtype=np.float64)
+    return (len(data), int(first), int(last), last_bar.tobytes())
+
+
+def _size_of(value) -> int:
+    """Approximate memory held by a cached value, in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Candles):
+        return value.timestamps.nbytes + value.values.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(k) + _size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class IndicatorCache:
+    """
+    LRU cache of indicator frames and results derived from them
+
+    Keys are (symbol, timeframe, series fingerprint, parameters...), so a
+    result is reused for as long as the candles it was computed from are
+    unchanged: repeated reads within one analysis cycle, strategies that
+    share the same frame and dashboard reads between new bars become lookups.
+    The least recently used entries are evicted once either max_entries or
+    max_bytes is exceeded. Cached values are shared, callers must not
+    modify them.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(symbol: str, timeframe: str, data, *params) -> Tuple:
+        """Cache key for a result computed from `data` with `params`"""
+        return (symbol, timeframe, series_fingerprint(data)) + params
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """Cached value for key, calling compute() on a miss (None results are not cached)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {size} bytes, more than the {self.max_bytes} byte cap")
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Drop the entries of one symbol (and timeframe), or everything"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries
+                        if k[0] == symbol and (timeframe is None or k[1] == timeframe)]:
+                self._bytes -= self._entries.pop(key)[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+_shared_cache: Optional[IndicatorCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_indicator_cache() -> IndicatorCache:
+    """Process-wide IndicatorCache sized from the config"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = IndicatorCache(Config.INDICATOR_CACHE_ENTRIES,
+                                               int(Config.INDICATOR_CACHE_MB * 1024 * 1024))
+    return _shared_cache
@@ -0,0 +1,109 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class IndicatorNode:
+    """
+    One computation step: function(*inputs) -> outputs
+
+    The function gets the input arrays in the order of `inputs` and returns
+    one array (single output), a tuple of arrays in the order of `outputs`,
+    or None when it cannot be computed (e.g. too few bars), in which case its
+    outputs and everything depending on them are left out.
+    """
+
+    def __init__(self, name: str, inputs: Sequence[str], outputs: Sequence[str],
+                 function: Callable[..., object]):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.function = function
+
+    def __repr__(self) -> str:
+        return f"IndicatorNode({self.name}: {', '.join(self.inputs)} -> {', '.join(self.outputs)})"
+
+
+class IndicatorGraph:
+    """
+    Indicators declared as nodes with named inputs and outputs
+
+    Inputs are source columns (OHLCV) or outputs of earlier nodes, so
+    intermediates such as the previous close or the true range are nodes of
+    their own and are computed once for every indicator that reads them.
+    evaluate() runs only the nodes the requested columns depend on, so a
+    caller reading five columns does not pay for the other thirty.
+    """
+
+    def __init__(self, sources: Sequence[str] = ('open', 'high', 'low', 'close', 'volume')):
+        self.sources = tuple(sources)
+        self._nodes: List[IndicatorNode] = []
+        self._producers: Dict[str, IndicatorNode] = {}
+        self._plans: Dict[FrozenSet[str], List[IndicatorNode]] = {}
+
+    def add(self, node: IndicatorNode) -> IndicatorNode:
+        """Register a node (its inputs must already be sources or outputs of registered nodes)"""
+        if any(existing.name == node.name for existing in self._nodes):
+            raise ValueError(f"A node named '{node.name}' is already registered")
+        for column in node.inputs:
+            if column not in self.sources and column not in self._producers:
+                raise ValueError(f"{node.name}: unknown input '{column}'")
+        for column in node.outputs:
+            if column in self.sources or column in self._producers:
+                raise ValueError(f"{node.name}: '{column}' is already produced")
+        self._nodes.append(node)
+        self._producers.update((column, node) for column in node.outputs)
+        self._plans.clear()
+        return node
+
+    def node(self, inputs: Sequence[str], outputs: Sequence[str]):
+        """Decorator registering a function as a node named after it"""
+        def register(function):
+            self.add(IndicatorNode(function.__name__.lstrip('_'), inputs, outputs, function))
+            return function
+        return register
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Every column the graph can produce, in registration order"""
+        return tuple(column for node in self._nodes for column in node.outputs)
+
+    def plan(self, columns: Iterable[str]) -> List[IndicatorNode]:
+        """The nodes needed for `columns`, in evaluation order"""
+        wanted = frozenset(columns)
+        if wanted not in self._plans:
+            needed = set()
+            pending = [column for column in wanted if column not in self.sources]
+            while pending:
+                column = pending.pop()
+                node = self._producers.get(column)
+                if node is None:
+                    raise KeyError(f"Unknown indicator column '{column}'")
+                if node.name not in needed:
+                    needed.add(node.name)
+                    pending.extend(c for c in node.inputs if c not in self.sources)
+            # Registration order is a valid evaluation order, inputs are registered first
+            self._plans[wanted] = [node for node in self._nodes if node.name in needed]
+        return self._plans[wanted]
+
+    def evaluate(self, sources: Dict[str, np.ndarray],
+                 columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Compute `columns` (default: all) from the source arrays
+
+        Returns:
+            Dict of the requested columns in the requested order; columns
+            that could not be computed are missing
+        """
+        columns = self.columns if columns is None else tuple(columns)
+        values = dict(sources)
+        for node in self.plan(columns):
+            if any(column not in values for column in node.inputs):
+                continue
+            result = node.function(*(values[column] for column in node.inputs))
+            if result is None:
+                continue
+            if len(node.outputs) == 1:
+                result = (result,)
+            values.update(zip(node.outputs, result))
+        return {column: values[column] for column in columns if column in values}
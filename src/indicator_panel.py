@@ -0,0 +1,115 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher import Candles
+from src.numpy_indicators import COLUMNS, indicator_arrays
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorPanel:
+    """
+    Candles and indicators of many symbols with the same number of bars
+
+    `values` is a float64 array of shape (symbols, columns, bars): the OHLCV
+    columns followed by the indicator columns, one contiguous row per column
+    like Candles. Indicators are computed for the whole panel at once, every
+    node of the NumPy indicator graph runs once over a (symbols, bars) array
+    instead of once per symbol, so the per-call overhead that dominates short
+    windows is paid once per scan.
+    All columns are float64 (higher_high / lower_low hold 0.0 / 1.0).
+    """
+
+    def __init__(self, symbols: Sequence[str], timestamps: np.ndarray, values: np.ndarray,
+                 columns: Sequence[str]):
+        self.symbols = list(symbols)
+        self.timestamps = timestamps
+        self.values = values
+        self.columns = tuple(columns)
+        self._rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self._positions = {column: position for position, column in enumerate(self.columns)}
+
+    @classmethod
+    def compute(cls, symbols: Sequence[str], timestamps: np.ndarray,
+                open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                columns: Sequence[str] = COLUMNS) -> 'IndicatorPanel':
+        """
+        Indicators for (symbols, bars) OHLCV arrays
+
+        Args:
+            symbols: Row labels
+            timestamps: int64 bar open times in epoch ms, (symbols, bars) or (bars,) when shared
+            columns: Indicator columns to compute (default: all add_all_indicators columns)
+        """
+        ohlcv = [np.asarray(field, dtype=np.float64) for field in (open, high, low, close, volume)]
+        shape = ohlcv[0].shape
+        if len(shape) != 2 or len(symbols) != shape[0] or any(field.shape != shape for field in ohlcv):
+            raise ValueError(f"Expected ({len(symbols)}, bars) arrays for every OHLCV field")
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.int64), shape)
+
+        indicators = indicator_arrays(*ohlcv[1:], columns=columns)
+        values = np.empty((shape[0], len(Candles.COLUMNS) + len(indicators), shape[1]))
+        for position, array in enumerate(ohlcv + list(indicators.values())):
+            values[:, position] = array
+        return cls(symbols, timestamps, values, Candles.COLUMNS + tuple(indicators))
+
+    @classmethod
+    def from_candles(cls, candles: Dict[str, Candles], columns: Sequence[str] = COLUMNS) -> 'IndicatorPanel':
+        """Panel of Candles windows with the same number of bars"""
+        symbols = list(candles)
+        if len({len(window) for window in candles.values()}) > 1:
+            raise ValueError("Candles of a panel must have the same number of bars")
+        if not symbols:
+            return cls([], np.empty((0, 0), dtype=np.int64), np.empty((0, len(Candles.COLUMNS), 0)),
+                       Candles.COLUMNS)
+        stacked = np.stack([candles[symbol].values for symbol in symbols])
+        timestamps = np.stack([candles[symbol].timestamps for symbol in symbols])
+        return cls.compute(symbols, timestamps, *(stacked[:, position] for position in range(len(Candles.COLUMNS))),
+                           columns=columns)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """A column for every symbol, (symbols, bars)"""
+        return self.values[:, self._positions[column]]
+
+    def latest(self, column: str) -> Dict[str, float]:
+        """Newest value of a column per symbol"""
+        return dict(zip(self.symbols, self.values[:, self._positions[column], -1].tolist()))
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Timestamp-indexed frame of one symbol over the panel's memory"""
+        row = self._rows[symbol]
+        index = pd.DatetimeIndex(self.timestamps[row].view('datetime64[ms]'), name='timestamp')
+        return pd.DataFrame(self.values[row].T, index=index, columns=list(self.columns), copy=False)
+
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        return {symbol: self.frame(symbol) for symbol in self.symbols}
+
+    def __repr__(self) -> str:
+        return f"IndicatorPanel({len(self)} symbols x {self.values.shape[-1]} bars, {len(self.columns)} columns)"
+
+
+def indicator_panels(candles: Dict[str, Candles], columns: Sequence[str] = COLUMNS) -> List[IndicatorPanel]:
+    """Panels for windows of any lengths, one per distinct number of bars (empty windows are skipped)"""
+    by_length = defaultdict(dict)
+    for symbol, window in candles.items():
+        if not window.empty:
+            by_length[len(window)][symbol] = window
+    return [IndicatorPanel.from_candles(group, columns) for group in by_length.values()]
+
+
+def indicator_frames(candles: Dict[str, Candles], columns: Sequence[str] = COLUMNS) -> Dict[str, pd.DataFrame]:
+    """Indicator frames of many symbols, computed panel by panel"""
+    frames = {}
+    for panel in indicator_panels(candles, columns):
+        frames.update(panel.frames())
+    return frames
@@ -0,0 +1,356 @@
+import json
+import socket
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from src.rate_limiter import Priority, request_priority
+from src.retry_policy import retry_attempts
+
+logger = logging.getLogger(__name__)
+
+
+class MarketFeed:
+    """
+    Push-based market data feed
+
+    Subscribers register callbacks for 'ticker', 'trade' and 'candle' events.
+    Every event is a plain dict with 'type', 'symbol' and 'timestamp' (epoch ms)
+    plus the type-specific fields:
+
+        ticker: last, bid, ask, volume
+        trade:  price, amount, side
+        candle: timeframe, open, high, low, close, volume (timestamp = bar open,
+                only published once the bar has closed)
+
+    Callbacks run on the feed thread, so consumers must be thread safe.
+    Exchange requests made on the feed thread are tried once, without
+    retry backoff (see retry_attempts), so a failing endpoint cannot stall
+    the event stream; the next event or poll tries again.
+    """
+
+    EVENT_TYPES = ('ticker', 'trade', 'candle')
+
+    recorder: Optional['FeedRecorder'] = None  # Set by create_market_feed with FEED_RECORD_FILE, closed on stop()
+
+    def __init__(self, symbols: List[str], timeframe: str = '15m'):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframe = timeframe
+        self._subscribers: Dict[str, List[Callable[[Dict], None]]] = {t: [] for t in self.EVENT_TYPES}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def subscribe(self, event_type: str, callback: Callable[[Dict], None]):
+        """Call callback(event) for every event of event_type"""
+        if event_type not in self._subscribers:
+            raise ValueError(f"Unknown event type '{event_type}', expected one of {self.EVENT_TYPES}")
+        self._subscribers[event_type].append(callback)
+
+    def on_ticker(self, callback: Callable[[Dict], None]):
+        self.subscribe('ticker', callback)
+
+    def on_trade(self, callback: Callable[[Dict], None]):
+        self.subscribe('trade', callback)
+
+    def on_candle(self, callback: Callable[[Dict], None]):
+        self.subscribe('candle', callback)
+
+    def has_subscribers(self, event_type: str) -> bool:
+        return bool(self._subscribers[event_type])
+
+    def publish(self, event: Dict):
+        """Deliver an event to its subscribers (a failing callback does not stop the feed)"""
+        for callback in list(self._subscribers.get(event['type'], ())):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Error in {event['type']} subscriber for {event.get('symbol')}: {e}", exc_info=True)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start delivering events on a background thread"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._serve, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        logger.info(f"{type(self).__name__} started for {', '.join(self.symbols)}")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the feed, wait for its thread to exit and close the recording"""
+        self._stop_event.set()
+        self.join(timeout)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait until the feed thread has finished (a replay reaching the end of its file)"""
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _serve(self):
+        with retry_attempts(1):
+            self._run()
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class PollingFeed(MarketFeed):
+    """
+    Feed built on the REST API of a MarketDataFetcher
+
+    Tickers for all symbols come from one bulk request every poll_seconds.
+    Closed candles are published once the wall clock passes a bar boundary,
+    and trades are only polled when someone subscribed to them.
+    """
+
+    def __init__(self, fetcher, symbols: List[str], timeframe: str = '15m', poll_seconds: float = 5.0):
+        super().__init__(symbols, timeframe)
+        self.fetcher = fetcher
+        self.poll_seconds = poll_seconds
+        self._timeframe_ms = fetcher.exchange.parse_timeframe(timeframe) * 1000
+        self._last_candle: Dict[str, int] = {}
+        self._trades_seen: Dict[str, int] = {}  # TradeTape.total at the last poll
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error polling market feed: {e}", exc_info=True)
+            self._stop_event.wait(max(0.0, self.poll_seconds - (time.monotonic() - started)))
+
+    def poll(self):
+        """Run one polling round"""
+        self._poll_tickers()
+        if self.has_subscribers('trade'):
+            for symbol in self.symbols:
+                self._poll_trades(symbol)
+        for symbol in self.symbols:
+            self._poll_candles(symbol)
+
+    def _poll_tickers(self):
+        received = int(time.time() * 1000)
+        # Ticker events drive stop loss / take profit checks
+        with request_priority(Priority.EXIT):
+            tickers = self.fetcher.get_tickers(self.symbols)
+        for symbol, ticker in tickers.items():
+            if not ticker.get('last'):
+                continue
+            self.publish({
+                'type': 'ticker',
+                'symbol': symbol,
+                'timestamp': received,
+                'last': ticker['last'],
+                'bid': ticker.get('bid'),
+                'ask': ticker.get('ask'),
+                'volume': ticker.get('volume')
+            })
+
+    def _poll_trades(self, symbol: str):
+        seen = self._trades_seen.get(symbol)
+        tape = self.fetcher.update_trade_tape(symbol)
+        self._trades_seen[symbol] = tape.total
+        if seen is None or tape.total <= seen:
+            # Trades made before the feed started are not news
+            return
+        trades = tape.tail(tape.total - seen)
+        for row in trades.itertuples(index=False):
+            self.publish({
+                'type': 'trade',
+                'symbol': symbol,
+                'timestamp': self.fetcher._to_milliseconds(row.timestamp),
+                'price': float(row.price),
+                'amount': float(row.amount),
+                'side': row.side
+            })
+
+    def _poll_candles(self, symbol: str):
+        # Open time of the most recent bar that has fully closed
+        now_ms = int(time.time() * 1000)
+        closed_open = (now_ms // self._timeframe_ms - 1) * self._timeframe_ms
+        last_published = self._last_candle.get(symbol)
+        if last_published is not None and last_published >= closed_open:
+            return
+
+        candles = self.fetcher.get_candles(symbol, self.timeframe, limit=3)
+        for i, timestamp in enumerate(candles.timestamps.tolist()):
+            if timestamp > closed_open:
+                continue
+            if last_published is None:
+                # Bars that closed before the feed started are not news
+                self._last_candle[symbol] = timestamp
+                continue
+            if timestamp <= self._last_candle[symbol]:
+                continue
+            self._last_candle[symbol] = timestamp
+            self.publish({
+                'type': 'candle',
+                'symbol': symbol,
+                'timestamp': timestamp,
+                'timeframe': self.timeframe,
+                'open': float(candles.open[i]),
+                'high': float(candles.high[i]),
+                'low': float(candles.low[i]),
+                'close': float(candles.close[i]),
+                'volume': float(candles.volume[i])
+            })
+
+
+class ReplayServer:
+    """
+    Serve a recorded feed file (one JSON event per line) over a localhost socket
+
+    Events are paced by their timestamps divided by speed (2.0 = twice as fast
+    as recorded, 0 = as fast as possible). Every client connection gets a full
+    replay of the file.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, host: str = '127.0.0.1', port: int = 0):
+        self.path = path
+        self.speed = speed
+        self._socket = socket.create_server((host, port))
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name='ReplayServer', daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._socket.getsockname()[:2]
+
+    def _serve(self):
+        while not self._closed.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._stream, args=(connection,), daemon=True).start()
+
+    def _stream(self, connection: socket.socket):
+        first_timestamp = None
+        started = time.monotonic()
+        try:
+            with connection, open(self.path, 'r') as f:
+                for line in f:
+                    if self._closed.is_set():
+                        break
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if self.speed > 0:
+                        timestamp = json.loads(line)['timestamp']
+                        if first_timestamp is None:
+                            first_timestamp = timestamp
+                        delay = (timestamp - first_timestamp) / 1000 / self.speed - (time.monotonic() - started)
+                        if delay > 0:
+                            self._closed.wait(delay)
+                    connection.sendall(line.encode() + b'\n')
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Replay client disconnected")
+        except Exception as e:
+            logger.error(f"Error replaying {self.path}: {e}")
+
+    def close(self):
+        self._closed.set()
+        self._socket.close()
+
+
+class ReplayFeed(MarketFeed):
+    """
+    Feed that replays recorded events received over a local socket
+
+    With a path, a ReplayServer for that file is started automatically;
+    pass address instead to connect to a server that is already running.
+    The feed stops by itself at the end of the recording.
+    """
+
+    def __init__(self, symbols: List[str] = None, timeframe: str = '15m', path: str = None,
+                 speed: float = 1.0, address: Tuple[str, int] = None):
+        super().__init__(symbols or [], timeframe)
+        if address is None and not path:
+            raise ValueError("ReplayFeed needs a recording path or a server address")
+        self.server = ReplayServer(path, speed) if address is None else None
+        self.address = address or self.server.address
+        self.events_replayed = 0
+
+    def _run(self):
+        symbols = set(self.symbols)
+        try:
+            with socket.create_connection(self.address) as connection:
+                connection.settimeout(0.5)
+                buffer = b''
+                while not self._stop_event.is_set():
+                    try:
+                        chunk = connection.recv(65536)
+                    except socket.timeout:
+                        continue
+                    if not chunk:
+                        break
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b'\n')
+                    for line in lines:
+                        event = json.loads(line)
+                        if symbols and event.get('symbol') not in symbols:
+                            continue
+                        self.events_replayed += 1
+                        self.publish(event)
+        except Exception as e:
+            logger.error(f"Error reading replay feed: {e}", exc_info=True)
+        logger.info(f"Replay finished after {self.events_replayed} events")
+
+    def stop(self, timeout: float = 5.0):
+        super().stop(timeout)
+        if self.server is not None:
+            self.server.close()
+
+
+class FeedRecorder:
+    """Append every event of a feed to a file that ReplayFeed can play back"""
+
+    def __init__(self, feed: MarketFeed, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+        for event_type in MarketFeed.EVENT_TYPES:
+            feed.subscribe(event_type, self.record)
+
+    def record(self, event: Dict):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(json.dumps(event) + '\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def create_market_feed(fetcher, symbols: List[str], timeframe: str = None) -> Optional[MarketFeed]:
+    """
+    Build the feed selected by Config.MARKET_FEED ('polling', 'replay' or 'none')
+
+    Returns None when streaming is disabled; bots then rely on their trading cycle only.
+    """
+    config = Config()
+    timeframe = timeframe or config.PRIMARY_TIMEFRAME
+    kind = config.MARKET_FEED.lower()
+
+    if kind == 'none':
+        return None
+    if kind == 'replay':
+        feed = ReplayFeed(symbols, timeframe, path=config.FEED_REPLAY_FILE, speed=config.FEED_REPLAY_SPEED)
+    elif kind == 'polling':
+        feed = PollingFeed(fetcher, symbols, timeframe, poll_seconds=config.FEED_POLL_SECONDS)
+    else:
+        raise ValueError(f"Unknown MARKET_FEED '{config.MARKET_FEED}', expected 'polling', 'replay' or 'none'")
+
+    if config.FEED_RECORD_FILE:
+        feed.recorder = FeedRecorder(feed, config.FEED_RECORD_FILE)
+        logger.info(f"Recording market feed to {config.FEED_RECORD_FILE}")
+    return feed
@@ -0,0 +1,213 @@
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from src.data_fetcher import Candles, get_shared_fetcher
+from src.streaming_indicators import StreamingIndicators
+
+logger = logging.getLogger(__name__)
+
+
+class CandleRing:
+    """
+    Fixed-capacity rolling window of candles for one (symbol, timeframe)
+
+    Bars live in a buffer twice the capacity long. New bars are written after
+    the last one and, when the buffer end is reached, the newest capacity - 1
+    bars are moved back to the front (once every capacity appends), so the
+    window is always one contiguous slice and window() never copies. The last
+    bar may still be forming; an update with the same timestamp replaces it
+    in place.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros((len(Candles.COLUMNS), 2 * capacity), dtype=np.float64)
+        self._end = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._timestamps[self._end - 1]) if self._size else None
+
+    def clear(self):
+        self._end = 0
+        self._size = 0
+
+    def update(self, candles: Union[Candles, List[list]]) -> int:
+        """
+        Merge bars (oldest first) into the window
+
+        Returns:
+            Number of bars appended (a replaced forming bar does not count)
+        """
+        if not isinstance(candles, Candles):
+            candles = Candles.from_ohlcv(candles)
+        appended = 0
+        last = self.last_timestamp
+        for i, timestamp in enumerate(candles.timestamps.tolist()):
+            if last is not None and timestamp < last:
+                continue
+            if timestamp == last:
+                self._values[:, self._end - 1] = candles.values[:, i]
+                continue
+            self._append(timestamp, candles.values[:, i])
+            last = timestamp
+            appended += 1
+        return appended
+
+    def _append(self, timestamp: int, values: np.ndarray):
+        if self._end == len(self._timestamps):
+            keep = self.capacity - 1
+            self._timestamps[:keep] = self._timestamps[self._end - keep:self._end]
+            self._values[:, :keep] = self._values[:, self._end - keep:self._end]
+            self._end = keep
+            self._size = min(self._size, keep)
+        self._timestamps[self._end] = timestamp
+        self._values[:, self._end] = values
+        self._end += 1
+        self._size = min(self._size + 1, self.capacity)
+
+    def window(self, limit: int = None) -> Candles:
+        """
+        The newest `limit` bars (all of them by default) as a view, valid until the next update
+
+        Not thread-safe on its own: MarketState reads it under its lock and
+        hands out copies.
+        """
+        size = self._size if limit is None else min(limit, self._size)
+        start = self._end - size
+        return Candles(self._timestamps[start:self._end], self._values[:, start:self._end])
+
+
+class MarketState:
+    """
+    Rolling candle windows kept in memory between trading cycles
+
+    The first refresh of a (symbol, timeframe) loads a full window; later
+    refreshes only download the bars that closed since the last one plus the
+    forming bar, so per-cycle work follows the number of new bars and memory
+    stays at the ring capacity however long the bot runs.
+    """
+
+    def __init__(self, fetcher, capacity: int = None):
+        self.fetcher = fetcher
+        self.capacity = capacity or Config().MARKET_STATE_CAPACITY
+        self._rings: Dict[Tuple[str, str], CandleRing] = {}
+        self._indicators: Dict[Tuple[str, str], StreamingIndicators] = {}
+        self._lock = threading.Lock()  # Guards the rings and engines, never held across a download
+        self._refresh_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def refresh(self, symbol: str, timeframe: str, limit: int = None) -> Candles:
+        """
+        Bring a window up to date and return a copy of its newest `limit` bars
+
+        The download runs outside the state lock, so other windows and feed
+        updates are not held up by a slow request; refreshes of the same
+        window wait for each other instead of downloading the same bars.
+        If the exchange cannot be reached the window is returned as it is.
+        """
+        key = (symbol, timeframe)
+        with self._refresh_lock(key):
+            with self._lock:
+                ring = self._ring(symbol, timeframe, limit)
+                capacity, last_timestamp = ring.capacity, ring.last_timestamp
+            restart = False
+            if last_timestamp is None:
+                candles = self.fetcher.get_candles(symbol, timeframe, limit=capacity)
+            else:
+                tf_ms = self.fetcher.exchange.parse_timeframe(timeframe) * 1000
+                missing = (self.fetcher.exchange.milliseconds() - last_timestamp) // tf_ms + 1
+                # Too far behind to stitch, start over
+                restart = missing >= capacity
+                if restart:
+                    candles = self.fetcher.get_candles(symbol, timeframe, limit=capacity)
+                else:
+                    candles = self.fetcher.get_candles(symbol, timeframe, since=last_timestamp,
+                                                       limit=int(missing) + 1)
+            with self._lock:
+                if restart:
+                    ring.clear()
+                if candles.empty:
+                    logger.warning(f"No new candles for {symbol} {timeframe}, using the cached window")
+                else:
+                    appended = ring.update(candles)
+                    logger.debug(f"{symbol} {timeframe}: {appended} new bars, window {len(ring)}")
+                return ring.window(limit).copy()
+
+    def refresh_many(self, symbols: List[str], timeframe: str, limit: int = None) -> Dict[str, Candles]:
+        """refresh() every symbol, e.g. to compute their indicators as one panel"""
+        return {symbol: self.refresh(symbol, timeframe, limit) for symbol in symbols}
+
+    def indicators(self, symbol: str, timeframe: str, limit: int = None) -> pd.DataFrame:
+        """
+        refresh() and the TechnicalIndicators.add_all_indicators columns of the newest `limit` bars
+
+        Indicators are kept up to date incrementally by a StreamingIndicators
+        engine per window: closed bars are committed once, the forming bar is
+        re-evaluated on every call. Values follow the whole history the engine
+        has seen (up to the ring capacity when it starts), so long indicators
+        like sma_200 are defined even when limit is smaller. The frame is a
+        copy taken under the lock, feed updates do not change it.
+        """
+        self.refresh(symbol, timeframe, limit)
+        with self._lock:
+            key = (symbol, timeframe)
+            ring = self._rings[key]
+            engine = self._indicators.get(key)
+            if engine is None or engine.capacity != ring.capacity:
+                engine = StreamingIndicators(ring.capacity)
+                self._indicators[key] = engine
+            engine.sync(ring.window())
+            return engine.frame(limit).copy()
+
+    def apply_candle(self, event: Dict):
+        """Merge a closed candle event from a MarketFeed into its window"""
+        with self._lock:
+            ring = self._rings.get((event['symbol'], event['timeframe']))
+            if ring is None:
+                return
+            ring.update(Candles(
+                np.array([event['timestamp']], dtype=np.int64),
+                np.array([[event[column]] for column in Candles.COLUMNS], dtype=np.float64)
+            ))
+
+    def window(self, symbol: str, timeframe: str, limit: int = None) -> Candles:
+        """Copy of the current window, without contacting the exchange"""
+        with self._lock:
+            ring = self._rings.get((symbol, timeframe))
+            return ring.window(limit).copy() if ring is not None else Candles.from_ohlcv([])
+
+    def _refresh_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._refresh_locks.setdefault(key, threading.Lock())
+
+    def _ring(self, symbol: str, timeframe: str, limit: int = None) -> CandleRing:
+        key = (symbol, timeframe)
+        ring = self._rings.get(key)
+        if ring is None or (limit is not None and limit > ring.capacity):
+            ring = CandleRing(max(self.capacity, limit or 0))
+            self._rings[key] = ring
+        return ring
+
+
+_shared_state = None
+_shared_state_lock = threading.Lock()
+
+
+def get_shared_market_state() -> MarketState:
+    """Process-wide MarketState on top of the shared MarketDataFetcher"""
+    global _shared_state
+    if _shared_state is None:
+        with _shared_state_lock:
+            if _shared_state is None:
+                _shared_state = MarketState(get_shared_fetcher())
+    return _shared_state
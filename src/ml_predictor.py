@@ -3,11 +3,12 @@ import numpy as np
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.model_selection import train_test_split
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, Iterable, Optional, Union
 import logging
 import joblib
 import os
 from datetime import datetime
+from src.data_fetcher import Candles, as_frame
 
 # Try to import TensorFlow (optional)
 try:
@@ -24,6 +25,18 @@ logger = logging.getLogger(__name__)
 class MLPredictor:
     """Machine Learning predictor for crypto price movements"""
     
+    # Indicator columns used as features (volume_sma and sma_20 also feed the engineered ones)
+    FEATURE_COLUMNS = (
+        'rsi', 'macd', 'macd_signal', 'macd_diff',
+        'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_percent',
+        'atr', 'adx', 'adx_pos', 'adx_neg',
+        'stoch_k', 'stoch_d', 'williams_r',
+        'obv', 'vwap', 'volume_sma',
+        'sma_20', 'sma_50', 'ema_9', 'ema_21',
+        'price_momentum_5', 'price_momentum_10', 'price_momentum_20',
+        'volatility_20', 'trend_strength'
+    )
+    
     def __init__(self, model_type: str = 'ensemble'):
         """
         Initialize ML Predictor
@@ -36,25 +49,20 @@ class MLPredictor:
         self.models = {}
         self.feature_importance = {}
         self.last_training_time = None
+        self.model_version = 0  # Bumped whenever the models change (cached predictions key on it)
         
     def prepare_features(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
         """Prepare features for ML model"""
         try:
+            # Engineered columns go on a shallow copy, the caller's frame (possibly cached) is left as is
+            df = df.copy(deep=False)
+            
             # Create target variable (1 if price goes up, 0 if down)
             df['future_return'] = df['close'].shift(-1) / df['close'] - 1
             df['target'] = (df['future_return'] > 0).astype(int)
             
             # Feature list
-            feature_columns = [
-                'rsi', 'macd', 'macd_signal', 'macd_diff',
-                'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_percent',
-                'atr', 'adx', 'adx_pos', 'adx_neg',
-                'stoch_k', 'stoch_d', 'williams_r',
-                'obv', 'vwap', 'volume_sma',
-                'sma_20', 'sma_50', 'ema_9', 'ema_21',
-                'price_momentum_5', 'price_momentum_10', 'price_momentum_20',
-                'volatility_20', 'trend_strength'
-            ]
+            feature_columns = list(self.FEATURE_COLUMNS)
             
             # Additional engineered features
             df['price_position'] = (df['close'] - df['low']) / (df['high'] - df['low'] + 1e-10)
@@ -63,8 +71,8 @@ class MLPredictor:
             
             feature_columns.extend(['price_position', 'volume_ratio', 'distance_from_sma20'])
             
-            # Remove rows with NaN values
-            df_clean = df.dropna()
+            # Remove rows with NaN features (or no next bar to label them)
+            df_clean = df.dropna(subset=feature_columns + ['future_return'])
             
             X = df_clean[feature_columns]
             y = df_clean['target']
@@ -75,6 +83,22 @@ class MLPredictor:
             logger.error(f"Error preparing features: {e}")
             return pd.DataFrame(), pd.Series()
     
+    def _prepare_chunked_features(self, chunks: Iterable) -> Tuple[pd.DataFrame, pd.Series]:
+        """prepare_features() per chunk, rows a chunk repeats from the previous one are kept once"""
+        features, targets = [], []
+        last = None
+        for chunk in chunks:
+            X, y = self.prepare_features(as_frame(chunk))
+            if last is not None:
+                X, y = X[X.index > last], y[y.index > last]
+            if len(X):
+                features.append(X)
+                targets.append(y)
+                last = X.index[-1]
+        if not features:
+            return pd.DataFrame(), pd.Series()
+        return pd.concat(features), pd.concat(targets)
+    
     def train_random_forest(self, X_train, y_train) -> RandomForestClassifier:
         """Train Random Forest model"""
         logger.info("Training Random Forest model...")
@@ -193,11 +217,23 @@ class MLPredictor:
         
         return model
     
-    def train(self, df: pd.DataFrame) -> Dict:
-        """Train all models"""
+    def train(self, df: Union[pd.DataFrame, Candles, Iterable]) -> Dict:
+        """
+        Train all models
+        
+        Args:
+            df: DataFrame (or Candles) with OHLCV and indicators, or an iterable
+                of them in time order, e.g. CandleArchive.iter_months(..., overlap=n)
+                with indicators added per chunk: features are built chunk by
+                chunk, so only the feature rows are held, not the candles
+                (cumulative indicators such as obv restart with every chunk)
+        """
         logger.info(f"Training {self.model_type} model...")
         
-        X, y = self.prepare_features(df)
+        if isinstance(df, (pd.DataFrame, Candles)):
+            X, y = self.prepare_features(as_frame(df))
+        else:
+            X, y = self._prepare_chunked_features(df)
         
         if X.empty or y.empty:
             logger.error("No data available for training")
@@ -235,6 +271,7 @@ class MLPredictor:
                 logger.info("LSTM model trained")
         
         self.last_training_time = datetime.now()
+        self.model_version += 1
         return results
     
     def predict(self, df: pd.DataFrame) -> Dict:
@@ -334,6 +371,7 @@ class MLPredictor:
             if os.path.exists(os.path.join(directory, 'scaler.pkl')):
                 self.scaler = joblib.load(os.path.join(directory, 'scaler.pkl'))
             
+            self.model_version += 1
             logger.info(f"Models loaded from {directory}")
             
         except Exception as e:
@@ -0,0 +1,499 @@
+import itertools
+import random
+import threading
+import time
+import logging
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ccxt
+import numpy as np
+
+from config import Config
+from src.data_fetcher import Candles
+from src.order_book import OrderBook
+from src.resampler import resample
+
+logger = logging.getLogger(__name__)
+
+MINUTE_MS = 60_000
+DAY_MS = 24 * 60 * MINUTE_MS
+
+
+class MockExchange:
+    """
+    In-process synthetic exchange with the ccxt methods MarketDataFetcher uses
+
+    Every symbol follows its own deterministic price path: a log random walk,
+    or with model='regime' a walk that switches hourly between a calm and a
+    volatile trending regime. Each day is drawn from (seed, symbol, day) as
+    hourly returns first, then 1m bars bridged between them, so reaching the
+    present only costs the hourly draws of the earlier days, any range of
+    history is reproducible, and only the days asked for are kept in memory. Higher timeframes
+    are aggregated from the 1m bars; the current bar is revealed as the
+    clock advances.
+
+    Order books and trades are sampled around the path. Market orders walk
+    the book, limit orders fill once the price crosses them, and balances
+    are updated with a taker fee. latency_ms and error_rate inject delays
+    (exponentially distributed around the mean) and network errors into
+    every call, to load test the fetcher, the bots and the dashboard with
+    hundreds of symbols and no network.
+    """
+
+    id = 'mock'
+    name = 'Mock'
+    has = {
+        'fetchOHLCV': True,
+        'fetchTicker': True,
+        'fetchTickers': True,
+        'fetchOrderBook': True,
+        'fetchTrades': True,
+        'fetchBalance': True,
+        'createOrder': True,
+        'cancelOrder': True,
+        'fetchOpenOrders': True,
+    }
+    requiredCredentials = {}
+    timeframes = {tf: tf for tf in ('1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d', '3d', '1w')}
+    parse_timeframe = staticmethod(ccxt.Exchange.parse_timeframe)
+
+    CHUNK_BARS = 1440
+    BLOCK_DAYS = 64
+    MAX_CACHED_DAYS = 4096
+    OHLCV_LIMIT = 1000
+    TRADES_PER_MINUTE = 30
+    BOOK_LEVELS = 100
+
+    def __init__(self, symbols: List[str], model: str = 'random_walk', latency_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 42, balance: float = 10000.0, history_days: int = 60,
+                 fee: float = 0.001, clock: Callable[[], int] = None):
+        if model not in ('random_walk', 'regime'):
+            raise ValueError(f"Unknown mock price model '{model}', expected 'random_walk' or 'regime'")
+        self.model = model
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self.fee = fee
+        self.symbols = list(dict.fromkeys(symbols))
+        self.apiKey = ''
+        self.secret = ''
+        self.proxies = None
+        self.markets = {}
+        self._clock = clock or (lambda: int(time.time() * 1000))
+        self._genesis = (self._clock() - history_days * DAY_MS) // DAY_MS * DAY_MS
+
+        self._params = {symbol: self._symbol_params(i, symbol) for i, symbol in enumerate(self.symbols)}
+        # Per symbol: hourly returns of every BLOCK_DAYS days up to the newest one asked for
+        self._blocks: Dict[str, List[Dict]] = {}
+        self._days: 'OrderedDict[Tuple[str, int], np.ndarray]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+
+        self._balances = {'USDT': {'free': float(balance), 'used': 0.0}}
+        self._orders: Dict[str, Dict] = {}
+        self._order_ids = itertools.count(1)
+
+    def _symbol_params(self, index: int, symbol: str) -> Dict:
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        known = {'BTC/USDT': 60000.0, 'ETH/USDT': 3000.0}
+        return {
+            'index': index,
+            'key': zlib.crc32(symbol.encode()),
+            'price': known.get(symbol, float(np.exp(rng.uniform(np.log(0.05), np.log(500))))),
+            'sigma': float(rng.uniform(0.0005, 0.002)),  # 1m log return volatility
+            'volume': float(np.exp(rng.uniform(np.log(10), np.log(5000)))),  # Base volume per 1m bar
+        }
+
+    def milliseconds(self) -> int:
+        return self._clock()
+
+    def _network(self, method: str):
+        """Simulated round trip: latency and random failures"""
+        if self.latency_ms > 0:
+            time.sleep(self._random.expovariate(1000.0 / self.latency_ms))
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            error = self._random.choice((ccxt.NetworkError, ccxt.RequestTimeout, ccxt.ExchangeNotAvailable))
+            raise error(f"mock {method} failed (simulated)")
+
+    def _check_symbol(self, symbol: str):
+        if symbol not in self._params:
+            raise ccxt.BadSymbol(f"mock does not have market symbol {symbol}")
+
+    def _day(self, symbol: str, day: int) -> np.ndarray:
+        """open, high, low, close, volume of the 1m bars of one day, shape (5, CHUNK_BARS)"""
+        key = (symbol, day)
+        with self._lock:
+            bars = self._days.get(key)
+            if bars is not None:
+                self._days.move_to_end(key)
+                return bars
+            bars = self._generate(symbol, day)
+            self._days[key] = bars
+            while len(self._days) > self.MAX_CACHED_DAYS:
+                self._days.popitem(last=False)
+            return bars
+
+    def _block(self, symbol: str, block: int) -> Dict:
+        """Hourly returns and regimes of BLOCK_DAYS days, drawn in one go"""
+        blocks = self._blocks.setdefault(symbol, [])
+        params = self._params[symbol]
+        while len(blocks) <= block:
+            if blocks:
+                # A block starts where the previous one ended
+                start_log = blocks[-1]['start'] + float(blocks[-1]['hourly'].sum())
+                regime = int(blocks[-1]['regimes'][-1])
+            else:
+                start_log, regime = float(np.log(params['price'])), 0
+            rng = np.random.default_rng([self.seed, params['key'], len(blocks), 0])
+            hours = self.BLOCK_DAYS * 24
+            regimes = np.zeros(hours, dtype=np.int8)
+            if self.model == 'regime':
+                # Two-state Markov chain per hour: calm (0) or volatile with a drift (1)
+                switches = rng.random(hours)
+                for hour in range(hours):
+                    if switches[hour] < (0.08 if regime == 0 else 0.2):
+                        regime = 1 - regime
+                    regimes[hour] = regime
+            scale, drift = self._regime_scale(params['sigma'], regimes, rng.choice((-1.0, 1.0), hours))
+            hourly = rng.standard_normal(hours) * scale * np.sqrt(60) + drift * 60
+            blocks.append({'start': start_log, 'hourly': hourly, 'regimes': regimes, 'direction': np.sign(drift)})
+        return blocks[block]
+
+    @staticmethod
+    def _regime_scale(sigma: float, regimes: np.ndarray, direction: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-minute volatility and drift for each hour"""
+        return np.where(regimes == 1, 3.0, 1.0) * sigma, direction * 0.05 * sigma * regimes
+
+    def _generate(self, symbol: str, day: int) -> np.ndarray:
+        params = self._params[symbol]
+        block = self._block(symbol, day // self.BLOCK_DAYS)
+        first = day % self.BLOCK_DAYS * 24
+        hours = slice(first, first + 24)
+        start_log = block['start'] + float(block['hourly'][:first].sum())
+        scale, _ = self._regime_scale(params['sigma'], block['regimes'][hours], block['direction'][hours])
+        hourly = block['hourly'][hours]
+        rng = np.random.default_rng([self.seed, params['key'], day, 1])
+        sigma = params['sigma']
+
+        # Brownian bridge inside every hour so the minutes add up to the hourly return
+        minutes = rng.standard_normal((len(hourly), 60)) * scale[:, None]
+        minutes += (hourly - minutes.sum(axis=1))[:, None] / 60
+        returns = minutes.ravel()
+
+        close_log = start_log + np.cumsum(returns)
+        open_log = np.r_[start_log, close_log[:-1]]
+        wick = np.abs(rng.standard_normal((2, self.CHUNK_BARS))) * sigma * 0.5
+        bars = np.empty((len(Candles.COLUMNS), self.CHUNK_BARS))
+        bars[0] = np.exp(open_log)
+        bars[3] = np.exp(close_log)
+        bars[1] = np.maximum(bars[0], bars[3]) * np.exp(wick[0])
+        bars[2] = np.minimum(bars[0], bars[3]) * np.exp(-wick[1])
+        bars[4] = params['volume'] * rng.lognormal(0.0, 0.5, self.CHUNK_BARS) * (1 + np.abs(returns) / sigma)
+        return bars
+
+    def _minute_bars(self, symbol: str, start: int, end: int, now: int) -> Candles:
+        """1m bars opening in [start, end), the bar containing now only partly revealed"""
+        start = max(start, self._genesis) // MINUTE_MS * MINUTE_MS
+        end = min(end, now // MINUTE_MS * MINUTE_MS + MINUTE_MS)
+        if end <= start:
+            return Candles.from_ohlcv([])
+        first, last = (start - self._genesis) // MINUTE_MS, (end - self._genesis) // MINUTE_MS
+        pieces = []
+        for day in range(first // self.CHUNK_BARS, (last - 1) // self.CHUNK_BARS + 1):
+            lo = max(first - day * self.CHUNK_BARS, 0)
+            hi = min(last - day * self.CHUNK_BARS, self.CHUNK_BARS)
+            pieces.append(self._day(symbol, day)[:, lo:hi])
+        values = np.concatenate(pieces, axis=1) if len(pieces) > 1 else pieces[0].copy()
+        timestamps = self._genesis + np.arange(first, last, dtype=np.int64) * MINUTE_MS
+
+        if timestamps[-1] + MINUTE_MS > now:
+            fraction = (now - timestamps[-1]) / MINUTE_MS
+            open_, close = values[0, -1], values[3, -1]
+            values[3, -1] = open_ + (close - open_) * fraction
+            values[1, -1] = max(open_, values[3, -1])
+            values[2, -1] = min(open_, values[3, -1])
+            values[4, -1] *= fraction
+        return Candles(timestamps, values)
+
+    def _last_price(self, symbol: str, now: int) -> float:
+        return float(self._minute_bars(symbol, now - MINUTE_MS + 1, now + 1, now).close[-1])
+
+    def load_markets(self, reload: bool = False, params: Dict = None) -> Dict:
+        if self.markets and not reload:
+            return self.markets
+        self.markets = {
+            symbol: {
+                'id': symbol.replace('/', ''),
+                'symbol': symbol,
+                'base': symbol.split('/')[0],
+                'quote': symbol.split('/')[1],
+                'type': 'spot',
+                'spot': True,
+                'active': True,
+                'precision': {'amount': 1e-8, 'price': 1e-8},
+                'limits': {'amount': {'min': 1e-8}, 'cost': {'min': 1.0}},
+                'taker': self.fee,
+                'maker': self.fee,
+            }
+            for symbol in self.symbols
+        }
+        return self.markets
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int = None, limit: int = None,
+                    params: Dict = None) -> List[list]:
+        self._network('fetch_ohlcv')
+        self._check_symbol(symbol)
+        now = self.milliseconds()
+        tf_ms = int(self.parse_timeframe(timeframe) * 1000)
+        limit = min(limit or 500, self.OHLCV_LIMIT)
+        current = now // tf_ms * tf_ms
+        if since is None:
+            start = current - (limit - 1) * tf_ms
+        else:
+            start = -(-int(since) // tf_ms) * tf_ms  # First bar opening at or after since
+        end = min(start + limit * tf_ms, current + tf_ms)
+        # Bars before the start of history are partial, skip them like a new listing
+        start = max(start, -(-self._genesis // tf_ms) * tf_ms)
+        bars = resample(self._minute_bars(symbol, start, end, now), timeframe, drop_partial=False)
+        return [[timestamp] + row for timestamp, row in zip(bars.timestamps.tolist(), bars.values.T.tolist())]
+
+    def fetch_ticker(self, symbol: str, params: Dict = None) -> Dict:
+        self._network('fetch_ticker')
+        self._check_symbol(symbol)
+        return self._ticker(symbol, self.milliseconds())
+
+    def fetch_tickers(self, symbols: List[str] = None, params: Dict = None) -> Dict[str, Dict]:
+        self._network('fetch_tickers')
+        now = self.milliseconds()
+        return {symbol: self._ticker(symbol, now) for symbol in (symbols or self.symbols) if symbol in self._params}
+
+    def _ticker(self, symbol: str, now: int) -> Dict:
+        day = self._minute_bars(symbol, now - DAY_MS + 1, now + 1, now)
+        last = float(day.close[-1])
+        open_ = float(day.open[0])
+        half_spread = last * 0.5e-4
+        return {
+            'symbol': symbol,
+            'timestamp': now,
+            'last': last,
+            'close': last,
+            'bid': last - half_spread,
+            'ask': last + half_spread,
+            'open': open_,
+            'high': float(day.high.max()),
+            'low': float(day.low.min()),
+            'baseVolume': float(day.volume.sum()),
+            'quoteVolume': float((day.volume * day.close).sum()),
+            'change': last - open_,
+            'percentage': (last / open_ - 1) * 100,
+        }
+
+    def fetch_order_book(self, symbol: str, limit: int = None, params: Dict = None) -> Dict:
+        self._network('fetch_order_book')
+        self._check_symbol(symbol)
+        now = self.milliseconds()
+        return self._order_book(symbol, now, limit or self.BOOK_LEVELS)
+
+    def _order_book(self, symbol: str, now: int, levels: int) -> Dict:
+        last = self._last_price(symbol, now)
+        params = self._params[symbol]
+        rng = np.random.default_rng([self.seed, params['key'], now // 1000])
+        tick = last * 1e-4
+        steps = np.arange(levels) * tick
+        sizes = params['volume'] / 20 * rng.lognormal(0.0, 0.7, (2, levels)) * (1 + np.arange(levels) / 10)
+        bids = np.column_stack([last - tick / 2 - steps, sizes[0]])
+        asks = np.column_stack([last + tick / 2 + steps, sizes[1]])
+        return {'symbol': symbol, 'bids': bids.tolist(), 'asks': asks.tolist(), 'timestamp': now, 'nonce': now}
+
+    def fetch_trades(self, symbol: str, since: int = None, limit: int = None, params: Dict = None) -> List[Dict]:
+        self._network('fetch_trades')
+        self._check_symbol(symbol)
+        now = self.milliseconds()
+        limit = limit or 500
+        trades = []
+        if since is not None:
+            minute = max(since, self._genesis) // MINUTE_MS * MINUTE_MS
+            while minute <= now and len(trades) < limit:
+                trades.extend(t for t in self._minute_trades(symbol, minute, now) if t['timestamp'] >= since)
+                minute += MINUTE_MS
+            return trades[:limit]
+        minute = now // MINUTE_MS * MINUTE_MS
+        while minute >= self._genesis and len(trades) < limit:
+            trades = self._minute_trades(symbol, minute, now) + trades
+            minute -= MINUTE_MS
+        return trades[-limit:]
+
+    def _minute_trades(self, symbol: str, minute: int, now: int) -> List[Dict]:
+        """Trades of one 1m bar up to now, priced along the bar"""
+        bar = self._minute_bars(symbol, minute, minute + MINUTE_MS, minute + MINUTE_MS)
+        params = self._params[symbol]
+        rng = np.random.default_rng([self.seed, params['key'], minute, 1])
+        count = rng.poisson(self.TRADES_PER_MINUTE)
+        offsets = np.sort(rng.integers(0, MINUTE_MS, count))
+        path = bar.open[0] + (bar.close[0] - bar.open[0]) * offsets / MINUTE_MS
+        noise = rng.standard_normal(count) * params['sigma'] * 0.2
+        prices = path * (1 + noise)
+        amounts = bar.volume[0] / max(count, 1) * rng.exponential(1.0, count)
+        return [
+            {'id': f"{minute}-{i}", 'symbol': symbol, 'timestamp': int(minute + offsets[i]),
+             'price': float(prices[i]), 'amount': float(amounts[i]), 'side': 'buy' if noise[i] >= 0 else 'sell',
+             'cost': float(prices[i] * amounts[i])}
+            for i in range(count) if minute + offsets[i] <= now
+        ]
+
+    def fetch_balance(self, params: Dict = None) -> Dict:
+        self._network('fetch_balance')
+        with self._lock:
+            self._match_orders()
+            balance = {'free': {}, 'used': {}, 'total': {}}
+            for currency, amounts in self._balances.items():
+                total = amounts['free'] + amounts['used']
+                balance[currency] = {'free': amounts['free'], 'used': amounts['used'], 'total': total}
+                balance['free'][currency] = amounts['free']
+                balance['used'][currency] = amounts['used']
+                balance['total'][currency] = total
+            return balance
+
+    def create_order(self, symbol: str, type: str, side: str, amount: float, price: float = None,
+                     params: Dict = None) -> Dict:
+        self._network('create_order')
+        self._check_symbol(symbol)
+        if side not in ('buy', 'sell') or amount <= 0:
+            raise ccxt.InvalidOrder(f"mock rejects {side} order for {amount} {symbol}")
+        if type == 'limit' and not price:
+            raise ccxt.InvalidOrder("mock limit orders need a price")
+        if type not in ('market', 'limit'):
+            raise ccxt.InvalidOrder(f"mock does not support {type} orders")
+
+        now = self.milliseconds()
+        with self._lock:
+            order = {
+                'id': str(next(self._order_ids)),
+                'symbol': symbol,
+                'type': type,
+                'side': side,
+                'amount': float(amount),
+                'price': price,
+                'filled': 0.0,
+                'remaining': float(amount),
+                'average': None,
+                'cost': 0.0,
+                'status': 'open',
+                'timestamp': now,
+                'fee': None,
+            }
+            book = OrderBook.from_ccxt(symbol, self._order_book(symbol, now, self.BOOK_LEVELS))
+            if type == 'market':
+                fill_price = book.fill_price(side, amount=amount)
+                if fill_price is None:
+                    raise ccxt.InvalidOrder(f"mock book too thin to fill {amount} {symbol}")
+                self._reserve(order, fill_price)
+                self._fill(order, fill_price, now)
+            else:
+                self._reserve(order, price)
+                crossed = book.best_ask <= price if side == 'buy' else book.best_bid >= price
+                if crossed:
+                    self._fill(order, price, now)
+            self._orders[order['id']] = order
+            return dict(order)
+
+    def create_market_order(self, symbol: str, side: str, amount: float, price: float = None,
+                            params: Dict = None) -> Dict:
+        return self.create_order(symbol, 'market', side, amount, price, params)
+
+    def create_limit_order(self, symbol: str, side: str, amount: float, price: float, params: Dict = None) -> Dict:
+        return self.create_order(symbol, 'limit', side, amount, price, params)
+
+    def create_test_order(self, symbol: str, type: str, side: str, amount: float, price: float = None,
+                          params: Dict = None) -> Dict:
+        """Validate an order without executing it (Binance's test endpoint)"""
+        self._network('create_test_order')
+        self._check_symbol(symbol)
+        return {}
+
+    def _reserve(self, order: Dict, price: float):
+        """Move the funds an order needs from free to used, or reject it"""
+        base, quote = order['symbol'].split('/')
+        currency, needed = (quote, order['amount'] * price * (1 + self.fee)) if order['side'] == 'buy' \
+            else (base, order['amount'])
+        account = self._balances.setdefault(currency, {'free': 0.0, 'used': 0.0})
+        if account['free'] < needed:
+            raise ccxt.InsufficientFunds(f"mock balance {account['free']:.8f} {currency} < {needed:.8f} needed")
+        account['free'] -= needed
+        account['used'] += needed
+        order['reserved'] = (currency, needed)
+
+    def _fill(self, order: Dict, price: float, now: int):
+        base, quote = order['symbol'].split('/')
+        amount = order['remaining']
+        cost = amount * price
+        fee = cost * self.fee
+        currency, reserved = order.pop('reserved')
+        self._balances[currency]['used'] -= reserved
+        if order['side'] == 'buy':
+            # Refund what the reservation held beyond the actual cost
+            self._balances[quote]['free'] += reserved - cost - fee
+            self._balances.setdefault(base, {'free': 0.0, 'used': 0.0})['free'] += amount
+        else:
+            self._balances.setdefault(quote, {'free': 0.0, 'used': 0.0})['free'] += cost - fee
+        order.update({'filled': order['amount'], 'remaining': 0.0, 'average': price, 'cost': cost,
+                      'status': 'closed', 'lastTradeTimestamp': now, 'fee': {'currency': quote, 'cost': fee}})
+        if order['type'] == 'market':
+            order['price'] = price
+
+    def _match_orders(self, symbol: str = None):
+        """Fill resting limit orders whose price has been reached"""
+        now = self.milliseconds()
+        for order in self._orders.values():
+            if order['status'] != 'open' or (symbol is not None and order['symbol'] != symbol):
+                continue
+            last = self._last_price(order['symbol'], now)
+            if (order['side'] == 'buy' and last <= order['price']) or (order['side'] == 'sell' and last >= order['price']):
+                self._fill(order, order['price'], now)
+
+    def cancel_order(self, id: str, symbol: str = None, params: Dict = None) -> Dict:
+        self._network('cancel_order')
+        with self._lock:
+            order = self._orders.get(id)
+            if order is None or order['status'] != 'open':
+                raise ccxt.OrderNotFound(f"mock has no open order {id}")
+            currency, reserved = order.pop('reserved')
+            self._balances[currency]['used'] -= reserved
+            self._balances[currency]['free'] += reserved
+            order['status'] = 'canceled'
+            return dict(order)
+
+    def fetch_order(self, id: str, symbol: str = None, params: Dict = None) -> Dict:
+        self._network('fetch_order')
+        with self._lock:
+            self._match_orders(symbol)
+            if id not in self._orders:
+                raise ccxt.OrderNotFound(f"mock has no order {id}")
+            return dict(self._orders[id])
+
+    def fetch_open_orders(self, symbol: str = None, since: int = None, limit: int = None,
+                          params: Dict = None) -> List[Dict]:
+        self._network('fetch_open_orders')
+        with self._lock:
+            self._match_orders(symbol)
+            return [dict(order) for order in self._orders.values()
+                    if order['status'] == 'open' and (symbol is None or order['symbol'] == symbol)][:limit]
+
+    def close(self):
+        """Nothing to release (ccxt API compatibility)"""
+
+
+def create_mock_exchange(symbols: Optional[List[str]] = None) -> MockExchange:
+    """MockExchange configured from the MOCK_* settings"""
+    config = Config()
+    return MockExchange(
+        symbols or config.MOCK_SYMBOLS,
+        model=config.MOCK_PRICE_MODEL,
+        latency_ms=config.MOCK_LATENCY_MS,
+        error_rate=config.MOCK_ERROR_RATE,
+        seed=config.MOCK_SEED,
+        balance=config.MOCK_BALANCE_USDT,
+        history_days=config.MOCK_HISTORY_DAYS
+    )
@@ -0,0 +1,378 @@
+import logging
+from functools import lru_cache
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher import as_frame
+from src.indicator_graph import IndicatorGraph
+from src.rolling_extremes import rolling_max, rolling_min
+
+logger = logging.getLogger(__name__)
+
+# Same order as TechnicalIndicators.add_all_indicators adds them
+COLUMNS = (
+    'sma_20', 'sma_50', 'sma_200', 'ema_9', 'ema_21', 'ema_55',
+    'macd', 'macd_signal', 'macd_diff', 'adx', 'adx_pos', 'adx_neg',
+    'rsi', 'stoch_k', 'stoch_d', 'roc', 'williams_r',
+    'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_percent', 'atr',
+    'obv', 'vwap', 'volume_sma',
+    'price_momentum_5', 'price_momentum_10', 'price_momentum_20', 'volatility_20',
+    'higher_high', 'lower_low', 'support', 'resistance', 'trend_strength'
+)
+
+ADX_WINDOW = 14
+ATR_WINDOW = 14
+
+# Block length of the linear recurrence scan
+SCAN_BLOCK = 128
+
+
+@lru_cache(maxsize=32)
+def _decay_matrix(decay: float) -> np.ndarray:
+    """M[j, i] = decay ** (j - i) for i <= j, 0 above the diagonal"""
+    steps = np.arange(SCAN_BLOCK)
+    powers = steps[:, None] - steps[None, :]
+    return np.where(powers >= 0, decay ** np.maximum(powers, 0), 0.0)
+
+
+def _scan(inputs: np.ndarray, decay: float, initial) -> np.ndarray:
+    """
+    y[j] = decay * y[j - 1] + inputs[j] along the last axis, with y[-1] = initial
+
+    EMA, Wilder smoothing, ATR and ADX are all this recurrence. Blocks of
+    SCAN_BLOCK values are solved at once with a matrix product and only the
+    block ends are carried in Python, so the cost is a few matrix products
+    instead of a Python step per bar. `initial` is a scalar or one value per
+    row of a (symbols, bars) array.
+    """
+    rows, size = inputs.shape[:-1], inputs.shape[-1]
+    if size == 0:
+        return np.empty(inputs.shape)
+    blocks = -(-size // SCAN_BLOCK)
+    padded = np.zeros(rows + (blocks * SCAN_BLOCK,))
+    padded[..., :size] = inputs
+    local = padded.reshape(rows + (blocks, SCAN_BLOCK)) @ _decay_matrix(decay).T
+    carry = decay ** np.arange(1, SCAN_BLOCK + 1)
+
+    starts = np.empty(rows + (blocks,))
+    previous = initial
+    block_decay = carry[-1]
+    for block in range(blocks):
+        starts[..., block] = previous
+        previous = local[..., block, -1] + block_decay * previous
+    return (local + starts[..., None] * carry).reshape(rows + (-1,))[..., :size]
+
+
+def _ewm(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    pandas ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean() along the last axis
+
+    For values with leading NaNs only, their number may differ between rows.
+    """
+    size = values.shape[-1]
+    if size == 0:
+        return np.empty(values.shape)
+    steps = np.arange(size)
+    first = np.argmin(np.isnan(values), axis=-1)[..., None]  # First valid value of each row
+    # The first valid value seeds the average as it is, the leading NaNs add nothing
+    inputs = np.where(steps < first, 0.0, np.where(steps == first, values, alpha * values))
+    result = _scan(inputs, 1.0 - alpha, 0.0)
+    result[steps < first + min_periods - 1] = np.nan
+    return result
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    return _ewm(values, 2.0 / (span + 1), span)
+
+
+def _aligned(values: np.ndarray, window: int, reduced: np.ndarray) -> np.ndarray:
+    """Window results (one per full window) aligned to the window end, NaN before"""
+    result = np.full(values.shape, np.nan)
+    result[..., window - 1:] = reduced
+    return result
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    pandas rolling(window).sum()
+
+    Sums over spans of 1, 2, 4 ... values are built by doubling and the
+    window is split into the spans of its binary representation, so every
+    result adds O(log window) partial sums of nearby values (no drift from a
+    running cumulative sum over the whole history) and NaN propagates.
+    """
+    size = values.shape[-1]
+    if size < window:
+        return np.full(values.shape, np.nan)
+    count = size - window + 1
+    total, covered = None, 0
+    sums, span, remaining = values, 1, window
+    while True:
+        if remaining & 1:
+            start = window - covered - span
+            part = sums[..., start:start + count]
+            total = part if total is None else total + part
+            covered += span
+        remaining >>= 1
+        if not remaining:
+            break
+        sums = sums[..., span:] + sums[..., :-span]
+        span *= 2
+    return _aligned(values, window, total)
+
+
+def _rolling_std(values: np.ndarray, window: int, ddof: int) -> np.ndarray:
+    """pandas rolling(window).std(ddof), two-pass over the window offsets"""
+    size = values.shape[-1]
+    if size < window:
+        return np.full(values.shape, np.nan)
+    count = size - window + 1
+    means = _rolling_sum(values, window)[..., window - 1:] / window
+    squares = np.zeros(means.shape)
+    for offset in range(window):
+        squares += (values[..., offset:offset + count] - means) ** 2
+    return _aligned(values, window, np.sqrt(squares / (window - ddof)))
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    result = np.full(values.shape, np.nan)
+    size = values.shape[-1]
+    if periods < size:
+        result[..., periods:] = values[..., :size - periods]
+    return result
+
+
+def _wilder_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """ta's ADX sums: total of bars 1..window at bar `window`, then s - s / window + x (NaN before)"""
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] > window:
+        result[..., window] = values[..., 1:window + 1].sum(axis=-1)
+        result[..., window + 1:] = _scan(values[..., window + 1:], 1.0 - 1.0 / window, result[..., window])
+    return result
+
+
+# Nodes are registered in dependency order: intermediates (previous close, true range, 14-bar
+# high/low) are nodes of their own, computed once for every indicator reading them
+GRAPH = IndicatorGraph()
+
+
+@GRAPH.node(('close',), ('previous_close',))
+def _previous_close(close):
+    return _shift(close, 1)
+
+
+@GRAPH.node(('high', 'low', 'previous_close'), ('true_range',))
+def _true_range(high, low, previous_close):
+    # max(h, pc) - min(l, pc) is the largest of the three ranges (h - l on the first bar),
+    # the same values ta uses for ATR and ADX
+    return np.fmax(high, previous_close) - np.fmin(low, previous_close)
+
+
+@GRAPH.node(('high',), ('high_14',))
+def _high_14(high):
+    return rolling_max(high, 14)
+
+
+@GRAPH.node(('low',), ('low_14',))
+def _low_14(low):
+    return rolling_min(low, 14)
+
+
+# Trend
+@GRAPH.node(('close',), ('sma_20',))
+def _sma_20(close):
+    return _rolling_sum(close, 20) / 20
+
+
+@GRAPH.node(('close',), ('sma_50',))
+def _sma_50(close):
+    return _rolling_sum(close, 50) / 50
+
+
+@GRAPH.node(('close',), ('sma_200',))
+def _sma_200(close):
+    return _rolling_sum(close, 200) / 200
+
+
+@GRAPH.node(('close',), ('ema_9',))
+def _ema_9(close):
+    return _ema(close, 9)
+
+
+@GRAPH.node(('close',), ('ema_21',))
+def _ema_21(close):
+    return _ema(close, 21)
+
+
+@GRAPH.node(('close',), ('ema_55',))
+def _ema_55(close):
+    return _ema(close, 55)
+
+
+@GRAPH.node(('close',), ('macd', 'macd_signal', 'macd_diff'))
+def _macd(close):
+    macd = _ema(close, 12) - _ema(close, 26)
+    signal = _ema(macd, 9)
+    return macd, signal, macd - signal
+
+
+@GRAPH.node(('high', 'low', 'true_range'), ('adx', 'adx_pos', 'adx_neg'))
+def _adx(high, low, true_range):
+    """ta's ADX, left out below 2 * ADX_WINDOW bars like the ta backend"""
+    size, w = high.shape[-1], ADX_WINDOW
+    if size < 2 * w:
+        logger.debug(f"ADX needs {2 * w} bars, got {size}")
+        return None
+    up = high - _shift(high, 1)
+    down = _shift(low, 1) - low
+    positive = np.where((up > down) & (up > 0), up, 0.0)
+    negative = np.where((down > up) & (down > 0), down, 0.0)
+    range_sums = _wilder_sums(true_range, w)[..., w:]
+    di_pos = np.where(range_sums != 0, 100 * (_wilder_sums(positive, w)[..., w:] / range_sums), 0.0)
+    di_neg = np.where(range_sums != 0, 100 * (_wilder_sums(negative, w)[..., w:] / range_sums), 0.0)
+    di_total = di_pos + di_neg
+    dx = np.where(di_total != 0, 100 * np.abs((di_pos - di_neg) / di_total), 0.0)
+    adx = np.zeros(high.shape)
+    adx[..., 2 * w - 1] = dx[..., :w].mean(axis=-1)
+    adx[..., 2 * w:] = _scan(dx[..., w:] / w, (w - 1) / float(w), adx[..., 2 * w - 1])
+    leading = np.zeros(high.shape[:-1] + (w + 1,))
+    return (adx, np.concatenate((leading, di_pos[..., 1:]), axis=-1),
+            np.concatenate((leading, di_neg[..., 1:]), axis=-1))
+
+
+# Momentum
+@GRAPH.node(('close', 'previous_close'), ('rsi',))
+def _rsi(close, previous_close):
+    change = np.nan_to_num(close - previous_close)
+    gains = _ewm(np.where(change > 0, change, 0.0), 1.0 / 14, 14)
+    losses = _ewm(np.where(change < 0, -change, 0.0), 1.0 / 14, 14)
+    return np.where(losses == 0, 100, 100 - (100 / (1 + gains / losses)))
+
+
+@GRAPH.node(('close', 'high_14', 'low_14'), ('stoch_k', 'stoch_d'))
+def _stochastic(close, high_14, low_14):
+    stoch_k = 100 * (close - low_14) / (high_14 - low_14)
+    return stoch_k, _rolling_sum(stoch_k, 3) / 3
+
+
+@GRAPH.node(('close',), ('roc',))
+def _roc(close):
+    close_12 = _shift(close, 12)
+    return ((close - close_12) / close_12) * 100
+
+
+@GRAPH.node(('close', 'high_14', 'low_14'), ('williams_r',))
+def _williams_r(close, high_14, low_14):
+    return (high_14 - close) / (high_14 - low_14) * -100
+
+
+# Volatility
+@GRAPH.node(('close', 'sma_20'), ('bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_percent'))
+def _bollinger(close, sma_20):
+    std = _rolling_std(close, 20, ddof=0)
+    upper = sma_20 + 2 * std
+    lower = sma_20 - 2 * std
+    width = ((upper - lower) / sma_20) * 100
+    percent = (close - lower) / np.where(upper != lower, upper - lower, np.nan)
+    return upper, sma_20, lower, width, percent
+
+
+@GRAPH.node(('true_range',), ('atr',))
+def _atr(true_range):
+    """ta's ATR, left out below ATR_WINDOW bars like the ta backend"""
+    size, w = true_range.shape[-1], ATR_WINDOW
+    if size < w:
+        logger.debug(f"ATR needs {w} bars, got {size}")
+        return None
+    atr = np.zeros(true_range.shape)
+    atr[..., w - 1] = true_range[..., :w].mean(axis=-1)
+    atr[..., w:] = _scan(true_range[..., w:] / w, (w - 1) / float(w), atr[..., w - 1])
+    return atr
+
+
+# Volume
+@GRAPH.node(('close', 'previous_close', 'volume'), ('obv',))
+def _obv(close, previous_close, volume):
+    return np.cumsum(np.where(close < previous_close, -volume, volume), axis=-1)
+
+
+@GRAPH.node(('high', 'low', 'close', 'volume'), ('vwap',))
+def _vwap(high, low, close, volume):
+    typical_price = (high + low + close) / 3.0
+    return _rolling_sum(typical_price * volume, 14) / _rolling_sum(volume, 14)
+
+
+@GRAPH.node(('volume',), ('volume_sma',))
+def _volume_sma(volume):
+    return _rolling_sum(volume, 20) / 20
+
+
+# Custom
+@GRAPH.node(('close',), ('price_momentum_5', 'price_momentum_10', 'price_momentum_20'))
+def _price_momentum(close):
+    return tuple(close / _shift(close, periods) - 1 for periods in (5, 10, 20))
+
+
+@GRAPH.node(('close', 'previous_close'), ('volatility_20',))
+def _volatility_20(close, previous_close):
+    return _rolling_std(close / previous_close - 1, 20, ddof=1)
+
+
+@GRAPH.node(('high',), ('higher_high',))
+def _higher_high(high):
+    return (high > _shift(high, 1)).astype(int)
+
+
+@GRAPH.node(('low',), ('lower_low',))
+def _lower_low(low):
+    return (low < _shift(low, 1)).astype(int)
+
+
+@GRAPH.node(('low',), ('support',))
+def _support(low):
+    return rolling_min(low, 20)
+
+
+@GRAPH.node(('high',), ('resistance',))
+def _resistance(high):
+    return rolling_max(high, 20)
+
+
+@GRAPH.node(('close', 'sma_20'), ('trend_strength',))
+def _trend_strength(close, sma_20):
+    return np.abs(close - sma_20) / sma_20 * 100
+
+
+def indicator_arrays(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                     columns: Sequence[str] = COLUMNS) -> Dict[str, np.ndarray]:
+    """
+    Indicator columns from float64 arrays, in the order of `columns`
+
+    The arrays are one series (bars,) or a panel (symbols, bars) of series of
+    the same length; indicators run along the last axis, so a whole panel is
+    computed with one call per node instead of one per symbol.
+    Only the graph nodes the requested columns depend on are evaluated. Like
+    the ta backend, ADX columns are left out below 2 * ADX_WINDOW bars and
+    ATR below ATR_WINDOW bars.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return GRAPH.evaluate({'high': high, 'low': low, 'close': close, 'volume': volume}, columns)
+
+
+def add_indicators(df: pd.DataFrame, columns: Sequence[str] = COLUMNS) -> pd.DataFrame:
+    """`columns` (default: all add_all_indicators columns) computed from NumPy arrays"""
+    df = as_frame(df)
+    arrays = [df[column].to_numpy(dtype=np.float64) for column in ('high', 'low', 'close', 'volume')]
+    indicators = indicator_arrays(*arrays, columns=columns)
+    # Recomputing an indicator frame replaces its indicator columns, like the ta backend
+    kept = [column for column in df.columns if column not in indicators]
+    if len(kept) < len(df.columns):
+        df = df[kept]
+    return pd.concat([df, pd.DataFrame(indicators, index=df.index)], axis=1)
+
+
+def add_all_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """TechnicalIndicators.add_all_indicators computed from NumPy arrays"""
+    return add_indicators(df, COLUMNS)
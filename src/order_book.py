@@ -0,0 +1,241 @@
+import threading
+import time
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BPS = 1e-4
+
+
+def _levels(levels: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Split ccxt [price, amount, ...] levels into price and size arrays"""
+    if not len(levels):
+        return np.empty(0), np.empty(0)
+    array = np.asarray([level[:2] for level in levels], dtype=np.float64)
+    return array[:, 0], array[:, 1]
+
+
+class OrderBook:
+    """
+    Local L2 order book for one symbol
+
+    Bids and asks are kept best level first in sorted NumPy arrays (bids by
+    descending, asks by ascending price), so the depth queries below are a
+    cumsum and a searchsorted away instead of Python loops over level lists.
+    A snapshot replaces a side; a diff sets the size of each given price and
+    removes levels whose new size is zero, as exchange depth streams do.
+    """
+
+    def __init__(self, symbol: str, max_depth: int = None):
+        self.symbol = symbol
+        self.max_depth = max_depth
+        self.bid_prices = np.empty(0)
+        self.bid_sizes = np.empty(0)
+        self.ask_prices = np.empty(0)
+        self.ask_sizes = np.empty(0)
+        self.timestamp = None
+        self.nonce = None
+        self.updated = None  # time.monotonic() of the last snapshot or diff
+        self.venue = None  # Exchange the last snapshot came from
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_ccxt(cls, symbol: str, order_book: Dict, max_depth: int = None) -> 'OrderBook':
+        """Book built from a ccxt fetch_order_book result"""
+        book = cls(symbol, max_depth)
+        book.apply_snapshot(order_book['bids'], order_book['asks'],
+                            order_book.get('timestamp'), order_book.get('nonce'))
+        return book
+
+    def __len__(self) -> int:
+        return len(self.bid_prices) + len(self.ask_prices)
+
+    @property
+    def empty(self) -> bool:
+        return not len(self.bid_prices) or not len(self.ask_prices)
+
+    def apply_snapshot(self, bids: Sequence, asks: Sequence, timestamp: int = None, nonce: int = None,
+                       venue: str = None):
+        """Replace both sides with a full snapshot (from exchange `venue`)"""
+        bid_prices, bid_sizes = _levels(bids)
+        ask_prices, ask_sizes = _levels(asks)
+        with self._lock:
+            self.bid_prices, self.bid_sizes = self._merge(np.empty(0), np.empty(0), bid_prices, bid_sizes, True)
+            self.ask_prices, self.ask_sizes = self._merge(np.empty(0), np.empty(0), ask_prices, ask_sizes, False)
+            self.timestamp = timestamp
+            self.nonce = nonce
+            self.venue = venue
+            self.updated = time.monotonic()
+
+    def apply_diff(self, bids: Sequence = (), asks: Sequence = (), timestamp: int = None, nonce: int = None) -> bool:
+        """
+        Apply incremental level updates (size 0 removes the level)
+
+        Returns:
+            False if the update is older than the book (nonce already applied)
+        """
+        bid_prices, bid_sizes = _levels(bids)
+        ask_prices, ask_sizes = _levels(asks)
+        with self._lock:
+            if nonce is not None and self.nonce is not None and nonce <= self.nonce:
+                return False
+            if len(bid_prices):
+                self.bid_prices, self.bid_sizes = self._merge(self.bid_prices, self.bid_sizes,
+                                                              bid_prices, bid_sizes, True)
+            if len(ask_prices):
+                self.ask_prices, self.ask_sizes = self._merge(self.ask_prices, self.ask_sizes,
+                                                              ask_prices, ask_sizes, False)
+            if timestamp is not None:
+                self.timestamp = timestamp
+            if nonce is not None:
+                self.nonce = nonce
+            self.updated = time.monotonic()
+            return True
+
+    def _merge(self, prices: np.ndarray, sizes: np.ndarray, new_prices: np.ndarray,
+               new_sizes: np.ndarray, descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Overlay updates on one side and return it sorted best first"""
+        # Updates go first so np.unique keeps them over the old level at the same price
+        keys = np.concatenate([new_prices, prices])
+        if descending:
+            keys = -keys
+        keys, first = np.unique(keys, return_index=True)
+        merged = np.concatenate([new_sizes, sizes])[first]
+        live = merged > 0
+        keys, merged = keys[live], merged[live]
+        if self.max_depth is not None:
+            keys, merged = keys[:self.max_depth], merged[:self.max_depth]
+        return (-keys if descending else keys), merged
+
+    def age(self) -> float:
+        """Seconds since the book was last updated (inf if never)"""
+        return time.monotonic() - self.updated if self.updated is not None else float('inf')
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.empty:
+            return None
+        return (self.bid_prices[0] + self.ask_prices[0]) / 2
+
+    @property
+    def spread_bps(self) -> Optional[float]:
+        if self.empty:
+            return None
+        return (self.ask_prices[0] - self.bid_prices[0]) / self.mid / BPS
+
+    def weighted_mid(self) -> Optional[float]:
+        """Mid price weighted by top-of-book sizes (leans towards the thinner side)"""
+        if self.empty:
+            return None
+        bid, ask = self.bid_prices[0], self.ask_prices[0]
+        bid_size, ask_size = self.bid_sizes[0], self.ask_sizes[0]
+        return float((bid * ask_size + ask * bid_size) / (bid_size + ask_size))
+
+    def _side(self, side: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Prices and sizes of one side, taken together so a concurrent update cannot mix them"""
+        with self._lock:
+            if side in ('bid', 'bids', 'sell'):
+                return self.bid_prices, self.bid_sizes
+            if side in ('ask', 'asks', 'buy'):
+                return self.ask_prices, self.ask_sizes
+        raise ValueError(f"Unknown order book side '{side}'")
+
+    def cumulative_depth(self, side: str, notional: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Running total of size (or quote notional) from the best level outwards
+
+        Args:
+            side: 'bids' / 'sell' or 'asks' / 'buy'
+            notional: Sum price * size instead of size
+
+        Returns:
+            (prices, cumulative amounts), best level first
+        """
+        prices, sizes = self._side(side)
+        return prices, np.cumsum(prices * sizes if notional else sizes)
+
+    def depth_within(self, bps: float = None) -> Tuple[float, float]:
+        """Total bid and ask size within bps of the mid (whole book if bps is None)"""
+        bid_prices, bid_sizes = self._side('bids')
+        ask_prices, ask_sizes = self._side('asks')
+        if bps is None or not len(bid_prices) or not len(ask_prices):
+            return float(bid_sizes.sum()), float(ask_sizes.sum())
+        mid = (bid_prices[0] + ask_prices[0]) / 2
+        # Bid prices descend, so negate them for searchsorted
+        bid_levels = np.searchsorted(-bid_prices, -mid * (1 - bps * BPS), side='right')
+        ask_levels = np.searchsorted(ask_prices, mid * (1 + bps * BPS), side='right')
+        return float(bid_sizes[:bid_levels].sum()), float(ask_sizes[:ask_levels].sum())
+
+    def imbalance(self, bps: float = None) -> float:
+        """(bid size - ask size) / total within bps of the mid, from -1 (all asks) to 1 (all bids)"""
+        bid_size, ask_size = self.depth_within(bps)
+        total = bid_size + ask_size
+        return (bid_size - ask_size) / total if total > 0 else 0.0
+
+    def fill_price(self, side: str, notional: float = None, amount: float = None) -> Optional[float]:
+        """
+        Average price of a market order walking the book
+
+        Args:
+            side: 'buy' (takes asks) or 'sell' (takes bids)
+            notional: Order size in quote currency
+            amount: Order size in base currency (instead of notional)
+
+        Returns:
+            Volume-weighted fill price, or None if the book is too thin
+        """
+        if (notional is None) == (amount is None):
+            raise ValueError("Pass exactly one of notional or amount")
+        prices, sizes = self._side(side)
+        if amount is not None:
+            target, filled = amount, np.cumsum(sizes)
+        else:
+            target, filled = notional, np.cumsum(prices * sizes)
+        if not len(filled) or filled[-1] < target:
+            return None
+        if target <= 0:
+            return float(prices[0])
+
+        # Whole levels before the last one touched, then a partial fill of it
+        last = int(np.searchsorted(filled, target, side='left'))
+        base_filled = sizes[:last].sum()
+        quote_spent = (prices[:last] * sizes[:last]).sum()
+        remaining = target - (filled[last - 1] if last else 0.0)
+        if amount is not None:
+            base_filled += remaining
+            quote_spent += remaining * prices[last]
+        else:
+            base_filled += remaining / prices[last]
+            quote_spent += remaining
+        return float(quote_spent / base_filled)
+
+    def slippage_bps(self, side: str, notional: float = None, amount: float = None) -> Optional[float]:
+        """Cost of a market order versus the mid in basis points (None if the book is too thin)"""
+        price = self.fill_price(side, notional=notional, amount=amount)
+        if price is None or self.empty:
+            return None
+        mid = self.mid
+        return float((price - mid) / mid / BPS if side == 'buy' else (mid - price) / mid / BPS)
+
+    def to_dict(self, limit: int = None) -> Dict:
+        """Levels as the lists returned by MarketDataFetcher.get_order_book"""
+        return {
+            'bids': np.column_stack([self.bid_prices[:limit], self.bid_sizes[:limit]]).tolist(),
+            'asks': np.column_stack([self.ask_prices[:limit], self.ask_sizes[:limit]]).tolist(),
+            'timestamp': self.timestamp
+        }
+
+    def __repr__(self) -> str:
+        return (f"OrderBook({self.symbol}, bid={self.best_bid}, ask={self.best_ask}, "
+                f"levels={len(self.bid_prices)}/{len(self.ask_prices)})")
@@ -0,0 +1,121 @@
+import threading
+import time
+import logging
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight:
+    """A load that other callers can wait on instead of issuing their own request"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+
+
+class QuoteCache:
+    """
+    Short-lived cache for tickers and last prices
+
+    Values are served from memory for ttl_seconds. While a key is being
+    loaded, concurrent callers asking for the same key wait for that load
+    instead of sending an identical request to the exchange, so the number
+    of exchange calls does not grow with the number of dashboard tabs.
+    Failed loads (None) are never cached.
+    """
+
+    def __init__(self, ttl_seconds: float = 3.0, wait_timeout: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, tuple] = {}  # key -> (expires_at, value)
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, load: Callable[[], object]):
+        """Cached value for key, calling load() on a miss"""
+        return self.get_many([key], lambda keys: {key: load()}).get(key)
+
+    def get_many(self, keys: Iterable[Hashable], load: Callable[[list], Dict]) -> Dict:
+        """
+        Cached values for many keys, loading all misses with a single call
+
+        Args:
+            keys: Keys to look up
+            load: Called once with the list of keys that are neither cached nor
+                  already being loaded, returns a dict of key -> value
+
+        Returns:
+            Dict of key -> value for every key that could be resolved
+        """
+        results = {}
+        waiting = {}
+        owned = []
+
+        now = time.monotonic()
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    results[key] = entry[1]
+                    self.hits += 1
+                elif key in self._in_flight:
+                    waiting[key] = self._in_flight[key]
+                    self.coalesced += 1
+                else:
+                    self._in_flight[key] = _InFlight()
+                    owned.append(key)
+                    self.misses += 1
+
+        if owned:
+            loaded = {}
+            try:
+                loaded = load(owned) or {}
+            finally:
+                self._complete(owned, loaded)
+            results.update({key: loaded[key] for key in owned if loaded.get(key) is not None})
+
+        for key, flight in waiting.items():
+            if not flight.event.wait(self.wait_timeout):
+                logger.warning(f"Timed out waiting for in-flight quote {key}")
+            if flight.value is not None:
+                results[key] = flight.value
+
+        return results
+
+    def _complete(self, keys: list, loaded: Dict):
+        """Store loaded values and release callers waiting on them"""
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                value = loaded.get(key)
+                if value is not None:
+                    self._entries[key] = (expires_at, value)
+                flight = self._in_flight.pop(key)
+                flight.value = value
+                flight.event.set()
+
+    def invalidate(self, keys: Optional[Iterable[Hashable]] = None):
+        """Drop cached values (all of them when keys is None)"""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+            else:
+                for key in keys:
+                    self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Hit / miss / coalesce counters"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'ttl_seconds': self.ttl_seconds,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0
+            }
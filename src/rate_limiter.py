@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Who is waiting for the exchange (lower value is served first)"""
+    ORDER = 0       # Order placement and cancellation
+    EXIT = 1        # Stop loss / take profit price checks
+    ANALYSIS = 2    # Candles, order books and trades for signals
+    DASHBOARD = 3   # Web dashboard reads
+
+
+_current_priority = contextvars.ContextVar('request_priority', default=Priority.ANALYSIS)
+
+
+def current_priority() -> Priority:
+    """Priority of exchange calls made from the current thread / task"""
+    return _current_priority.get()
+
+
+def set_priority(priority: Priority):
+    """Set the priority for all later exchange calls of the current thread / task"""
+    _current_priority.set(priority)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Run exchange calls inside the block at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class RateLimiter:
+    """
+    Weighted token bucket shared by every caller of one exchange
+
+    Each call spends its endpoint's request weight from a budget that refills
+    at the exchange's published per-minute limit. Calls that cannot be served
+    yet wait in a queue ordered by priority (orders, then exit checks, then
+    analysis, then the dashboard) and arrival, so low-priority readers never
+    delay an order and nobody sleeps when there is headroom.
+    """
+
+    # Request weight budget per minute, in Binance weight units
+    EXCHANGE_LIMITS = {
+        'binance': 6000,
+        'kucoin': 4000,
+        'okx': 1200,
+        'bybit': 7200,
+        'kraken': 120,
+        'mock': 1_000_000,  # Synthetic exchange, limit with RATE_LIMIT_WEIGHT_PER_MINUTE to simulate one
+    }
+    DEFAULT_LIMIT = 1200
+
+    # Request weight per ccxt method (Binance's published weights)
+    ENDPOINT_WEIGHTS = {
+        'fetch_ohlcv': 2,
+        'fetch_ticker': 2,
+        'fetch_tickers': 40,
+        'fetch_order_book': 5,
+        'fetch_trades': 25,
+        'fetch_balance': 20,
+        'fetch_open_orders': 6,
+        'create_market_order': 1,
+        'create_limit_order': 1,
+        'create_test_order': 1,
+        'cancel_order': 1,
+    }
+    DEFAULT_WEIGHT = 1
+
+    # Burst allowance: how many seconds of budget can be spent at once
+    BURST_SECONDS = 10
+
+    # Pause after the exchange reports a rate limit violation
+    PENALTY_SECONDS = 5
+
+    def __init__(self, weight_per_minute: float, burst_seconds: float = None):
+        self.weight_per_minute = weight_per_minute
+        self.refill_per_second = weight_per_minute / 60
+        self.capacity = self.refill_per_second * (burst_seconds or self.BURST_SECONDS)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.granted = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.penalties = 0
+
+    @classmethod
+    def for_exchange(cls, exchange_id: str, weight_per_minute: float = None) -> 'RateLimiter':
+        """Limiter using the published budget of exchange_id (unless overridden)"""
+        return cls(weight_per_minute or cls.EXCHANGE_LIMITS.get(exchange_id, cls.DEFAULT_LIMIT))
+
+    def weight(self, method: str) -> float:
+        """Request weight of a ccxt method"""
+        return self.ENDPOINT_WEIGHTS.get(method, self.DEFAULT_WEIGHT)
+
+    def acquire(self, weight: float = 1, priority: Priority = None) -> float:
+        """
+        Block until weight can be spent, serving higher priorities first
+
+        Returns:
+            Seconds spent waiting
+        """
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(weight, priority)
+            granted = False
+            try:
+                while True:
+                    delay = self._try_grant(ticket)
+                    if delay == 0:
+                        granted = True
+                        self._condition.notify_all()
+                        break
+                    # None: not first in line, the head's grant (or withdrawal) wakes us
+                    self._condition.wait(delay)
+            finally:
+                if not granted:
+                    # Interrupted (KeyboardInterrupt, timeout...): leave the queue so later waiters can go
+                    self._withdraw(ticket)
+        return self._record_wait(started)
+
+    async def acquire_async(self, weight: float = 1, priority: Priority = None) -> float:
+        """acquire() for asyncio callers (waits without blocking the event loop)"""
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(weight, priority)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._try_grant(ticket)
+                    if delay == 0:
+                        self._condition.notify_all()
+                        break
+                await asyncio.sleep(0.05 if delay is None else min(delay, 0.05))
+        except BaseException:
+            with self._condition:
+                self._withdraw(ticket)
+            raise
+        return self._record_wait(started)
+
+    def penalize(self, seconds: float = None):
+        """The exchange rejected a call for exceeding its limit: empty the bucket and pause"""
+        with self._condition:
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + (seconds or self.PENALTY_SECONDS))
+            self.penalties += 1
+        logger.warning(f"Rate limit hit, pausing exchange calls for {seconds or self.PENALTY_SECONDS}s")
+
+    def _enqueue(self, weight: float, priority: Priority) -> list:
+        if priority is None:
+            priority = current_priority()
+        ticket = [int(priority), next(self._sequence), min(weight, self.capacity)]
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _withdraw(self, ticket: list):
+        """Remove a ticket that will not be granted and wake the waiters behind it"""
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        self._condition.notify_all()
+
+    def _try_grant(self, ticket: list) -> Optional[float]:
+        """
+        Grant ticket if it is first in line and affordable, else return seconds to wait
+
+        None means the head of the queue can go now: wait until its grant
+        notifies the condition instead of polling.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+        if now < self._paused_until:
+            return self._paused_until - now
+        head = self._queue[0]
+        if self._tokens < head[2]:
+            return (head[2] - self._tokens) / self.refill_per_second
+        if head is not ticket:
+            # Head can go now and will wake us when it does
+            return None
+        heapq.heappop(self._queue)
+        self._tokens -= ticket[2]
+        return 0
+
+    def _record_wait(self, started: float) -> float:
+        waited = time.monotonic() - started
+        with self._condition:
+            self.granted += 1
+            if waited > 0.001:
+                self.waited += 1
+                self.wait_seconds += waited
+        return waited
+
+    def stats(self) -> Dict:
+        """Budget, queue depth and wait counters"""
+        with self._condition:
+            return {
+                'weight_per_minute': self.weight_per_minute,
+                'available_weight': round(self._tokens, 1),
+                'queued': len(self._queue),
+                'granted': self.granted,
+                'waited': self.waited,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'penalties': self.penalties
+            }
@@ -0,0 +1,189 @@
+import logging
+from typing import Dict, List, Optional, Union
+
+import ccxt
+import numpy as np
+
+from src.data_fetcher import Candles
+from src.market_state import CandleRing
+
+logger = logging.getLogger(__name__)
+
+WEEK_MS = 7 * 24 * 60 * 60 * 1000
+# Exchanges open weekly bars on Monday 00:00 UTC, the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * 24 * 60 * 60 * 1000
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """Bar length of a ccxt timeframe string in milliseconds"""
+    return int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+
+
+def can_resample(base_timeframe: str, timeframe: str) -> bool:
+    """True if timeframe bars are exact unions of base_timeframe bars"""
+    if timeframe[-1] in ('M', 'y') or base_timeframe[-1] in ('M', 'y'):
+        return False  # Calendar months and years have no fixed length
+    base_ms, target_ms = timeframe_ms(base_timeframe), timeframe_ms(timeframe)
+    return target_ms >= base_ms and target_ms % base_ms == 0
+
+
+def bucket_starts(timestamps: np.ndarray, tf_ms: int) -> np.ndarray:
+    """Open time of the bar containing each timestamp, aligned like exchange bars"""
+    offset = WEEK_OFFSET_MS if tf_ms % WEEK_MS == 0 else 0
+    return (timestamps - offset) // tf_ms * tf_ms + offset
+
+
+def resample(candles: Candles, timeframe: str, drop_partial: bool = True) -> Candles:
+    """
+    Aggregate candles into a higher timeframe
+
+    Bars are grouped by exchange-aligned bucket (UTC, weeks from Monday):
+    first open, highest high, lowest low, last close and summed volume. The
+    last bar may be incomplete (it is the forming bar); with drop_partial the
+    first bucket is dropped when the input starts after its open time.
+
+    Args:
+        candles: Base candles in ascending order
+        timeframe: Target timeframe (e.g. '1h')
+        drop_partial: Drop a leading bucket that is missing its first base bars
+
+    Returns:
+        Candles of the target timeframe
+    """
+    if candles.empty:
+        return candles
+    tf_ms = timeframe_ms(timeframe)
+    buckets = bucket_starts(candles.timestamps, tf_ms)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if drop_partial and buckets[0] != candles.timestamps[0]:
+        starts = starts[1:]
+        if not len(starts):
+            return Candles.from_ohlcv([])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    values = np.empty((len(Candles.COLUMNS), len(starts)))
+    values[0] = candles.open[starts]
+    values[1] = np.maximum.reduceat(candles.high[starts[0]:], starts - starts[0])
+    values[2] = np.minimum.reduceat(candles.low[starts[0]:], starts - starts[0])
+    values[3] = candles.close[ends]
+    values[4] = np.add.reduceat(candles.volume[starts[0]:], starts - starts[0])
+    return Candles(buckets[starts], values)
+
+
+class _Bucket:
+    """Aggregation state of the forming bar of one target timeframe"""
+
+    __slots__ = ('start', 'closed', 'partial')
+
+    def __init__(self, start: int, partial: bool):
+        self.start = start
+        self.closed = None  # open, high, low, close, volume of the finished base bars
+        self.partial = partial
+
+    def fold(self, bar: np.ndarray):
+        if self.closed is None:
+            self.closed = bar.copy()
+        else:
+            self.closed[1] = max(self.closed[1], bar[1])
+            self.closed[2] = min(self.closed[2], bar[2])
+            self.closed[3] = bar[3]
+            self.closed[4] += bar[4]
+
+    def combine(self, forming: np.ndarray) -> np.ndarray:
+        if self.closed is None:
+            return forming
+        return np.array([self.closed[0], max(self.closed[1], forming[1]), min(self.closed[2], forming[2]),
+                         forming[3], self.closed[4] + forming[4]])
+
+
+class IncrementalResampler:
+    """
+    Keeps higher-timeframe windows up to date as base bars arrive
+
+    The newest base bar is treated as forming: an update with the same
+    timestamp replaces it, and it is folded into its bucket only once a newer
+    base bar shows up. Each target timeframe is held in a CandleRing, so work
+    per update is proportional to the number of new base bars.
+    """
+
+    def __init__(self, base_timeframe: str, timeframes: List[str], capacity: int = 500):
+        for timeframe in timeframes:
+            if not can_resample(base_timeframe, timeframe):
+                raise ValueError(f"Cannot build {timeframe} bars from {base_timeframe} bars")
+        self.base_timeframe = base_timeframe
+        self.timeframes = list(timeframes)
+        self.capacity = capacity
+        self._tf_ms = {tf: timeframe_ms(tf) for tf in self.timeframes}
+        self._rings = {tf: CandleRing(capacity) for tf in self.timeframes}
+        self._buckets: Dict[str, Optional[_Bucket]] = {tf: None for tf in self.timeframes}
+        self._forming_ts = None
+        self._forming = None
+
+    @property
+    def last_base_timestamp(self) -> Optional[int]:
+        return self._forming_ts
+
+    def update(self, candles: Union[Candles, List[list]]) -> int:
+        """
+        Feed base bars (oldest first)
+
+        Returns:
+            Number of new base bars consumed
+        """
+        if not isinstance(candles, Candles):
+            candles = Candles.from_ohlcv(candles)
+        consumed = 0
+        if self._forming_ts is None and len(candles) > 1:
+            # History is aggregated in one vectorized pass, only the newest bar stays forming
+            self._seed(candles[:-1])
+            consumed = len(candles) - 1
+            candles = candles[-1:]
+        for i, timestamp in enumerate(candles.timestamps.tolist()):
+            if self._forming_ts is not None and timestamp < self._forming_ts:
+                continue
+            bar = candles.values[:, i]
+            if timestamp != self._forming_ts:
+                self._advance(timestamp)
+                consumed += 1
+            self._forming_ts = timestamp
+            self._forming = bar.copy()
+            self._emit()
+        return consumed
+
+    def _seed(self, history: Candles):
+        """Load closed base bars in bulk"""
+        last_timestamp = int(history.timestamps[-1])
+        for timeframe in self.timeframes:
+            bars = resample(history, timeframe)
+            self._rings[timeframe].update(bars)
+            start = int(bucket_starts(np.int64(last_timestamp), self._tf_ms[timeframe]))
+            in_bars = len(bars) > 0 and int(bars.timestamps[-1]) == start
+            bucket = _Bucket(start, partial=not in_bars)
+            if in_bars:
+                bucket.closed = bars.values[:, -1].copy()
+            self._buckets[timeframe] = bucket
+        self._forming_ts = last_timestamp
+        self._forming = None  # Already part of the bucket aggregates
+
+    def _advance(self, timestamp: int):
+        """A new base bar opened: fold the previous one and roll finished buckets"""
+        for timeframe, bucket in self._buckets.items():
+            start = int(bucket_starts(np.int64(timestamp), self._tf_ms[timeframe]))
+            if bucket is not None and bucket.start == start:
+                if self._forming is not None:
+                    bucket.fold(self._forming)
+            else:
+                # The very first bucket is incomplete unless the data starts at its open
+                partial = bucket is None and start != timestamp
+                self._buckets[timeframe] = _Bucket(start, partial)
+
+    def _emit(self):
+        for timeframe, bucket in self._buckets.items():
+            if bucket.partial:
+                continue
+            bar = bucket.combine(self._forming)
+            self._rings[timeframe].update(Candles(np.array([bucket.start], dtype=np.int64), bar.reshape(-1, 1)))
+
+    def window(self, timeframe: str, limit: int = None) -> Candles:
+        """Newest bars of a target timeframe (the last one may be forming)"""
+        return self._rings[timeframe].window(limit)
@@ -0,0 +1,320 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# Calls that must not be repeated blindly: a timed out order may still have been placed
+NO_RETRY_PREFIXES = ('create_', 'cancel_', 'edit_')
+
+_attempts = contextvars.ContextVar('retry_attempts', default=None)
+
+
+@contextmanager
+def retry_attempts(attempts: Optional[int]):
+    """
+    Try exchange calls inside the block up to `attempts` times
+
+    None keeps the enclosing block's setting (or the policy default); a
+    nested block can lower the tries of an enclosing one but not raise them.
+    """
+    outer = _attempts.get()
+    if attempts is None or (outer is not None and outer < attempts):
+        attempts = outer
+    token = _attempts.set(attempts)
+    try:
+        yield
+    finally:
+        _attempts.reset(token)
+
+
+class CircuitOpenError(ccxt.ExchangeError):
+    """An exchange endpoint is failing, so the call was rejected without a request"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport-level failures (timeouts, resets, maintenance, rate limits) are worth another try"""
+    return isinstance(error, ccxt.NetworkError)
+
+
+def is_outage(error: Exception) -> bool:
+    """Failures that count against an endpoint's health (rate limits are the limiter's business)"""
+    return isinstance(error, ccxt.NetworkError) and not isinstance(error, ccxt.RateLimitExceeded)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter
+
+    Retry n waits a random time between 0 and min(max_delay, base_delay * 2**n),
+    so clients that failed together do not retry together. A call never
+    waits more than budget_seconds in total across its retries.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0,
+                 budget_seconds: float = 10.0, rng: random.Random = None):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_seconds = budget_seconds
+        self._random = rng or random.Random()
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (0 = first retry)"""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+class CircuitBreaker:
+    """
+    Health of one exchange endpoint
+
+    Closed: calls go through and their outcomes are kept for the last
+    `window` calls. Once at least min_calls are known and the failure share
+    reaches failure_rate, the circuit opens: calls are rejected at once for
+    open_seconds. After that it is half open: one probe call goes through;
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, window: int = 50, min_calls: int = 5, failure_rate: float = 0.5,
+                 open_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.window = window
+        self.min_calls = max(1, min(min_calls, window))
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._state = CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = defaultdict(int)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str):
+        self.transitions[f"{self._state}->{state}"] += 1
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit for {self.name} {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self._clock()
+        self._outcomes.clear()
+        self._probe_started = None
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (counts a rejection if not)"""
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back is replaced after open_seconds
+                now = self._clock()
+                if self._probe_started is None or now - self._probe_started >= self.open_seconds:
+                    self._probe_started = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool):
+        """Outcome of a call that allow() let through"""
+        with self._lock:
+            self.calls += 1
+            self.failures += not ok
+            if self._state == HALF_OPEN:
+                self._transition(CLOSED if ok else OPEN)
+                return
+            if self._state == OPEN:
+                return  # A call from before the circuit opened finished late
+            self._outcomes.append(ok)
+            failed = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failed >= self.failure_rate * len(self._outcomes):
+                self._transition(OPEN)
+
+    def release(self):
+        """A call that allow() let through was abandoned without an outcome"""
+        with self._lock:
+            self._probe_started = None
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+
+    def stats(self) -> Dict:
+        state = self.state
+        with self._lock:
+            recent = len(self._outcomes)
+            return {
+                'state': state,
+                'calls': self.calls,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'recent_failure_rate': round(self._outcomes.count(False) / recent, 3) if recent else 0.0,
+                'transitions': dict(self.transitions)
+            }
+
+
+class ExchangeGuard:
+    """
+    Retries and per-endpoint circuit breakers for the calls to one exchange
+
+    Every ccxt method (endpoint) gets its own CircuitBreaker, so a failing
+    order book endpoint does not stop candle downloads. Network errors are
+    retried after the policy's backoff; other errors (bad symbol, insufficient
+    funds ...) are raised at once. Orders and cancellations are never retried.
+    Synchronous calls (bot cycles, dashboard requests) try once unless the
+    caller asks for more with retry_attempts(), so they never sleep in
+    backoff: a failure is raised at once and the next cycle tries again.
+    While an endpoint's circuit is open, calls to it raise CircuitOpenError
+    without touching the network, so a degraded exchange costs a cycle
+    milliseconds instead of minutes of timeouts and sleeps.
+    """
+
+    def __init__(self, exchange_id: str, policy: RetryPolicy = None, **breaker_settings):
+        self.exchange_id = exchange_id
+        self.policy = policy or RetryPolicy()
+        self._breaker_settings = breaker_settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.retry_wait_seconds = 0.0
+        self.exhausted = 0
+
+    @classmethod
+    def from_config(cls, exchange_id: str) -> 'ExchangeGuard':
+        """Guard using the RETRY_* and CIRCUIT_* settings"""
+        from config import Config
+        policy = RetryPolicy(Config.RETRY_ATTEMPTS, Config.RETRY_BASE_DELAY_MS / 1000,
+                             Config.RETRY_MAX_DELAY_MS / 1000, Config.RETRY_BUDGET_SECONDS)
+        return cls(exchange_id, policy, window=Config.CIRCUIT_WINDOW_CALLS, min_calls=Config.CIRCUIT_MIN_CALLS,
+                   failure_rate=Config.CIRCUIT_FAILURE_RATE, open_seconds=Config.CIRCUIT_OPEN_SECONDS)
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(f"{self.exchange_id}.{endpoint}", **self._breaker_settings)
+            return self._breakers[endpoint]
+
+    def _attempts(self, endpoint: str, attempts: Optional[int], default: int) -> int:
+        if endpoint.startswith(NO_RETRY_PREFIXES):
+            return 1
+        return max(1, attempts or _attempts.get() or default)
+
+    def _admit(self, endpoint: str, breaker: CircuitBreaker):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.exchange_id} {endpoint} is failing, "
+                                   f"circuit open for another {breaker.retry_after():.0f}s")
+
+    def _backoff(self, endpoint: str, error: Exception, attempt: int, attempts: int,
+                 deadline: float) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up and raise"""
+        if not is_retryable(error):
+            return None
+        delay = self.policy.delay(attempt)
+        if attempt + 1 >= attempts or time.monotonic() + delay > deadline:
+            with self._lock:
+                self.exhausted += 1
+            return None
+        with self._lock:
+            self.retries += 1
+            self.retry_wait_seconds += delay
+        logger.warning(f"{self.exchange_id} {endpoint} failed ({type(error).__name__}), "
+                       f"retry {attempt + 1}/{attempts - 1} in {delay:.2f}s")
+        return delay
+
+    def call(self, endpoint: str, function: Callable[[], object], attempts: int = None):
+        """
+        Run function() (one request to endpoint)
+
+        Tried once by default, so the calling thread never waits in backoff.
+        Callers that can afford to wait (offline jobs) ask for retries with
+        retry_attempts(n) or `attempts`; those backoffs sleep the thread, up
+        to the policy's budget_seconds per call.
+
+        Args:
+            endpoint: ccxt method name, selects the circuit breaker
+            function: Makes the request
+            attempts: Tries in total, defaults to retry_attempts() or 1
+
+        Raises:
+            CircuitOpenError: The endpoint's circuit is open
+        """
+        attempts = self._attempts(endpoint, attempts, 1)
+        breaker = self.breaker(endpoint)
+        deadline = time.monotonic() + self.policy.budget_seconds
+        for attempt in range(attempts):
+            self._admit(endpoint, breaker)
+            try:
+                result = function()
+            except Exception as e:
+                breaker.record(not is_outage(e))
+                delay = self._backoff(endpoint, e, attempt, attempts, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            else:
+                breaker.record(True)
+                return result
+
+    async def call_async(self, endpoint: str, function: Callable[[], Awaitable], attempts: int = None):
+        """call() for coroutines, retried per the policy by default (backoff waits without blocking the event loop)"""
+        attempts = self._attempts(endpoint, attempts, self.policy.attempts)
+        breaker = self.breaker(endpoint)
+        deadline = time.monotonic() + self.policy.budget_seconds
+        for attempt in range(attempts):
+            self._admit(endpoint, breaker)
+            try:
+                result = await function()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                breaker.record(not is_outage(e))
+                delay = self._backoff(endpoint, e, attempt, attempts, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                breaker.record(True)
+                return result
+
+    def stats(self) -> Dict:
+        """Retry counters and circuit state per endpoint"""
+        with self._lock:
+            breakers = dict(self._breakers)
+            counters = {
+                'retries': self.retries,
+                'retry_wait_seconds': round(self.retry_wait_seconds, 3),
+                'exhausted': self.exhausted
+            }
+        return {
+            'exchange_id': self.exchange_id,
+            **counters,
+            'open_circuits': sorted(name for name, breaker in breakers.items() if breaker.state != CLOSED),
+            'endpoints': {name: breaker.stats() for name, breaker in breakers.items()}
+        }
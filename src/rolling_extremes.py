@@ -0,0 +1,104 @@
+from collections import deque
+
+import numpy as np
+
+NAN = float('nan')
+
+
+def _rolling_extreme(values: np.ndarray, window: int, maximum: bool) -> np.ndarray:
+    """
+    van Herk/Gil-Werman: the series is cut into blocks of `window` values and
+    every window is covered by the suffix extreme of one block and the prefix
+    extreme of the next, so each value is visited three times whatever the
+    window length.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ufunc = np.maximum if maximum else np.minimum
+    size = values.shape[-1]
+    result = np.full(values.shape, np.nan)
+    if size < window:
+        return result
+    rows, blocks = values.shape[:-1], -(-size // window)
+    # The padding is neutral for the extreme, NaN would spread into the last block's suffixes
+    padded = np.full(rows + (blocks * window,), -np.inf if maximum else np.inf)
+    padded[..., :size] = values
+    padded = padded.reshape(rows + (blocks, window))
+    prefix = ufunc.accumulate(padded, axis=-1).reshape(rows + (-1,))
+    suffix = ufunc.accumulate(padded[..., ::-1], axis=-1)[..., ::-1].reshape(rows + (-1,))
+    result[..., window - 1:] = ufunc(suffix[..., :size - window + 1], prefix[..., window - 1:size])
+    return result
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    pandas rolling(window).max() along the last axis in O(n)
+
+    NaN until the window is full and wherever the window holds a NaN.
+    Works on one series (bars,) or a panel (symbols, bars).
+    """
+    return _rolling_extreme(values, window, maximum=True)
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """pandas rolling(window).min() along the last axis in O(n), see rolling_max()"""
+    return _rolling_extreme(values, window, maximum=False)
+
+
+def window_max(values: np.ndarray, window: int) -> float:
+    """Max of the last `window` values (the newest rolling_max value) in O(window)"""
+    if len(values) < window:
+        return NAN
+    return float(np.max(values[len(values) - window:]))
+
+
+def window_min(values: np.ndarray, window: int) -> float:
+    """Min of the last `window` values (the newest rolling_min value) in O(window)"""
+    if len(values) < window:
+        return NAN
+    return float(np.min(values[len(values) - window:]))
+
+
+class RollingExtreme:
+    """
+    Max (or min) of the last `window` values, one value at a time
+
+    A monotonic deque keeps the values that can still become the extreme,
+    best first, so an update is O(1) amortized and memory is O(window).
+    update(x, commit=False) returns the extreme as if x were the newest value
+    without storing it, for a bar that is still forming. NaN until the
+    window is full, like rolling_max() / rolling_min().
+    """
+
+    def __init__(self, window: int, maximum: bool = True):
+        self.window = window
+        self.maximum = maximum
+        self._deque = deque()  # (index, value), best value first
+        self._count = 0
+
+    def update(self, x: float, commit: bool = True) -> float:
+        count = self._count + 1
+        if commit:
+            if self.maximum:
+                while self._deque and self._deque[-1][1] <= x:
+                    self._deque.pop()
+            else:
+                while self._deque and self._deque[-1][1] >= x:
+                    self._deque.pop()
+            self._deque.append((self._count, x))
+            self._count = count
+            if self._deque[0][0] <= count - 1 - self.window:
+                self._deque.popleft()
+            return self._deque[0][1] if count >= self.window else NAN
+        if count < self.window:
+            return NAN
+        # Without committing: best of x and the committed values still inside the window
+        best = x
+        for index, value in self._deque:
+            if index > count - 1 - self.window:
+                best = max(best, value) if self.maximum else min(best, value)
+                break
+        return best
+
+    def clear(self):
+        self._deque.clear()
+        self._count = 0
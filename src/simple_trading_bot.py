@@ -5,7 +5,12 @@ import threading
 import sys
 from logging.handlers import RotatingFileHandler
 from config import *
-from src.data_fetcher import MarketDataFetcher
+from src.data_fetcher import get_shared_fetcher
+from src.market_feed import create_market_feed
+from src.market_state import get_shared_market_state
+from src.indicator_cache import get_shared_indicator_cache
+from src import indicator_panel
+from src.rate_limiter import Priority, request_priority
 from src.technical_indicators import TechnicalIndicators
 
 # Configure logging with immediate flush and rotation
@@ -39,10 +44,15 @@ logger.info("SimpleTradingBot module loaded")
 logger.info("="*60)
 
 class SimpleTradingBot:
+    # Indicator columns read by get_trading_signal
+    SIGNAL_COLUMNS = ('rsi', 'macd', 'macd_signal', 'bb_upper', 'bb_lower')
+    
     def __init__(self):
         logger.info("Initializing SimpleTradingBot...")
         try:
-            self.data_fetcher = MarketDataFetcher()
+            self.data_fetcher = get_shared_fetcher()
+            self.market_state = get_shared_market_state()
+            self.indicator_cache = get_shared_indicator_cache()
             logger.info("MarketDataFetcher initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize MarketDataFetcher: {e}", exc_info=True)
@@ -59,6 +69,8 @@ class SimpleTradingBot:
         self.trades = []
         self.running = False
         self.thread = None
+        self.feed = None
+        self.lock = threading.RLock()  # Trading cycle and feed callbacks both trade
         self.last_heartbeat = datetime.now()
         logger.info(f"Bot initialized with ${self.capital:.2f} capital")
     
@@ -158,6 +170,17 @@ class SimpleTradingBot:
             position_value = self.capital * POSITION_SIZE_PCT
             amount = position_value / price
             
+            # Skip the trade if the visible book would fill it too far from the mid
+            if Config.MAX_SLIPPAGE_BPS > 0:
+                slippage = self.data_fetcher.estimate_slippage(symbol, 'buy', position_value)
+                if slippage == float('inf'):
+                    logger.info(f"Skipping BUY {symbol}: the visible order book cannot fill ${position_value:.2f}")
+                    return False
+                if slippage is not None and slippage > Config.MAX_SLIPPAGE_BPS:
+                    logger.warning(f"Skipping BUY {symbol}: expected slippage {slippage:.1f} bps "
+                                   f"exceeds {Config.MAX_SLIPPAGE_BPS:.0f} bps")
+                    return False
+            
             # LIVE MODE: Place REAL order on Binance
             if TRADING_MODE == 'live':
                 logger.warning(f"[LIVE] Placing REAL BUY order on Binance for {symbol}")
@@ -326,43 +349,151 @@ class SimpleTradingBot:
             logger.error(f"Error executing sell for {symbol}: {e}", exc_info=True)
             return False
     
+    def get_position_prices(self):
+        """Current price of every open position from one bulk ticker request"""
+        try:
+            return self.data_fetcher.get_last_prices(list(self.positions.keys()))
+        except Exception as e:
+            logger.warning(f"Error fetching position prices: {e}")
+            return {}
+    
     def check_stop_loss_take_profit(self):
         """Check if any positions hit stop loss or take profit"""
         if not self.positions:
             logger.info("No open positions to check")
             return
+        
+        with request_priority(Priority.EXIT):
+            current_prices = self.get_position_prices()
             
         for symbol in list(self.positions.keys()):
             try:
                 # Get current price
-                df = self.data_fetcher.get_ohlcv(symbol, timeframe='1m', limit=1)
-                if df is None or len(df) == 0 or df.empty:
+                if symbol not in current_prices:
                     logger.warning(f"Could not fetch price for {symbol} SL/TP check")
                     continue
                     
-                current_price = df.iloc[-1]['close']
-                position = self.positions[symbol]
-                
-                # Check stop loss
-                if current_price <= position['stop_loss']:
-                    logger.warning(f"STOP LOSS triggered for {symbol} @ ${current_price:.2f}")
-                    self.execute_sell(symbol, current_price)
-                    
-                # Check take profit
-                elif current_price >= position['take_profit']:
-                    logger.info(f"TAKE PROFIT triggered for {symbol} @ ${current_price:.2f}")
-                    self.execute_sell(symbol, current_price)
-                else:
-                    # Log current status
-                    entry_pct = ((current_price - position['entry_price']) / position['entry_price']) * 100
-                    logger.info(f"{symbol}: ${current_price:.2f} ({entry_pct:+.2f}%) | SL: ${position['stop_loss']:.2f} | TP: ${position['take_profit']:.2f}")
-                
-                # Small delay between checks
-                time.sleep(0.3)
+                self.check_exit(symbol, current_prices[symbol], log_status=True)
                     
             except Exception as e:
                 logger.error(f"Error checking SL/TP for {symbol}: {e}", exc_info=True)
     
+    def check_exit(self, symbol, current_price, log_status=False):
+        """Sell a position if current_price hit its stop loss or take profit"""
+        with self.lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return False
+            
+            # Check stop loss
+            if current_price <= position['stop_loss']:
+                logger.warning(f"STOP LOSS triggered for {symbol} @ ${current_price:.2f}")
+                return self.execute_sell(symbol, current_price)
+                
+            # Check take profit
+            elif current_price >= position['take_profit']:
+                logger.info(f"TAKE PROFIT triggered for {symbol} @ ${current_price:.2f}")
+                return self.execute_sell(symbol, current_price)
+            elif log_status:
+                # Log current status
+                entry_pct = ((current_price - position['entry_price']) / position['entry_price']) * 100
+                logger.info(f"{symbol}: ${current_price:.2f} ({entry_pct:+.2f}%) | SL: ${position['stop_loss']:.2f} | TP: ${position['take_profit']:.2f}")
+            return False
+    
+    def analyze_and_trade(self, symbol, df=None):
+        """
+        Fetch 15m candles for a symbol, compute the signal and trade on it
+        
+        df: candles with indicators already computed (indicator_frames()), fetched here when None
+        """
+        # Skip if we already have a position in this symbol
+        if symbol in self.positions:
+            logger.info(f"{symbol}: Already in position, skipping")
+            return
+        
+        # Fetch data with timeout (unless the cycle already computed the indicators)
+        has_indicators = df is not None or Config.STREAMING_INDICATORS
+        if df is None:
+            logger.debug(f"Fetching data for {symbol}...")
+            if Config.STREAMING_INDICATORS:
+                # Candles with indicators, updated incrementally since the last cycle
+                df = self.market_state.indicators(symbol, '15m', limit=100)
+            else:
+                df = self.market_state.refresh(symbol, '15m', limit=100)
+        
+        if len(df) < 50:
+            logger.warning(f"{symbol}: Not enough data (got {len(df)} candles)")
+            return
+        
+        # Add indicators (reused while the candles are unchanged)
+        if not has_indicators:
+            candles = df
+            df = self.indicator_cache.get_or_compute(
+                self.indicator_cache.key(symbol, '15m', candles, 'indicators', self.SIGNAL_COLUMNS),
+                lambda: TechnicalIndicators.add_indicators(candles.to_frame(), self.SIGNAL_COLUMNS))
+        
+        # Get trading signal
+        signal, price = self.get_trading_signal(df, symbol)
+        
+        logger.info(f"{symbol}: Signal={signal}, Price=${price:.2f}, RSI={df.iloc[-1]['rsi']:.1f}")
+        
+        # Execute trades based on signal
+        with self.lock:
+            if signal == 'BUY' and symbol not in self.positions and len(self.positions) < MAX_POSITIONS:
+                self.execute_buy(symbol, price)
+            elif signal == 'SELL' and symbol in self.positions:
+                self.execute_sell(symbol, price)
+    
+    def indicator_frames(self):
+        """
+        Signal indicators of every trading pair as one (symbols, bars) panel
+        
+        Only with INDICATOR_PANELS, otherwise {} and analyze_and_trade computes
+        each pair on its own. Pairs already in a position are skipped by analyze_and_trade.
+        """
+        if not Config.INDICATOR_PANELS:
+            return {}
+        try:
+            pairs = [symbol for symbol in TRADING_PAIRS if symbol not in self.positions]
+            windows = self.market_state.refresh_many(pairs, '15m', limit=100)
+            return indicator_panel.indicator_frames(windows, self.SIGNAL_COLUMNS)
+        except Exception as e:
+            logger.error(f"Error computing indicators: {e}", exc_info=True)
+            return {}
+    
+    def on_ticker(self, event):
+        """Feed callback: stop loss / take profit as soon as a price arrives"""
+        if event['symbol'] in self.positions:
+            self.check_exit(event['symbol'], event['last'])
+    
+    def on_candle_close(self, event):
+        """Feed callback: re-analyze a pair when its 15m candle closes"""
+        if event['symbol'] in TRADING_PAIRS and self.running:
+            logger.info(f"{event['symbol']}: {event['timeframe']} candle closed @ ${event['close']:.2f}")
+            self.market_state.apply_candle(event)
+            try:
+                self.analyze_and_trade(event['symbol'])
+            except Exception as e:
+                logger.error(f"Error analyzing {event['symbol']} on candle close: {e}", exc_info=True)
+    
+    def start_market_feed(self):
+        """Subscribe to the configured market feed (MARKET_FEED)"""
+        try:
+            self.feed = create_market_feed(self.data_fetcher, TRADING_PAIRS, timeframe='15m')
+        except Exception as e:
+            logger.error(f"Could not start market feed, using trading cycle only: {e}")
+            self.feed = None
+        if self.feed is None:
+            return
+        self.feed.on_ticker(self.on_ticker)
+        self.feed.on_candle(self.on_candle_close)
+        self.feed.start()
+    
+    def stop_market_feed(self):
+        feed, self.feed = self.feed, None
+        if feed is not None:
+            feed.stop()
+    
     def trading_cycle(self):
         """Main trading cycle"""
         try:
@@ -379,37 +510,10 @@ class SimpleTradingBot:
             
             # Analyze each trading pair
             logger.info(f"Analyzing {len(TRADING_PAIRS)} trading pairs...")
+            frames = self.indicator_frames()
             for symbol in TRADING_PAIRS:
                 try:
-                    # Skip if we already have a position in this symbol
-                    if symbol in self.positions:
-                        logger.info(f"{symbol}: Already in position, skipping")
-                        continue
-                    
-                    # Fetch data with timeout
-                    logger.debug(f"Fetching data for {symbol}...")
-                    df = self.data_fetcher.get_ohlcv(symbol, timeframe='15m', limit=100)
-                    
-                    if df is None or len(df) < 50 or df.empty:
-                        logger.warning(f"{symbol}: Not enough data (got {len(df) if df is not None else 0} candles)")
-                        continue
-                    
-                    # Add indicators
-                    df = TechnicalIndicators.add_all_indicators(df)
-                    
-                    # Get trading signal
-                    signal, price = self.get_trading_signal(df, symbol)
-                    
-                    logger.info(f"{symbol}: Signal={signal}, Price=${price:.2f}, RSI={df.iloc[-1]['rsi']:.1f}")
-                    
-                    # Execute trades based on signal
-                    if signal == 'BUY' and len(self.positions) < MAX_POSITIONS:
-                        self.execute_buy(symbol, price)
-                    elif signal == 'SELL' and symbol in self.positions:
-                        self.execute_sell(symbol, price)
-                    
-                    # Small delay between pairs to respect rate limits
-                    time.sleep(0.5)
+                    self.analyze_and_trade(symbol, frames.get(symbol))
                         
                 except Exception as e:
                     logger.error(f"Error analyzing {symbol}: {e}", exc_info=True)
@@ -418,15 +522,12 @@ class SimpleTradingBot:
             # Log portfolio status
             logger.info("Calculating portfolio status...")
             total_value = self.capital
-            for symbol, pos in self.positions.items():
-                try:
-                    df = self.data_fetcher.get_ohlcv(symbol, timeframe='1m', limit=1)
-                    if df is not None and len(df) > 0 and not df.empty:
-                        current_price = df.iloc[-1]['close']
-                        total_value += pos['amount'] * current_price
-                except Exception as e:
-                    logger.warning(f"Error getting current price for {symbol}: {e}")
-                    pass
+            current_prices = self.get_position_prices()
+            for symbol, pos in list(self.positions.items()):
+                if symbol in current_prices:
+                    total_value += pos['amount'] * current_prices[symbol]
+                else:
+                    logger.warning(f"Error getting current price for {symbol}")
                     
             profit = total_value - self.initial_capital
             profit_pct = (profit / self.initial_capital) * 100
@@ -460,6 +561,9 @@ class SimpleTradingBot:
         self.running = True
         cycle_count = 0
         
+        # Exit checks and candle-close analysis between cycles come from the market feed
+        self.start_market_feed()
+        
         # Run first cycle immediately with timeout protection
         try:
             logger.info("Starting first trading cycle...")
@@ -493,6 +597,7 @@ class SimpleTradingBot:
                 logger.info("Waiting 60 seconds before next attempt...")
                 time.sleep(60)
         
+        self.stop_market_feed()
         logger.info("Bot has been stopped gracefully")
     
     def start(self):
@@ -505,20 +610,17 @@ class SimpleTradingBot:
     def stop(self):
         """Stop the bot"""
         self.running = False
+        self.stop_market_feed()
         logger.info("Bot stopping...")
     
     def get_status(self):
         """Get current bot status"""
         total_value = self.capital
         
-        for symbol, pos in self.positions.items():
-            try:
-                df = self.data_fetcher.get_ohlcv(symbol, timeframe='1m', limit=1)
-                if df is not None and len(df) > 0 and not df.empty:
-                    current_price = df.iloc[-1]['close']
-                    total_value += pos['amount'] * current_price
-            except:
-                pass
+        current_prices = self.get_position_prices()
+        for symbol, pos in list(self.positions.items()):
+            if symbol in current_prices:
+                total_value += pos['amount'] * current_prices[symbol]
         
         profit = total_value - self.initial_capital
         profit_pct = (profit / self.initial_capital) * 100
@@ -544,11 +646,11 @@ class SimpleTradingBot:
         """Get current positions with live P&L"""
         positions_list = []
         
-        for symbol, pos in self.positions.items():
+        current_prices = self.get_position_prices()
+        for symbol, pos in list(self.positions.items()):
             try:
-                df = self.data_fetcher.get_ohlcv(symbol, timeframe='1m', limit=1)
-                if df is not None and len(df) > 0 and not df.empty:
-                    current_price = df.iloc[-1]['close']
+                if symbol in current_prices:
+                    current_price = current_prices[symbol]
                     current_value = pos['amount'] * current_price
                     entry_value = pos['amount'] * pos['entry_price']
                     profit = current_value - entry_value
@@ -0,0 +1,446 @@
+import math
+import logging
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher import Candles
+from src.rolling_extremes import RollingExtreme
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+
+def _div(a: float, b: float) -> float:
+    """a / b with NumPy semantics when b is 0 (inf or nan instead of ZeroDivisionError)"""
+    if b:
+        return a / b
+    if a != a or a == 0:
+        return NAN
+    return math.copysign(math.inf, a)
+
+
+class _Rolling:
+    """
+    Sum and sum of squares of the last `window` values
+
+    Values are stored relative to an anchor (re-set to the window mean every
+    `window` pushes, when the sums are also recomputed exactly), so the
+    variance does not lose precision to large price levels and rounding
+    errors from adding and removing values never accumulate. NaN values count
+    as missing: statistics are NaN while fewer than `window` valid values
+    are in the window, like pandas rolling(window).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._anchor = None
+        self._sum = 0.0
+        self._squares = 0.0
+        self._nans = 0
+        self._pushes = 0
+
+    def _totals(self, x: float) -> Tuple[int, float, float]:
+        """(valid count, sum, sum of squares) of the window with x appended, relative to the anchor"""
+        total, squares, nans = self._sum, self._squares, self._nans
+        anchor = x if self._anchor is None else self._anchor
+        if len(self._values) == self.window:
+            old = self._values[0]
+            if old == old:
+                total -= old - anchor
+                squares -= (old - anchor) ** 2
+            else:
+                nans -= 1
+        if x == x:
+            total += x - anchor
+            squares += (x - anchor) ** 2
+        else:
+            nans += 1
+        return min(len(self._values) + 1, self.window) - nans, total, squares
+
+    def update(self, x: float, commit: bool) -> Tuple[float, float]:
+        """
+        Mean and sum of squared deviations of the window ending with x
+
+        Both are NaN while the window is not full of valid values.
+        """
+        count, total, squares = self._totals(x)
+        anchor = x if self._anchor is None else self._anchor
+        if commit:
+            if self._anchor is None and x == x:
+                self._anchor = x
+            if len(self._values) == self.window and self._values[0] != self._values[0]:
+                self._nans -= 1
+            self._values.append(x)
+            self._nans += x != x
+            self._sum, self._squares = (total, squares) if self._anchor is not None else (0.0, 0.0)
+            self._pushes += 1
+            if self._pushes % self.window == 0:
+                self._resync()
+        if count < self.window:
+            return NAN, NAN
+        mean = total / count
+        return anchor + mean, max(squares - total * mean, 0.0)
+
+    def _resync(self):
+        valid = [value for value in self._values if value == value]
+        if not valid:
+            return
+        self._anchor = math.fsum(valid) / len(valid)
+        self._sum = math.fsum(value - self._anchor for value in valid)
+        self._squares = math.fsum((value - self._anchor) ** 2 for value in valid)
+
+
+class _Ewm:
+    """pandas ewm(alpha, adjust=False, min_periods).mean(), leading NaNs skipped"""
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self._old_weight = 1.0 - alpha
+        self._value = NAN
+        self._observations = 0
+
+    @classmethod
+    def span(cls, span: int) -> '_Ewm':
+        return cls(2.0 / (span + 1), span)
+
+    def update(self, x: float, commit: bool) -> float:
+        value, observations = self._value, self._observations
+        if x == x:
+            observations += 1
+            if value != value:
+                value = x
+            elif value != x:
+                # Same operations as pandas so results match to the last bits
+                value = (self._old_weight * value + self.alpha * x) / (self._old_weight + self.alpha)
+        if commit:
+            self._value, self._observations = value, observations
+        return value if observations >= self.min_periods else NAN
+
+
+class StreamingIndicators:
+    """
+    TechnicalIndicators.add_all_indicators, one candle at a time
+
+    Keeps the running state of every indicator (rolling sums, monotonic
+    deques for highs and lows, EMA and Wilder averages, OBV) so appending a
+    closed candle costs the same whatever the length of the history. The
+    forming candle is evaluated against the committed state without changing
+    it, so it can be re-evaluated on every tick and is committed once a newer
+    candle arrives. Values match the batch ta results computed over the same
+    history (ADX and ATR keep ta's zero warm-up values).
+
+    Indicator rows are kept next to the candles in one buffer twice the
+    capacity long, moved back once every capacity appends like CandleRing,
+    so frame() is a view over contiguous memory.
+    """
+
+    # Same order as TechnicalIndicators.add_all_indicators adds them
+    COLUMNS = (
+        'sma_20', 'sma_50', 'sma_200', 'ema_9', 'ema_21', 'ema_55',
+        'macd', 'macd_signal', 'macd_diff', 'adx', 'adx_pos', 'adx_neg',
+        'rsi', 'stoch_k', 'stoch_d', 'roc', 'williams_r',
+        'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_percent', 'atr',
+        'obv', 'vwap', 'volume_sma',
+        'price_momentum_5', 'price_momentum_10', 'price_momentum_20', 'volatility_20',
+        'higher_high', 'lower_low', 'support', 'resistance', 'trend_strength'
+    )
+    FRAME_COLUMNS = Candles.COLUMNS + COLUMNS
+
+    ADX_WINDOW = 14
+    ATR_WINDOW = 14
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.full((len(self.FRAME_COLUMNS), 2 * capacity), np.nan)
+        self._end = 0  # Committed bars in the buffer
+        self._size = 0
+        self._forming = False
+        self.bars = 0  # Bars ever committed
+        self.last_timestamp = None  # Newest committed bar
+        self._reset_state()
+
+    def _reset_state(self):
+        self._sma_20 = _Rolling(20)
+        self._sma_50 = _Rolling(50)
+        self._sma_200 = _Rolling(200)
+        self._ema_9 = _Ewm.span(9)
+        self._ema_21 = _Ewm.span(21)
+        self._ema_55 = _Ewm.span(55)
+        self._ema_12 = _Ewm.span(12)
+        self._ema_26 = _Ewm.span(26)
+        self._macd_signal = _Ewm.span(9)
+        self._rsi_up = _Ewm(1 / 14, 14)
+        self._rsi_down = _Ewm(1 / 14, 14)
+        self._high_14 = RollingExtreme(14, maximum=True)
+        self._low_14 = RollingExtreme(14, maximum=False)
+        self._high_20 = RollingExtreme(20, maximum=True)
+        self._low_20 = RollingExtreme(20, maximum=False)
+        self._stoch_d = _Rolling(3)
+        self._vwap_pv = _Rolling(14)
+        self._vwap_volume = _Rolling(14)
+        self._volume_sma = _Rolling(20)
+        self._volatility = _Rolling(20)
+        self._closes = deque(maxlen=20)
+        self._previous = None  # (high, low) of the last committed bar
+        self._obv = 0.0
+        # Wilder sums of ADX (true range, +DM, -DM), the DX warm-up sum and ADX itself
+        self._adx_sums = [0.0, 0.0, 0.0]
+        self._dx_sum = 0.0
+        self._adx = 0.0
+        self._tr_sum = 0.0
+        self._atr = 0.0
+
+    def clear(self):
+        """Forget all bars and state"""
+        self._end = 0
+        self._size = 0
+        self._forming = False
+        self.bars = 0
+        self.last_timestamp = None
+        self._reset_state()
+
+    def __len__(self) -> int:
+        return self._size + self._forming
+
+    @classmethod
+    def from_candles(cls, candles: Candles, capacity: int = None, forming: bool = True) -> 'StreamingIndicators':
+        """Engine warmed up on candles (the last one kept as forming unless forming=False)"""
+        engine = cls(capacity or max(len(candles), 1))
+        engine.sync(candles, forming)
+        return engine
+
+    def _step(self, o: float, h: float, l: float, c: float, v: float, commit: bool) -> tuple:
+        """All indicator values of a bar following the committed ones (state is only changed on commit)"""
+        t = self.bars
+        closes = self._closes
+        prev_close = closes[-1] if closes else NAN
+
+        def lagged(k):
+            return closes[-k] if len(closes) >= k else NAN
+
+        # Moving averages and MACD
+        sma_20, sq_20 = self._sma_20.update(c, commit)
+        sma_50, _ = self._sma_50.update(c, commit)
+        sma_200, _ = self._sma_200.update(c, commit)
+        ema_9 = self._ema_9.update(c, commit)
+        ema_21 = self._ema_21.update(c, commit)
+        ema_55 = self._ema_55.update(c, commit)
+        macd = self._ema_12.update(c, commit) - self._ema_26.update(c, commit)
+        macd_signal = self._macd_signal.update(macd, commit)
+
+        # ADX as ta computes it: Wilder sums from bar ADX_WINDOW on, DI from the bar after,
+        # ADX from the mean of the first ADX_WINDOW DX values on
+        w = self.ADX_WINDOW
+        adx, adx_pos, adx_neg = 0.0, 0.0, 0.0
+        sums, dx_sum, adx_state = self._adx_sums, self._dx_sum, self._adx
+        if t > 0:
+            prev_high, prev_low = self._previous
+            tr = max(h, prev_close) - min(l, prev_close)
+            up, down = h - prev_high, prev_low - l
+            pos = up if up > down and up > 0 else 0.0
+            neg = down if down > up and down > 0 else 0.0
+            if t <= w:
+                sums = [sums[0] + tr, sums[1] + pos, sums[2] + neg]
+            else:
+                sums = [sums[0] - sums[0] / float(w) + tr, sums[1] - sums[1] / float(w) + pos,
+                        sums[2] - sums[2] / float(w) + neg]
+            if t >= w:
+                di_pos = 100 * (sums[1] / sums[0]) if sums[0] != 0 else 0.0
+                di_neg = 100 * (sums[2] / sums[0]) if sums[0] != 0 else 0.0
+                dx = 100 * abs((di_pos - di_neg) / (di_pos + di_neg)) if di_pos + di_neg != 0 else 0.0
+                if t > w:
+                    adx_pos, adx_neg = di_pos, di_neg
+                if t < 2 * w - 1:
+                    dx_sum += dx
+                elif t == 2 * w - 1:
+                    adx_state = (dx_sum + dx) / w
+                else:
+                    adx_state = (adx_state * (w - 1) + dx) / float(w)
+                if t >= 2 * w - 1:
+                    adx = adx_state
+
+        # Momentum
+        diff = c - prev_close if t > 0 else 0.0
+        rsi_up = self._rsi_up.update(diff if diff > 0 else 0.0, commit)
+        rsi_down = self._rsi_down.update(-diff if diff < 0 else 0.0, commit)
+        if rsi_down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + rsi_up / rsi_down)) if rsi_down == rsi_down else NAN
+        high_14 = self._high_14.update(h, commit)
+        low_14 = self._low_14.update(l, commit)
+        stoch_k = _div(100 * (c - low_14), high_14 - low_14)
+        stoch_d, _ = self._stoch_d.update(stoch_k, commit)
+        roc = _div(c - lagged(12), lagged(12)) * 100
+        williams_r = _div(high_14 - c, high_14 - low_14) * -100
+
+        # Volatility
+        bb_std = math.sqrt(sq_20 / 20) if sq_20 == sq_20 else NAN
+        bb_upper = sma_20 + 2 * bb_std
+        bb_lower = sma_20 - 2 * bb_std
+        bb_width = _div(bb_upper - bb_lower, sma_20) * 100
+        bb_percent = (c - bb_lower) / (bb_upper - bb_lower) if bb_upper != bb_lower and bb_std == bb_std else NAN
+
+        wa = self.ATR_WINDOW
+        tr = h - l if t == 0 else max(h - l, abs(h - prev_close), abs(l - prev_close))
+        tr_sum, atr_state = self._tr_sum, self._atr
+        if t < wa - 1:
+            tr_sum += tr
+            atr = 0.0
+        elif t == wa - 1:
+            atr_state = (tr_sum + tr) / wa
+            atr = atr_state
+        else:
+            atr_state = (atr_state * (wa - 1) + tr) / float(wa)
+            atr = atr_state
+
+        # Volume
+        obv = self._obv + (-v if c < prev_close else v)
+        pv_mean, _ = self._vwap_pv.update((h + l + c) / 3.0 * v, commit)
+        volume_mean, _ = self._vwap_volume.update(v, commit)
+        vwap = _div(pv_mean, volume_mean)
+        volume_sma, _ = self._volume_sma.update(v, commit)
+
+        # Custom
+        momentum_5 = _div(c, lagged(5)) - 1
+        momentum_10 = _div(c, lagged(10)) - 1
+        momentum_20 = _div(c, lagged(20)) - 1
+        _, sq_returns = self._volatility.update(_div(c, prev_close) - 1 if t > 0 else NAN, commit)
+        volatility_20 = math.sqrt(sq_returns / 19) if sq_returns == sq_returns else NAN
+        if self._previous is not None:
+            higher_high = 1.0 if h > self._previous[0] else 0.0
+            lower_low = 1.0 if l < self._previous[1] else 0.0
+        else:
+            higher_high = lower_low = 0.0
+        support = self._low_20.update(l, commit)
+        resistance = self._high_20.update(h, commit)
+        trend_strength = _div(abs(c - sma_20), sma_20) * 100
+
+        if commit:
+            closes.append(c)
+            self._previous = (h, l)
+            self._obv = obv
+            self._adx_sums, self._dx_sum, self._adx = sums, dx_sum, adx_state
+            self._tr_sum, self._atr = tr_sum, atr_state
+            self.bars += 1
+
+        return (
+            sma_20, sma_50, sma_200, ema_9, ema_21, ema_55,
+            macd, macd_signal, macd - macd_signal, adx, adx_pos, adx_neg,
+            rsi, stoch_k, stoch_d, roc, williams_r,
+            bb_upper, sma_20, bb_lower, bb_width, bb_percent, atr,
+            obv, vwap, volume_sma,
+            momentum_5, momentum_10, momentum_20, volatility_20,
+            higher_high, lower_low, support, resistance, trend_strength
+        )
+
+    def _write(self, position: int, timestamp: int, bar: np.ndarray, row: tuple):
+        self._timestamps[position] = timestamp
+        self._values[:len(Candles.COLUMNS), position] = bar
+        self._values[len(Candles.COLUMNS):, position] = row
+
+    def _make_room(self):
+        """Keep a free slot after the committed bars for the next bar (or the forming one)"""
+        if self._end + 1 >= len(self._timestamps):
+            keep = self.capacity - 1
+            self._timestamps[:keep] = self._timestamps[self._end - keep:self._end]
+            self._values[:, :keep] = self._values[:, self._end - keep:self._end]
+            self._end = keep
+            self._size = min(self._size, keep)
+
+    def append(self, timestamp: int, bar) -> tuple:
+        """
+        Commit a closed bar (open, high, low, close, volume)
+
+        Returns:
+            Its indicator values in COLUMNS order
+        """
+        bar = np.asarray(bar, dtype=np.float64)
+        row = self._step(*bar.tolist(), commit=True)
+        self._make_room()
+        self._write(self._end, timestamp, bar, row)
+        self._end += 1
+        self._size = min(self._size + 1, self.capacity)
+        self._forming = False
+        self.last_timestamp = int(timestamp)
+        return row
+
+    def set_forming(self, timestamp: int, bar) -> tuple:
+        """
+        Evaluate the forming bar (replaces the previous forming bar, commits nothing)
+
+        Returns:
+            Its indicator values in COLUMNS order
+        """
+        bar = np.asarray(bar, dtype=np.float64)
+        row = self._step(*bar.tolist(), commit=False)
+        self._make_room()
+        self._write(self._end, timestamp, bar, row)
+        self._forming = True
+        return row
+
+    def sync(self, candles: Candles, forming: bool = True) -> int:
+        """
+        Catch up with a candle window (oldest first)
+
+        Bars newer than the last committed one are committed, except the
+        newest, which is evaluated as forming unless forming=False. If the
+        window no longer reaches back to the last committed bar (a gap), the
+        engine starts over from the window.
+
+        Returns:
+            Number of bars committed
+        """
+        if candles.empty:
+            return 0
+        timestamps = candles.timestamps
+        if self.last_timestamp is not None:
+            start = int(np.searchsorted(timestamps, self.last_timestamp, side='left'))
+            if start == len(timestamps) or timestamps[start] != self.last_timestamp:
+                if timestamps[-1] <= self.last_timestamp:
+                    return 0
+                logger.debug("Candle window does not reach the last committed bar, recomputing indicators")
+                self.clear()
+                start = 0
+            else:
+                start += 1
+        else:
+            start = 0
+
+        stop = len(timestamps) - 1 if forming else len(timestamps)
+        values = candles.values
+        for i in range(start, stop):
+            self.append(int(timestamps[i]), values[:, i])
+        if forming and stop >= start and timestamps[-1] != self.last_timestamp:
+            self.set_forming(int(timestamps[-1]), values[:, -1])
+        return max(stop - start, 0)
+
+    def latest(self) -> Dict[str, float]:
+        """Indicator values of the newest bar (the forming one if set)"""
+        if not len(self):
+            return {}
+        position = self._end if self._forming else self._end - 1
+        return dict(zip(self.COLUMNS, self._values[len(Candles.COLUMNS):, position].tolist()))
+
+    def frame(self, limit: int = None) -> pd.DataFrame:
+        """
+        OHLCV and indicator columns of the newest `limit` bars, like add_all_indicators
+
+        A view over the engine's buffer, valid until the next append or forming update.
+        """
+        end = self._end + self._forming
+        size = len(self) if limit is None else min(limit, len(self))
+        start = end - size
+        index = pd.DatetimeIndex(self._timestamps[start:end].view('datetime64[ms]'), name='timestamp')
+        return pd.DataFrame(self._values[:, start:end].T, index=index,
+                            columns=list(self.FRAME_COLUMNS), copy=False)
+
+    def __repr__(self) -> str:
+        return f"StreamingIndicators({self.bars} bars committed, forming={self._forming})"
@@ -1,20 +1,84 @@
 import pandas as pd
 import numpy as np
 from ta.trend import MACD, EMAIndicator, SMAIndicator, ADXIndicator
-from ta.momentum import RSIIndicator, StochasticOscillator, ROCIndicator
+from ta.momentum import RSIIndicator, ROCIndicator
 from ta.volatility import BollingerBands, AverageTrueRange
 from ta.volume import OnBalanceVolumeIndicator, VolumeWeightedAveragePrice
-from typing import Dict
+from typing import Dict, Sequence
 import logging
 
+from config import Config
+from src import numpy_indicators
+from src.data_fetcher import Candles, as_frame
+from src.indicator_panel import indicator_frames
+from src.rolling_extremes import rolling_max, rolling_min
+
 logger = logging.getLogger(__name__)
 
 class TechnicalIndicators:
     """Calculate various technical indicators for trading analysis"""
     
+    # Columns read by get_signal_summary
+    SUMMARY_COLUMNS = ('rsi', 'macd', 'macd_signal', 'bb_upper', 'bb_lower', 'ema_9', 'ema_21', 'stoch_k')
+    
+    # Columns each add_*_indicators group produces, in the order add_all_indicators runs them
+    INDICATOR_GROUPS = (
+        ('add_trend_indicators', ('sma_20', 'sma_50', 'sma_200', 'ema_9', 'ema_21', 'ema_55',
+                                  'macd', 'macd_signal', 'macd_diff', 'adx', 'adx_pos', 'adx_neg')),
+        ('add_momentum_indicators', ('rsi', 'stoch_k', 'stoch_d', 'roc', 'williams_r')),
+        ('add_volatility_indicators', ('bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_percent', 'atr')),
+        ('add_volume_indicators', ('obv', 'vwap', 'volume_sma')),
+        ('add_custom_indicators', ('price_momentum_5', 'price_momentum_10', 'price_momentum_20',
+                                   'volatility_20', 'higher_high', 'lower_low', 'support',
+                                   'resistance', 'trend_strength')),
+    )
+    
+    @staticmethod
+    def add_indicators(df: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+        """
+        Add the indicator columns a caller reads (Candles are converted first)
+        
+        With the numpy backend only the part of the indicator graph the
+        columns depend on is computed; the ta backend runs only the
+        add_*_indicators groups that produce at least one of the columns
+        (a group adds all of its columns).
+        """
+        df = as_frame(df)
+        if Config.INDICATOR_BACKEND == 'numpy':
+            return numpy_indicators.add_indicators(df, columns)
+        wanted = set(columns)
+        if 'trend_strength' in wanted:
+            wanted.add('sma_20')  # Read by add_custom_indicators
+        for method, produced in TechnicalIndicators.INDICATOR_GROUPS:
+            if wanted.intersection(produced):
+                df = getattr(TechnicalIndicators, method)(df)
+        return df
+    
+    @staticmethod
+    def add_indicators_many(candles: Dict[str, Candles], columns: Sequence[str]) -> Dict[str, pd.DataFrame]:
+        """
+        add_indicators for many symbols (symbol -> Candles, empty windows are skipped)
+        
+        With the numpy backend the windows are stacked into (symbols, bars)
+        panels and every indicator is computed once per panel instead of once
+        per symbol; the ta backend goes symbol by symbol.
+        """
+        if Config.INDICATOR_BACKEND == 'numpy':
+            return indicator_frames(candles, columns)
+        return {symbol: TechnicalIndicators.add_indicators(window, columns)
+                for symbol, window in candles.items() if not window.empty}
+    
     @staticmethod
     def add_all_indicators(df: pd.DataFrame) -> pd.DataFrame:
-        """Add all technical indicators to the dataframe"""
+        """
+        Add all technical indicators to the dataframe (Candles are converted to one first)
+
+        INDICATOR_BACKEND='numpy' computes the same columns in one pass over
+        NumPy arrays (src.numpy_indicators); 'ta' uses the ta indicator objects below.
+        """
+        df = as_frame(df)
+        if Config.INDICATOR_BACKEND == 'numpy':
+            return numpy_indicators.add_all_indicators(df)
         df = TechnicalIndicators.add_trend_indicators(df)
         df = TechnicalIndicators.add_momentum_indicators(df)
         df = TechnicalIndicators.add_volatility_indicators(df)
@@ -25,6 +89,7 @@ class TechnicalIndicators:
     @staticmethod
     def add_trend_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """Add trend-based indicators"""
+        df = as_frame(df)
         try:
             # Moving Averages
             df['sma_20'] = SMAIndicator(close=df['close'], window=20).sma_indicator()
@@ -56,22 +121,24 @@ class TechnicalIndicators:
     @staticmethod
     def add_momentum_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """Add momentum-based indicators"""
+        df = as_frame(df)
         try:
             # RSI
             df['rsi'] = RSIIndicator(close=df['close'], window=14).rsi()
             
-            # Stochastic Oscillator
-            stoch = StochasticOscillator(high=df['high'], low=df['low'], close=df['close'], 
-                                         window=14, smooth_window=3)
-            df['stoch_k'] = stoch.stoch()
-            df['stoch_d'] = stoch.stoch_signal()
+            # 14-bar high / low shared by the stochastic oscillator and Williams %R
+            high_14 = pd.Series(rolling_max(df['high'].to_numpy(dtype=np.float64), 14), index=df.index)
+            low_14 = pd.Series(rolling_min(df['low'].to_numpy(dtype=np.float64), 14), index=df.index)
+            
+            # Stochastic Oscillator (ta's StochasticOscillator, window=14, smooth_window=3)
+            df['stoch_k'] = 100 * (df['close'] - low_14) / (high_14 - low_14)
+            df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
             
             # Rate of Change
             df['roc'] = ROCIndicator(close=df['close'], window=12).roc()
             
             # Williams %R
-            df['williams_r'] = ((df['high'].rolling(window=14).max() - df['close']) / 
-                               (df['high'].rolling(window=14).max() - df['low'].rolling(window=14).min()) * -100)
+            df['williams_r'] = (high_14 - df['close']) / (high_14 - low_14) * -100
             
             logger.debug("Momentum indicators added successfully")
         except Exception as e:
@@ -82,6 +149,7 @@ class TechnicalIndicators:
     @staticmethod
     def add_volatility_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """Add volatility-based indicators"""
+        df = as_frame(df)
         try:
             # Bollinger Bands
             bb = BollingerBands(close=df['close'], window=20, window_dev=2)
@@ -104,6 +172,7 @@ class TechnicalIndicators:
     @staticmethod
     def add_volume_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """Add volume-based indicators"""
+        df = as_frame(df)
         try:
             # OBV (On-Balance Volume)
             df['obv'] = OnBalanceVolumeIndicator(close=df['close'], volume=df['volume']).on_balance_volume()
@@ -124,6 +193,7 @@ class TechnicalIndicators:
     @staticmethod
     def add_custom_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """Add custom indicators and features"""
+        df = as_frame(df)
         try:
             # Price momentum
             df['price_momentum_5'] = df['close'].pct_change(5)
@@ -138,8 +208,8 @@ class TechnicalIndicators:
             df['lower_low'] = (df['low'] < df['low'].shift(1)).astype(int)
             
             # Support and Resistance levels
-            df['support'] = df['low'].rolling(window=20).min()
-            df['resistance'] = df['high'].rolling(window=20).max()
+            df['support'] = rolling_min(df['low'].to_numpy(dtype=np.float64), 20)
+            df['resistance'] = rolling_max(df['high'].to_numpy(dtype=np.float64), 20)
             
             # Trend strength
             df['trend_strength'] = abs(df['close'] - df['sma_20']) / df['sma_20'] * 100
@@ -153,6 +223,7 @@ class TechnicalIndicators:
     @staticmethod
     def get_signal_summary(df: pd.DataFrame) -> Dict:
         """Get a summary of trading signals from indicators"""
+        df = as_frame(df)
         try:
             latest = df.iloc[-1]
             signals = {
@@ -0,0 +1,182 @@
+import threading
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BUY, SELL, UNKNOWN = 1, -1, 0
+
+# Running totals kept as prefix sums, one row each
+_TOTALS = ('buy_volume', 'sell_volume', 'volume', 'notional')
+
+
+class TradeTape:
+    """
+    Append-only record of the public trades of one symbol
+
+    Trades are stored column by column (timestamp, price, amount, taker side)
+    together with prefix sums of buy volume, sell volume, volume and notional,
+    so the totals of any trailing window are a difference of two prefix rows:
+    appending a trade and reading a window are both O(1) (plus a binary
+    search for the window start). The buffer holds at least `capacity` trades
+    and never drops trades still inside the longest window.
+
+    `cursor` is the timestamp to pass as `since` on the next fetch; trades
+    seen before (same id, or older than the cursor) are skipped.
+    """
+
+    def __init__(self, symbol: str, windows: Sequence[int] = (60, 300, 900), capacity: int = 100_000):
+        self.symbol = symbol
+        self.windows = tuple(windows)
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._prices = np.zeros(2 * capacity)
+        self._amounts = np.zeros(2 * capacity)
+        self._sides = np.zeros(2 * capacity, dtype=np.int8)
+        # _prefix[:, i] holds the totals of all trades before buffer position i
+        self._prefix = np.zeros((len(_TOTALS), 2 * capacity + 1))
+        self._end = 0
+        self.total = 0  # Trades ever appended
+        self._recent_ids = deque(maxlen=10_000)
+        self._recent_id_set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._end
+
+    @property
+    def cursor(self) -> Optional[int]:
+        """Timestamp of the newest trade (ccxt `since` for the next fetch)"""
+        return int(self._timestamps[self._end - 1]) if self._end else None
+
+    def add(self, trades: List[Dict]) -> int:
+        """
+        Append ccxt trades (oldest first), skipping ones already on the tape
+
+        Returns:
+            Number of trades appended
+        """
+        with self._lock:
+            cursor = self.cursor
+            fresh = []
+            for trade in trades:
+                timestamp = trade.get('timestamp')
+                if timestamp is None or (cursor is not None and timestamp < cursor):
+                    continue
+                trade_id = trade.get('id')
+                if trade_id is None:
+                    trade_id = (timestamp, trade.get('price'), trade.get('amount'), trade.get('side'))
+                if trade_id in self._recent_id_set:
+                    continue
+                if len(self._recent_ids) == self._recent_ids.maxlen:
+                    self._recent_id_set.discard(self._recent_ids[0])
+                self._recent_ids.append(trade_id)
+                self._recent_id_set.add(trade_id)
+                fresh.append(trade)
+            if not fresh:
+                return 0
+            fresh.sort(key=lambda trade: trade['timestamp'])
+            self._append(
+                np.fromiter((t['timestamp'] for t in fresh), dtype=np.int64, count=len(fresh)),
+                np.fromiter((t['price'] for t in fresh), dtype=np.float64, count=len(fresh)),
+                np.fromiter((t['amount'] for t in fresh), dtype=np.float64, count=len(fresh)),
+                np.fromiter((BUY if t.get('side') == 'buy' else SELL if t.get('side') == 'sell' else UNKNOWN
+                             for t in fresh), dtype=np.int8, count=len(fresh))
+            )
+            return len(fresh)
+
+    def _append(self, timestamps: np.ndarray, prices: np.ndarray, amounts: np.ndarray, sides: np.ndarray):
+        count = len(timestamps)
+        if self._end + count > len(self._timestamps):
+            self._compact(count)
+        start, end = self._end, self._end + count
+        self._timestamps[start:end] = timestamps
+        self._prices[start:end] = prices
+        self._amounts[start:end] = amounts
+        self._sides[start:end] = sides
+
+        flows = np.vstack([
+            np.where(sides == BUY, amounts, 0.0),
+            np.where(sides == SELL, amounts, 0.0),
+            amounts,
+            prices * amounts
+        ])
+        self._prefix[:, start + 1:end + 1] = self._prefix[:, start:start + 1] + np.cumsum(flows, axis=1)
+        self._end = end
+        self.total += count
+
+    def _compact(self, incoming: int):
+        """Move the trades that must be kept to the front, growing the buffer if needed"""
+        longest_ms = max(self.windows, default=0) * 1000
+        keep_from = min(
+            max(0, self._end - self.capacity),
+            int(np.searchsorted(self._timestamps[:self._end], self.cursor - longest_ms, side='right'))
+        )
+        kept = self._end - keep_from
+        size = len(self._timestamps)
+        if kept + incoming > size:
+            size = 2 * (kept + incoming)
+            logger.debug(f"Trade tape for {self.symbol} grows to {size} trades")
+
+        timestamps = np.zeros(size, dtype=np.int64)
+        prices = np.zeros(size)
+        amounts = np.zeros(size)
+        sides = np.zeros(size, dtype=np.int8)
+        prefix = np.zeros((len(_TOTALS), size + 1))
+        timestamps[:kept] = self._timestamps[keep_from:self._end]
+        prices[:kept] = self._prices[keep_from:self._end]
+        amounts[:kept] = self._amounts[keep_from:self._end]
+        sides[:kept] = self._sides[keep_from:self._end]
+        # Rebase so the prefix sums restart from zero and do not lose precision over time
+        prefix[:, :kept + 1] = self._prefix[:, keep_from:self._end + 1] - self._prefix[:, keep_from:keep_from + 1]
+        self._timestamps, self._prices, self._amounts, self._sides, self._prefix = (
+            timestamps, prices, amounts, sides, prefix)
+        self._end = kept
+
+    def window(self, seconds: float, now: int = None) -> Dict:
+        """
+        Trade flow over the trailing window
+
+        Args:
+            seconds: Window length
+            now: Window end in epoch ms, defaults to the newest trade
+
+        Returns:
+            Dict with buy_volume, sell_volume, volume, trade_count, vwap and buy_sell_ratio
+        """
+        with self._lock:
+            end = self._end
+            if now is None:
+                now = self.cursor or 0
+            start = int(np.searchsorted(self._timestamps[:end], now - seconds * 1000, side='right'))
+            totals = self._prefix[:, end] - self._prefix[:, start]
+        buy_volume, sell_volume, volume, notional = (float(value) for value in totals)
+        return {
+            'seconds': seconds,
+            'buy_volume': buy_volume,
+            'sell_volume': sell_volume,
+            'volume': volume,
+            'trade_count': end - start,
+            'vwap': notional / volume if volume > 0 else None,
+            'buy_sell_ratio': buy_volume / (sell_volume + 1e-10) if end > start else 1.0
+        }
+
+    def stats(self, now: int = None) -> Dict[int, Dict]:
+        """window() for every configured window length"""
+        return {seconds: self.window(seconds, now) for seconds in self.windows}
+
+    def tail(self, count: int) -> pd.DataFrame:
+        """The newest `count` trades in the format of MarketDataFetcher.get_recent_trades"""
+        with self._lock:
+            start = max(0, self._end - count)
+            sides = self._sides[start:self._end]
+            return pd.DataFrame({
+                'timestamp': pd.to_datetime(self._timestamps[start:self._end], unit='ms'),
+                'price': self._prices[start:self._end].copy(),
+                'amount': self._amounts[start:self._end].copy(),
+                'side': np.where(sides == BUY, 'buy', np.where(sides == SELL, 'sell', None))
+            })
@@ -1,13 +1,19 @@
 import time
+import threading
 import schedule
 import logging
-from datetime import datetime
-from typing import Dict, List
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
 import pandas as pd
 from colorlog import ColoredFormatter
 
 from config import Config
-from src.data_fetcher import MarketDataFetcher
+from src.data_fetcher import get_shared_fetcher
+from src.market_feed import create_market_feed
+from src.market_state import get_shared_market_state
+from src.indicator_cache import get_shared_indicator_cache, series_fingerprint
+from src import indicator_panel
+from src.rate_limiter import Priority, request_priority
 from src.technical_indicators import TechnicalIndicators
 from src.ml_predictor import MLPredictor
 from src.trading_strategies import TradingStrategies
@@ -47,13 +53,20 @@ class CryptoTradingBot:
     
     def __init__(self):
         self.config = Config()
-        self.data_fetcher = MarketDataFetcher()
+        self.data_fetcher = get_shared_fetcher()
+        self.market_state = get_shared_market_state()
         self.ml_predictor = MLPredictor(model_type='ensemble')
         self.strategies = TradingStrategies()
         self.risk_manager = RiskManager()
+        self.indicator_cache = get_shared_indicator_cache()
+        # Indicator columns read by the ML model, the strategies and the signal summary
+        self.indicator_columns = tuple(dict.fromkeys(
+            MLPredictor.FEATURE_COLUMNS + TradingStrategies.required_columns() + TechnicalIndicators.SUMMARY_COLUMNS))
         
         self.is_running = False
         self.capital = self.config.DEFAULT_TRADE_AMOUNT * 100  # Initial capital
+        self.feed = None
+        self.lock = threading.RLock()  # Scheduled cycle and feed callbacks both trade
         
         logger.info("="*60)
         logger.info("AI CRYPTO TRADING BOT INITIALIZED")
@@ -73,16 +86,19 @@ class CryptoTradingBot:
         for symbol in symbols_to_train:
             try:
                 logger.info(f"Fetching training data for {symbol}...")
-                # Use less data for faster training
-                limit = 300 if quick else 1000
-                df = self.data_fetcher.get_ohlcv(symbol, '1h', limit=limit)
+                if quick:
+                    # Use less data for faster training
+                    df = self.data_fetcher.get_ohlcv(symbol, '1h', limit=300)
+                else:
+                    start = datetime.now(timezone.utc) - timedelta(days=self.config.TRAINING_HISTORY_DAYS)
+                    df = self.data_fetcher.backfill_ohlcv(symbol, '1h', start=start)
                 
                 if df.empty:
                     logger.warning(f"No data available for {symbol}")
                     continue
                 
                 # Add indicators
-                df = TechnicalIndicators.add_all_indicators(df)
+                df = TechnicalIndicators.add_indicators(df, MLPredictor.FEATURE_COLUMNS)
                 
                 # Train models
                 logger.info(f"Training models for {symbol}...")
@@ -101,40 +117,71 @@ class CryptoTradingBot:
         self.ml_predictor.save_models()
         logger.info("[OK] Initialization complete!")
     
-    def analyze_symbol(self, symbol: str) -> Dict:
-        """Analyze a single trading pair"""
+    def analyze_symbol(self, symbol: str, df: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Analyze a single trading pair
+        
+        Args:
+            df: Candles with indicators computed by the caller (e.g. from
+                indicator_frames()); fetched and computed here when None
+        """
         try:
-            logger.info(f"Fetching data for {symbol}...")
+            timeframe = self.config.PRIMARY_TIMEFRAME
+            cache = self.indicator_cache
             # Fetch latest data
-            df = self.data_fetcher.get_ohlcv(symbol, self.config.PRIMARY_TIMEFRAME, limit=500)
+            if df is None and self.config.STREAMING_INDICATORS:
+                logger.info(f"Fetching data for {symbol}...")
+                # Candles with indicators, updated incrementally since the last cycle
+                df = self.market_state.indicators(symbol, timeframe, limit=500)
+            elif df is None:
+                logger.info(f"Fetching data for {symbol}...")
+                candles = self.market_state.refresh(symbol, timeframe, limit=500)
+                if not candles.empty:
+                    logger.info(f"Adding indicators to {len(candles)} candles...")
+                    # Add technical indicators (`candles` is a copy of the window, safe to read unlocked)
+                    df = cache.get_or_compute(
+                        cache.key(symbol, timeframe, candles, 'indicators', self.indicator_columns),
+                        lambda: TechnicalIndicators.add_indicators(candles.to_frame(), self.indicator_columns))
+                else:
+                    df = candles
             
             if df.empty:
                 logger.warning(f"No data received for {symbol}")
                 return {'symbol': symbol, 'status': 'error', 'message': 'No data'}
             
-            logger.info(f"Adding indicators to {len(df)} candles...")
-            # Add technical indicators
-            df = TechnicalIndicators.add_all_indicators(df)
-            
             # Get current price
             current_price = df['close'].iloc[-1]
             
+            # Results below are reused while the candles are unchanged
+            series = (symbol, timeframe, series_fingerprint(df))
+            
             # Get ML prediction
-            ml_prediction = self.ml_predictor.predict(df)
+            ml_prediction = cache.get_or_compute(
+                series + ('ml_prediction', self.ml_predictor.model_version),
+                lambda: self.ml_predictor.predict(df))
             
-            # Get strategy signals
-            trend_signal = self.strategies.trend_following_strategy(df)
-            mean_rev_signal = self.strategies.mean_reversion_strategy(df)
-            breakout_signal = self.strategies.breakout_strategy(df)
+            # Get strategy signals (each once, the ML-enhanced signal reuses them)
+            signals = cache.get_or_compute(
+                series + ('strategies',),
+                lambda: {
+                    'trend_following': self.strategies.trend_following_strategy(df),
+                    'mean_reversion': self.strategies.mean_reversion_strategy(df),
+                    'breakout': self.strategies.breakout_strategy(df),
+                    'volume_analysis': self.strategies.volume_analysis_strategy(df)
+                })
+            trend_signal = signals['trend_following']
+            mean_rev_signal = signals['mean_reversion']
+            breakout_signal = signals['breakout']
             
             # Get ML-enhanced signal
-            enhanced_signal = self.strategies.ml_enhanced_strategy(df, ml_prediction)
+            enhanced_signal = self.strategies.ml_enhanced_strategy(df, ml_prediction, components=signals)
             
             # Get market sentiment
             sentiment = self.data_fetcher.get_market_sentiment(symbol)
             
             # Get technical signal summary
-            tech_summary = TechnicalIndicators.get_signal_summary(df)
+            tech_summary = cache.get_or_compute(series + ('signal_summary',),
+                                                lambda: TechnicalIndicators.get_signal_summary(df))
             
             return {
                 'symbol': symbol,
@@ -176,6 +223,18 @@ class CryptoTradingBot:
         # Determine side
         side = 'BUY' if signal in ['BUY', 'STRONG_BUY'] else 'SELL'
         
+        # Skip the trade if the visible book would fill it too far from the mid
+        if self.config.MAX_SLIPPAGE_BPS > 0:
+            slippage = self.data_fetcher.estimate_slippage(symbol, side.lower(), position_info['position_value'])
+            if slippage == float('inf'):
+                logger.info(f"Trade skipped for {symbol}: the visible order book cannot fill "
+                            f"${position_info['position_value']:.2f}")
+                return None
+            if slippage is not None and slippage > self.config.MAX_SLIPPAGE_BPS:
+                logger.warning(f"Trade blocked for {symbol}: expected slippage {slippage:.1f} bps "
+                               f"exceeds {self.config.MAX_SLIPPAGE_BPS:.0f} bps")
+                return None
+        
         logger.info("="*60)
         logger.info(f"EXECUTING {side} ORDER FOR {symbol}")
         logger.info(f"Price: ${current_price:.2f}")
@@ -247,15 +306,25 @@ class CryptoTradingBot:
         
         logger.info(f"Monitoring {len(self.risk_manager.open_positions)} open positions...")
         
-        for position_id, position in list(self.risk_manager.open_positions.items()):
-            symbol = position['symbol']
-            
+        # One bulk ticker request for every open position
+        open_positions = list(self.risk_manager.open_positions.items())
+        with request_priority(Priority.EXIT):
+            current_prices = self.data_fetcher.get_last_prices([position['symbol'] for _, position in open_positions])
+        
+        for position_id, position in open_positions:
             # Get current price
-            ticker = self.data_fetcher.get_ticker(symbol)
-            if not ticker:
+            if position['symbol'] not in current_prices:
                 continue
             
-            current_price = ticker['last']
+            self.check_position_exit(position_id, current_prices[position['symbol']])
+    
+    def check_position_exit(self, position_id: str, current_price: float):
+        """Update a position's P&L and close it if an exit condition is met"""
+        with self.lock:
+            position = self.risk_manager.open_positions.get(position_id)
+            if position is None:
+                return
+            symbol = position['symbol']
             
             # Update P&L
             self.risk_manager.update_position_pnl(position_id, current_price)
@@ -275,6 +344,38 @@ class CryptoTradingBot:
                 pnl = position['pnl']
                 logger.debug(f"{symbol}: ${current_price:.2f} - P&L: ${pnl:.2f}")
     
+    def on_ticker(self, event: Dict):
+        """Feed callback: check exits for every open position in the symbol"""
+        for position_id, position in list(self.risk_manager.open_positions.items()):
+            if position['symbol'] == event['symbol']:
+                self.check_position_exit(position_id, event['last'])
+    
+    def on_candle_close(self, event: Dict):
+        """Feed callback: re-analyze a pair when its primary timeframe candle closes"""
+        if event['symbol'] in self.config.TRADING_PAIRS and self.is_running:
+            logger.info(f"{event['symbol']}: {event['timeframe']} candle closed @ ${event['close']:.2f}")
+            self.market_state.apply_candle(event)
+            self.process_symbol(event['symbol'])
+    
+    def start_market_feed(self):
+        """Subscribe to the configured market feed (MARKET_FEED)"""
+        try:
+            self.feed = create_market_feed(self.data_fetcher, self.config.TRADING_PAIRS,
+                                           timeframe=self.config.PRIMARY_TIMEFRAME)
+        except Exception as e:
+            logger.error(f"Could not start market feed, using scheduled cycles only: {e}")
+            self.feed = None
+        if self.feed is None:
+            return
+        self.feed.on_ticker(self.on_ticker)
+        self.feed.on_candle(self.on_candle_close)
+        self.feed.start()
+    
+    def stop_market_feed(self):
+        feed, self.feed = self.feed, None
+        if feed is not None:
+            feed.stop()
+    
     def trading_cycle(self):
         """Main trading cycle"""
         logger.info("\n" + "="*60)
@@ -293,53 +394,74 @@ class CryptoTradingBot:
         self.monitor_positions()
         
         # Analyze each trading pair
+        frames = self.indicator_frames()
         for symbol in self.config.TRADING_PAIRS:
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Analyzing {symbol}...")
-            logger.info(f"{'='*60}")
-            
-            try:
-                analysis = self.analyze_symbol(symbol)
-                
-                if analysis['status'] != 'success':
-                    logger.error(f"Failed to analyze {symbol}: {analysis.get('message')}")
-                    continue
-            except Exception as e:
-                logger.error(f"Error analyzing {symbol}: {e}", exc_info=True)
-                continue
-            
-            # Get the enhanced signal (combines all strategies + ML)
-            signal_data = analysis['enhanced_signal']
-            signal = signal_data['signal']
-            confidence = signal_data['confidence']
-            
-            logger.info(f"Signal: {signal} (Confidence: {confidence:.2%})")
-            logger.info(f"ML Prediction: {analysis['ml_prediction']['signal']} "
-                       f"({analysis['ml_prediction']['prediction']:.2%})")
-            logger.info(f"Market Sentiment: {analysis['sentiment']['interpretation']} "
-                       f"(Score: {analysis['sentiment']['sentiment_score']:.0f})")
-            
-            # Check if we should trade
-            if signal in ['BUY', 'STRONG_BUY', 'SELL', 'STRONG_SELL']:
-                if confidence >= self.config.PREDICTION_CONFIDENCE_THRESHOLD:
-                    self.execute_trade(symbol, signal, confidence, analysis['current_price'])
-                else:
-                    logger.info(f"Signal confidence too low: {confidence:.2%}")
-            else:
-                logger.info("Holding - no strong signal")
+            self.process_symbol(symbol, frames.get(symbol))
         
         # Print portfolio summary
         self.print_portfolio_summary()
         
         logger.info("="*60 + "\n")
     
+    def indicator_frames(self) -> Dict[str, pd.DataFrame]:
+        """
+        Indicator frames of every trading pair, computed together
+        
+        With INDICATOR_PANELS the windows of all pairs are refreshed and their
+        indicators computed as one (symbols, bars) panel, instead of once per
+        symbol inside the analysis loop. Otherwise this returns {} and
+        analyze_symbol computes each pair (streaming or from the window).
+        """
+        if not self.config.INDICATOR_PANELS:
+            return {}
+        try:
+            windows = self.market_state.refresh_many(self.config.TRADING_PAIRS, self.config.PRIMARY_TIMEFRAME,
+                                                     limit=500)
+            return indicator_panel.indicator_frames(windows, self.indicator_columns)
+        except Exception as e:
+            logger.error(f"Error computing indicators for the trading pairs: {e}")
+            return {}
+    
+    def process_symbol(self, symbol: str, df: Optional[pd.DataFrame] = None):
+        """Analyze a trading pair and trade on its enhanced signal"""
+        logger.info(f"\n{'='*60}")
+        logger.info(f"Analyzing {symbol}...")
+        logger.info(f"{'='*60}")
+        
+        try:
+            analysis = self.analyze_symbol(symbol, df)
+            
+            if analysis['status'] != 'success':
+                logger.error(f"Failed to analyze {symbol}: {analysis.get('message')}")
+                return
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol}: {e}", exc_info=True)
+            return
+        
+        # Get the enhanced signal (combines all strategies + ML)
+        signal_data = analysis['enhanced_signal']
+        signal = signal_data['signal']
+        confidence = signal_data['confidence']
+        
+        logger.info(f"Signal: {signal} (Confidence: {confidence:.2%})")
+        logger.info(f"ML Prediction: {analysis['ml_prediction']['signal']} "
+                   f"({analysis['ml_prediction']['prediction']:.2%})")
+        logger.info(f"Market Sentiment: {analysis['sentiment']['interpretation']} "
+                   f"(Score: {analysis['sentiment']['sentiment_score']:.0f})")
+        
+        # Check if we should trade
+        if signal in ['BUY', 'STRONG_BUY', 'SELL', 'STRONG_SELL']:
+            if confidence >= self.config.PREDICTION_CONFIDENCE_THRESHOLD:
+                with self.lock:
+                    self.execute_trade(symbol, signal, confidence, analysis['current_price'])
+            else:
+                logger.info(f"Signal confidence too low: {confidence:.2%}")
+        else:
+            logger.info("Holding - no strong signal")
+    
     def print_portfolio_summary(self):
         """Print current portfolio status"""
-        current_prices = {}
-        for symbol in self.config.TRADING_PAIRS:
-            ticker = self.data_fetcher.get_ticker(symbol)
-            if ticker:
-                current_prices[symbol] = ticker['last']
+        current_prices = self.data_fetcher.get_last_prices(self.config.TRADING_PAIRS)
         
         portfolio = self.risk_manager.get_portfolio_summary(current_prices)
         stats = self.risk_manager.get_performance_stats()
@@ -368,6 +490,9 @@ class CryptoTradingBot:
         
         self.is_running = True
         
+        # Exit checks and candle-close analysis between cycles come from the market feed
+        self.start_market_feed()
+        
         # Run first cycle immediately
         try:
             self.trading_cycle()
@@ -391,14 +516,15 @@ class CryptoTradingBot:
     def stop(self):
         """Stop the trading bot"""
         self.is_running = False
+        self.stop_market_feed()
         
         # Close all positions
         logger.info("Closing all positions...")
-        for position_id in list(self.risk_manager.open_positions.keys()):
-            position = self.risk_manager.open_positions[position_id]
-            ticker = self.data_fetcher.get_ticker(position['symbol'])
-            if ticker:
-                self.risk_manager.close_position(position_id, ticker['last'], 'Bot Stopped')
+        open_positions = list(self.risk_manager.open_positions.items())
+        current_prices = self.data_fetcher.get_last_prices([position['symbol'] for _, position in open_positions])
+        for position_id, position in open_positions:
+            if position['symbol'] in current_prices:
+                self.risk_manager.close_position(position_id, current_prices[position['symbol']], 'Bot Stopped')
         
         # Print final stats
         logger.info("\n" + "="*60)
@@ -1,21 +1,40 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
 import logging
 from config import Config
+from src.data_fetcher import as_frame
+from src.rolling_extremes import window_max, window_min
 
 logger = logging.getLogger(__name__)
 
 class TradingStrategies:
     """Collection of trading strategies"""
     
+    # Indicator columns each strategy reads (ml_enhanced_strategy combines all four)
+    REQUIRED_COLUMNS = {
+        'trend_following': ('ema_9', 'ema_21', 'macd', 'macd_signal', 'adx', 'adx_pos', 'adx_neg'),
+        'mean_reversion': ('bb_upper', 'bb_lower', 'rsi', 'stoch_k', 'stoch_d', 'williams_r'),
+        'breakout': ('resistance', 'support', 'volume_sma', 'price_momentum_5'),
+        'volume_analysis': ('obv', 'vwap')
+    }
+    
     def __init__(self):
         self.config = Config()
     
+    @classmethod
+    def required_columns(cls, strategies: Sequence[str] = None) -> Tuple[str, ...]:
+        """Indicator columns read by the given strategies (default: all of them)"""
+        columns = []
+        for strategy in strategies or cls.REQUIRED_COLUMNS:
+            columns.extend(c for c in cls.REQUIRED_COLUMNS[strategy] if c not in columns)
+        return tuple(columns)
+    
     def trend_following_strategy(self, df: pd.DataFrame) -> Dict:
         """
         Trend Following Strategy using EMAs and MACD
         """
+        df = as_frame(df)
         try:
             latest = df.iloc[-1]
             prev = df.iloc[-2] if len(df) > 1 else latest
@@ -51,6 +70,7 @@ class TradingStrategies:
         """
         Mean Reversion Strategy using Bollinger Bands and RSI
         """
+        df = as_frame(df)
         try:
             latest = df.iloc[-1]
             
@@ -94,17 +114,25 @@ class TradingStrategies:
         """
         Breakout Strategy using Support/Resistance and Volume
         """
+        df = as_frame(df)
         try:
             latest = df.iloc[-1]
             
             signals = []
             
-            # Support/Resistance Breakout
-            resistance = df['high'].rolling(window=20).max().iloc[-1]
-            support = df['low'].rolling(window=20).min().iloc[-1]
-            
+            # Support/Resistance Breakout (20-bar levels, from the indicator columns when present)
+            if 'resistance' in df and 'support' in df:
+                resistance = latest['resistance']
+                support = latest['support']
+            else:
+                resistance = window_max(df['high'].to_numpy(dtype=np.float64), 20)
+                support = window_min(df['low'].to_numpy(dtype=np.float64), 20)
+
             # Volume confirmation
-            avg_volume = df['volume'].rolling(window=20).mean().iloc[-1]
+            if 'volume_sma' in df:
+                avg_volume = latest['volume_sma']
+            else:
+                avg_volume = df['volume'].rolling(window=20).mean().iloc[-1]
             volume_spike = latest['volume'] > avg_volume * 1.5
             
             if latest['close'] > resistance and volume_spike:
@@ -128,6 +156,7 @@ class TradingStrategies:
         """
         Volume-based Strategy using OBV and Volume trends
         """
+        df = as_frame(df)
         try:
             latest = df.iloc[-1]
             prev = df.iloc[-2] if len(df) > 1 else latest
@@ -153,16 +182,24 @@ class TradingStrategies:
             logger.error(f"Error in volume analysis strategy: {e}")
             return {'signal': 'HOLD', 'confidence': 0, 'strategy': 'Volume Analysis'}
     
-    def ml_enhanced_strategy(self, df: pd.DataFrame, ml_prediction: Dict) -> Dict:
+    def ml_enhanced_strategy(self, df: pd.DataFrame, ml_prediction: Dict,
+                             components: Optional[Dict[str, Dict]] = None) -> Dict:
         """
         ML-Enhanced Strategy combining traditional signals with ML predictions
+
+        Args:
+            components: Signals the caller already computed on the same frame, by
+                        strategy name (trend_following, mean_reversion, breakout,
+                        volume_analysis); the missing ones are computed here
         """
+        df = as_frame(df)
         try:
             # Get traditional strategy signals
-            trend = self.trend_following_strategy(df)
-            mean_rev = self.mean_reversion_strategy(df)
-            breakout = self.breakout_strategy(df)
-            volume = self.volume_analysis_strategy(df)
+            components = components or {}
+            trend = components.get('trend_following') or self.trend_following_strategy(df)
+            mean_rev = components.get('mean_reversion') or self.mean_reversion_strategy(df)
+            breakout = components.get('breakout') or self.breakout_strategy(df)
+            volume = components.get('volume_analysis') or self.volume_analysis_strategy(df)
             
             # Weight each strategy
             strategies = [
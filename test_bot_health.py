@@ -28,10 +28,10 @@ def test_exchange_connection():
     """Test if exchange connection works"""
     print_status("Testing exchange connection...", "TESTING")
     try:
-        from src.data_fetcher import MarketDataFetcher
+        from src.data_fetcher import get_shared_fetcher
         
         start = time.time()
-        fetcher = MarketDataFetcher()
+        fetcher = get_shared_fetcher()
         elapsed = time.time() - start
         
         print_status(f"Connected to {fetcher.exchange_name} in {elapsed:.2f}s", "SUCCESS")
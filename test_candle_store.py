@@ -0,0 +1,104 @@
+"""
+Candle store and incremental (gap-fill) fetch planning
+
+Checks CandleStore upserts and range queries on an in-memory database and
+which part of a window MarketDataFetcher._plan_incremental_fetch asks the
+exchange for: nothing stored, a contiguous stored window, a window with a
+gap and a stale one. No network, the exchange clock is fixed.
+Run with pytest: python -m pytest test_candle_store.py
+"""
+import ccxt
+
+from src.candle_store import CandleStore
+from src.data_fetcher import MarketDataFetcher
+
+TF_MS = 900_000  # 15m
+NOW = 1_700_000_000_000 // TF_MS * TF_MS + 300_000  # 5 minutes into a 15m bar
+CURRENT_BAR = NOW - NOW % TF_MS
+
+
+class FixedClockExchange:
+    """The two exchange helpers the planner reads, at a fixed time"""
+    parse_timeframe = staticmethod(ccxt.Exchange.parse_timeframe)
+
+    def milliseconds(self) -> int:
+        return NOW
+
+
+def bars(start: int, count: int, skip=()):
+    """`count` 15m bars from start, leaving out the indices in skip"""
+    return [[start + i * TF_MS, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(count) if i not in skip]
+
+
+def make_fetcher(store: CandleStore) -> MarketDataFetcher:
+    # Planning needs no connection, so the exchange is not opened
+    fetcher = object.__new__(MarketDataFetcher)
+    fetcher.exchange = FixedClockExchange()
+    fetcher.exchange_name = 'test'
+    fetcher.candle_store = store
+    return fetcher
+
+
+def test_store_upsert_and_ranges():
+    store = CandleStore(':memory:')
+    store.upsert('test', 'BTC/USDT', '15m', bars(CURRENT_BAR - 9 * TF_MS, 10))
+    # Upserting a bar again replaces it instead of adding a row
+    store.upsert('test', 'BTC/USDT', '15m', [[CURRENT_BAR, 1.0, 3.0, 0.5, 2.5, 20.0]])
+    assert store.last_timestamp('test', 'BTC/USDT', '15m') == CURRENT_BAR
+    assert store.count('test', 'BTC/USDT', '15m', CURRENT_BAR - 9 * TF_MS, CURRENT_BAR) == 10
+    loaded = store.load('test', 'BTC/USDT', '15m', limit=3)
+    assert [bar[0] for bar in loaded] == [CURRENT_BAR - 2 * TF_MS, CURRENT_BAR - TF_MS, CURRENT_BAR]
+    assert loaded[-1][4] == 2.5
+    # Series are keyed by exchange, symbol and timeframe
+    assert store.last_timestamp('other', 'BTC/USDT', '15m') is None
+    assert store.load('test', 'BTC/USDT', '1h') == []
+
+
+def test_plan_full_fetch_when_nothing_stored():
+    fetcher = make_fetcher(CandleStore(':memory:'))
+    assert fetcher._plan_incremental_fetch('BTC/USDT', '15m', 100) == (None, 100, False)
+
+
+def test_plan_fetches_only_new_bars():
+    store = CandleStore(':memory:')
+    # Contiguous window whose newest bar closed three bars ago
+    last = CURRENT_BAR - 3 * TF_MS
+    store.upsert('test', 'BTC/USDT', '15m', bars(last - 99 * TF_MS, 100))
+    since, limit, serve_from_store = make_fetcher(store)._plan_incremental_fetch('BTC/USDT', '15m', 100)
+    # The newest stored bar is fetched again (it may have been forming), then the three after it
+    assert (since, limit, serve_from_store) == (last, 4, True)
+
+
+def test_plan_refetches_forming_bar_only():
+    store = CandleStore(':memory:')
+    store.upsert('test', 'BTC/USDT', '15m', bars(CURRENT_BAR - 99 * TF_MS, 100))
+    assert make_fetcher(store)._plan_incremental_fetch('BTC/USDT', '15m', 100) == (CURRENT_BAR, 2, True)
+
+
+def test_plan_full_fetch_when_window_has_gap():
+    store = CandleStore(':memory:')
+    store.upsert('test', 'BTC/USDT', '15m', bars(CURRENT_BAR - 99 * TF_MS, 100, skip={50}))
+    assert make_fetcher(store)._plan_incremental_fetch('BTC/USDT', '15m', 100) == (None, 100, False)
+
+
+def test_plan_ignores_bars_before_window():
+    store = CandleStore(':memory:')
+    # A gap older than the requested window does not matter
+    store.upsert('test', 'BTC/USDT', '15m', bars(CURRENT_BAR - 199 * TF_MS, 200, skip={10}))
+    assert make_fetcher(store)._plan_incremental_fetch('BTC/USDT', '15m', 100) == (CURRENT_BAR, 2, True)
+
+
+def test_plan_full_fetch_when_store_is_stale():
+    store = CandleStore(':memory:')
+    # Newest stored bar is older than the start of the requested window
+    store.upsert('test', 'BTC/USDT', '15m', bars(CURRENT_BAR - 300 * TF_MS, 100))
+    assert make_fetcher(store)._plan_incremental_fetch('BTC/USDT', '15m', 100) == (None, 100, False)
+
+
+def test_plan_caps_catch_up_at_limit():
+    store = CandleStore(':memory:')
+    # Last bar is inside the window but most of the window is missing
+    last = CURRENT_BAR - 80 * TF_MS
+    store.upsert('test', 'BTC/USDT', '15m', bars(last - 50 * TF_MS, 51))
+    since, limit, serve_from_store = make_fetcher(store)._plan_incremental_fetch('BTC/USDT', '15m', 100)
+    assert (since, limit, serve_from_store) == (last, 81, True)
@@ -0,0 +1,121 @@
+"""
+Exchange recording and offline replay
+
+A scripted exchange is recorded with RecordingExchange, then the log is
+served by ReplayExchange: exact matches in recorded order, fallback to the
+same method and symbol, then to the same method, repetition of the last
+response, recorded errors and the replayed clock.
+Run with pytest: python -m pytest test_exchange_recorder.py
+"""
+import ccxt
+import pytest
+
+from src.exchange_recorder import RecordingExchange, ReplayExchange, ReplayMissError
+
+START = 1_700_000_000_000
+
+
+class ScriptedExchange:
+    """Deterministic responses; the clock advances one second per call"""
+    id = 'binance'  # ReplayExchange rebuilds an offline ccxt client of this id
+
+    def __init__(self):
+        self.now = START
+        self.ticks = 0
+
+    def milliseconds(self) -> int:
+        return self.now
+
+    def _tick(self):
+        self.now += 1000
+
+    def fetch_ticker(self, symbol):
+        self._tick()
+        self.ticks += 1
+        return {'symbol': symbol, 'last': 100.0 + self.ticks}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        self._tick()
+        return [[since or self.now, 1.0, 2.0, 0.5, 1.5, float(limit or 0)]]
+
+    def fetch_order_book(self, symbol, limit=None):
+        self._tick()
+        raise ccxt.RequestTimeout('order book timed out')
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Path of a recording of a short scripted session"""
+    path = str(tmp_path / 'session.jsonl.gz')
+    exchange = RecordingExchange(ScriptedExchange(), path)
+    exchange.fetch_ticker('BTC/USDT')                      # t = START     -> last 101
+    exchange.fetch_ticker('BTC/USDT')                      # t = START + 1s -> last 102
+    exchange.fetch_ticker('ETH/USDT')                      # t = START + 2s -> last 103
+    exchange.fetch_ohlcv('BTC/USDT', '1m', START, 10)      # t = START + 3s
+    with pytest.raises(ccxt.RequestTimeout):
+        exchange.fetch_order_book('BTC/USDT', 5)           # t = START + 4s
+    assert exchange.calls_recorded == 5
+    exchange.close()
+    return path
+
+
+def test_exact_matches_in_recorded_order(recording):
+    replay = ReplayExchange(recording)
+    assert replay.id == 'binance'
+    assert replay.fetch_ticker('ETH/USDT')['last'] == 103
+    assert replay.fetch_ticker('BTC/USDT')['last'] == 101
+    assert replay.fetch_ticker('BTC/USDT')['last'] == 102
+    # Every fetch_ticker response served: the last one for these arguments is repeated
+    assert replay.fetch_ticker('BTC/USDT')['last'] == 102
+    assert replay.fetch_ticker('ETH/USDT')['last'] == 103
+
+
+def test_fallback_to_same_method_and_symbol(recording):
+    replay = ReplayExchange(recording)
+    # A `since` computed from another clock still gets the recorded candles of the symbol
+    candles = replay.fetch_ohlcv('BTC/USDT', '1m', START + 60_000, 10)
+    assert candles == [[START, 1.0, 2.0, 0.5, 1.5, 10.0]]
+
+
+def test_fallback_to_same_method(recording):
+    replay = ReplayExchange(recording)
+    # Unknown symbol: the next unserved fetch_ticker response
+    assert replay.fetch_ticker('SOL/USDT')['last'] == 101
+    # Already served responses are not handed out twice
+    assert replay.fetch_ticker('BTC/USDT')['last'] == 102
+    assert replay.stats()['misses'] == 0
+
+
+def test_recorded_errors_raised_again(recording):
+    replay = ReplayExchange(recording)
+    with pytest.raises(ccxt.RequestTimeout, match='order book timed out'):
+        replay.fetch_order_book('BTC/USDT', 5)
+
+
+def test_unrecorded_method_misses(recording):
+    replay = ReplayExchange(recording)
+    with pytest.raises(ReplayMissError):
+        replay.fetch_trades('BTC/USDT')
+    assert replay.stats()['misses'] == 1
+
+
+def test_clock_follows_recording(recording):
+    replay = ReplayExchange(recording)
+    assert replay.milliseconds() == START
+    replay.fetch_ticker('BTC/USDT')
+    assert replay.milliseconds() == START + 1000
+    # Replaying a later call moves the clock past it, earlier unserved calls do not hold it back
+    replay.fetch_ohlcv('BTC/USDT', '1m', START, 10)
+    assert replay.milliseconds() == START + 4000
+    replay.fetch_ticker('BTC/USDT')
+    assert replay.milliseconds() == START + 4000
+    # Local ccxt helpers come from the offline client
+    assert replay.parse_timeframe('15m') == 900
+
+
+def test_responses_are_copies(recording):
+    replay = ReplayExchange(recording)
+    replay.fetch_ohlcv('BTC/USDT', '1m', START, 10)[0][4] = 0
+    assert replay.fetch_ohlcv('BTC/USDT', '1m', START, 10)[0][4] == 1.5
+    stats = replay.stats()
+    assert stats['recorded_calls'] == 5 and stats['calls_replayed'] == 2
@@ -33,8 +33,8 @@ except Exception as e:
 # Test 2: Market Data Fetcher
 print(f"\n{Fore.YELLOW}[2/8] Testing Market Data Fetcher...")
 try:
-    from src.data_fetcher import MarketDataFetcher
-    fetcher = MarketDataFetcher()
+    from src.data_fetcher import get_shared_fetcher
+    fetcher = get_shared_fetcher()
     print(f"{Fore.GREEN}[OK] Data fetcher initialized")
     print(f"    Exchange: {Fore.CYAN}{fetcher.exchange_name}")
 except Exception as e:
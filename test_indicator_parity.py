@@ -0,0 +1,146 @@
+"""
+Parity check between the ta and NumPy indicator backends
+
+Runs TechnicalIndicators.add_all_indicators with INDICATOR_BACKEND='ta' and
+'numpy' on the same synthetic candles and compares every column, and checks
+that indicator panels (many symbols at once) match the per-symbol results
+and the rolling max/min kernels match pandas.
+Run with pytest or directly: python test_indicator_parity.py
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from src.data_fetcher import Candles
+from src.indicator_panel import IndicatorPanel, indicator_frames
+from src.rolling_extremes import RollingExtreme, rolling_max, rolling_min, window_max, window_min
+from src.technical_indicators import TechnicalIndicators
+
+# pandas' rolling variance drifts by ~1e-8 relative over 100k rows, the NumPy backend does not
+RTOL = 1e-7
+ATOL = 1e-7
+
+
+def make_candles(rows: int, seed: int = 7) -> Candles:
+    """Random-walk 15m candles around 30000"""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, rows)))
+    open_ = np.concatenate((close[:1], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, rows))
+    volume = rng.uniform(1, 100, rows)
+    # A flat stretch exercises the zero-range branches of stochastics, Williams %R and ADX
+    # (shorter than the Bollinger window, whose width would be 0 up to rounding noise)
+    if rows > 60:
+        open_[40:55] = high[40:55] = low[40:55] = close[40:55] = close[39]
+    timestamps = 1_700_000_000_000 + np.arange(rows, dtype=np.int64) * 900_000
+    return Candles(timestamps, np.vstack([open_, high, low, close, volume]))
+
+
+def compute(candles: Candles, backend: str):
+    previous = Config.INDICATOR_BACKEND
+    Config.INDICATOR_BACKEND = backend
+    try:
+        return TechnicalIndicators.add_all_indicators(candles)
+    finally:
+        Config.INDICATOR_BACKEND = previous
+
+
+def assert_parity(rows: int):
+    candles = make_candles(rows)
+    expected = compute(candles, 'ta')
+    actual = compute(candles, 'numpy')
+    assert list(actual.columns) == list(expected.columns), f"{rows} rows: columns differ"
+    for column in expected.columns:
+        assert actual[column].dtype == expected[column].dtype, f"{rows} rows: {column} dtype differs"
+        np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   rtol=RTOL, atol=ATOL, err_msg=f"{rows} rows: {column}")
+
+
+def test_parity_short_histories():
+    # Below 14 bars ta leaves out ATR, below 28 bars ADX
+    for rows in (0, 1, 5, 13, 14, 27, 28, 29):
+        assert_parity(rows)
+
+
+def test_parity_live_window():
+    assert_parity(500)
+
+
+def test_parity_long_history():
+    assert_parity(100_000)
+
+
+def test_recompute_replaces_columns():
+    candles = make_candles(300)
+    first = compute(candles, 'numpy')
+    again = compute(first, 'numpy')
+    assert list(again.columns) == list(first.columns)
+    assert again.equals(first)
+
+
+def test_panel_matches_per_symbol():
+    # Mixed history lengths are split into one panel per length, short ones lack ADX / ATR
+    candles = {f'SYM{seed}/USDT': make_candles(rows, seed=seed)
+               for seed, rows in enumerate((500, 500, 500, 120, 120, 20, 0))}
+    frames = indicator_frames(candles)
+    assert set(frames) == {symbol for symbol, window in candles.items() if len(window)}
+    for symbol, frame in frames.items():
+        expected = compute(candles[symbol], 'numpy')
+        assert list(frame.columns) == list(expected.columns), f"{symbol}: columns differ"
+        assert frame.index.equals(expected.index), f"{symbol}: index differs"
+        np.testing.assert_allclose(frame.to_numpy(), expected.to_numpy(dtype=float),
+                                   rtol=1e-12, atol=1e-12, err_msg=symbol)
+
+
+def test_panel_columns():
+    candles = {f'SYM{seed}/USDT': make_candles(300, seed=seed) for seed in range(4)}
+    panel = IndicatorPanel.from_candles(candles, ['rsi', 'macd'])
+    assert panel.columns == Candles.COLUMNS + ('rsi', 'macd')
+    assert panel['rsi'].shape == (4, 300)
+    assert panel.latest('close') == {symbol: window.close[-1] for symbol, window in candles.items()}
+
+
+def test_rolling_extremes_match_pandas():
+    values = make_candles(300).close.copy()
+    values[100] = np.nan  # Windows holding a NaN are NaN, like pandas
+    for window in (1, 2, 3, 14, 20, 64, 299, 300, 301):
+        series = pd.Series(values).rolling(window)
+        np.testing.assert_array_equal(rolling_max(values, window), series.max().to_numpy(), err_msg=f"max {window}")
+        np.testing.assert_array_equal(rolling_min(values, window), series.min().to_numpy(), err_msg=f"min {window}")
+    panel = np.stack([make_candles(250, seed=seed).high for seed in range(3)])
+    for row in range(3):
+        np.testing.assert_array_equal(rolling_max(panel, 14)[row], rolling_max(panel[row], 14))
+
+
+def test_streaming_extremes_match_batch():
+    highs = make_candles(200).high
+    expected = rolling_max(highs, 20)
+    engine = RollingExtreme(20, maximum=True)
+    for position, high in enumerate(highs):
+        # A forming bar is evaluated without being stored, then committed when it closes
+        np.testing.assert_array_equal(engine.update(high, commit=False), expected[position])
+        np.testing.assert_array_equal(engine.update(high), expected[position])
+        np.testing.assert_array_equal(window_max(highs[:position + 1], 20), expected[position])
+    lows = make_candles(200).low
+    assert window_min(lows, 20) == rolling_min(lows, 20)[-1]
+
+
+if __name__ == '__main__':
+    # The ta backend logs errors for the short histories, those are expected
+    logging.basicConfig(level=logging.CRITICAL)
+    tests = [test_parity_short_histories, test_parity_live_window, test_parity_long_history,
+             test_recompute_replaces_columns, test_panel_matches_per_symbol, test_panel_columns,
+             test_rolling_extremes_match_pandas, test_streaming_extremes_match_batch]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    raise SystemExit(1 if failed else 0)
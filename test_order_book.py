@@ -0,0 +1,96 @@
+"""
+OrderBook: snapshots, incremental diffs and market order cost
+
+Expected fill prices and slippage are worked out by hand on a small book:
+bids 100 x 1, 99 x 3 and asks 101 x 1, 102 x 2, 105 x 5 (mid 100.5).
+Run with pytest: python -m pytest test_order_book.py
+"""
+import numpy as np
+import pytest
+
+from src.order_book import OrderBook
+
+
+def make_book(max_depth: int = None) -> OrderBook:
+    book = OrderBook('BTC/USDT', max_depth)
+    # Unsorted on purpose, the book sorts each side best first
+    book.apply_snapshot(bids=[[99, 3], [100, 1]], asks=[[102, 2], [101, 1], [105, 5]], timestamp=1, nonce=10)
+    return book
+
+
+def test_snapshot_sorted_best_first():
+    book = make_book()
+    assert book.bid_prices.tolist() == [100, 99]
+    assert book.ask_prices.tolist() == [101, 102, 105]
+    assert book.ask_sizes.tolist() == [1, 2, 5]
+    assert (book.best_bid, book.best_ask, book.mid) == (100, 101, 100.5)
+    assert book.spread_bps == pytest.approx(1 / 100.5 * 1e4)
+
+
+def test_diff_sets_and_removes_levels():
+    book = make_book()
+    # Size 0 removes 100, 99.5 is a new level, 101 changes size
+    assert book.apply_diff(bids=[[100, 0], [99.5, 2]], asks=[[101, 3]], timestamp=2, nonce=11)
+    assert book.bid_prices.tolist() == [99.5, 99]
+    assert book.bid_sizes.tolist() == [2, 3]
+    assert book.ask_sizes.tolist() == [3, 2, 5]
+    assert (book.timestamp, book.nonce) == (2, 11)
+
+
+def test_stale_diff_is_ignored():
+    book = make_book()
+    assert not book.apply_diff(asks=[[101, 0]], nonce=10)
+    assert book.ask_prices.tolist() == [101, 102, 105]
+    assert book.nonce == 10
+
+
+def test_diff_emptying_a_side():
+    book = make_book()
+    book.apply_diff(bids=[[100, 0], [99, 0]])
+    assert book.empty
+    assert book.mid is None
+    assert book.slippage_bps('buy', amount=1) is None
+
+
+def test_max_depth():
+    book = make_book(max_depth=2)
+    assert book.ask_prices.tolist() == [101, 102]
+    book.apply_diff(asks=[[100.5, 1]])
+    assert book.ask_prices.tolist() == [100.5, 101]
+
+
+def test_fill_price_walks_levels():
+    book = make_book()
+    # 1 @ 101 + 1 @ 102
+    assert book.fill_price('buy', amount=2) == pytest.approx(101.5)
+    # 1 @ 100 + 3 @ 99
+    assert book.fill_price('sell', amount=4) == pytest.approx(99.25)
+    # 101 quote buys exactly the first ask level, 305 also takes the whole second one
+    assert book.fill_price('buy', notional=101) == pytest.approx(101)
+    assert book.fill_price('buy', notional=305) == pytest.approx(305 / 3)
+
+
+def test_slippage_bps():
+    book = make_book()
+    assert book.slippage_bps('buy', amount=2) == pytest.approx((101.5 - 100.5) / 100.5 * 1e4)
+    assert book.slippage_bps('sell', amount=4) == pytest.approx((100.5 - 99.25) / 100.5 * 1e4)
+    # A partial fill of the last level touched: 1 @ 101 + 0.5 @ 102
+    assert book.slippage_bps('buy', amount=1.5) == pytest.approx((152 / 1.5 - 100.5) / 100.5 * 1e4)
+
+
+def test_slippage_when_book_too_thin():
+    book = make_book()
+    assert book.fill_price('buy', amount=8.5) is None
+    assert book.slippage_bps('sell', notional=1e6) is None
+    with pytest.raises(ValueError):
+        book.fill_price('buy')
+
+
+def test_depth_and_imbalance():
+    book = make_book()
+    assert book.depth_within() == (4, 8)
+    # Within 100 bps of 100.5: bids down to 99.495, asks up to 101.505
+    assert book.depth_within(100) == (1, 1)
+    assert book.imbalance() == pytest.approx((4 - 8) / 12)
+    prices, depth = book.cumulative_depth('asks', notional=True)
+    assert np.allclose(depth, [101, 305, 830])
@@ -0,0 +1,115 @@
+"""
+QuoteCache: TTL expiry, batching and request coalescing
+
+Loads are plain functions that count their calls; the coalescing test
+holds a load open on an Event until a second caller is waiting on it, so
+no timing assumptions are involved.
+Run with pytest: python -m pytest test_quote_cache.py
+"""
+import threading
+import time
+
+from src.quote_cache import QuoteCache
+
+
+class CountingLoad:
+    """get_many loader returning key * 10 for each key, logging the key lists it was called with"""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+
+    def __call__(self, keys):
+        self.calls.append(list(keys))
+        return {key: key * 10 for key in keys if key not in self.missing}
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_hit_within_ttl():
+    cache = QuoteCache(ttl_seconds=60)
+    load = CountingLoad()
+    assert cache.get_many([1, 2], load) == {1: 10, 2: 20}
+    assert cache.get_many([1, 2], load) == {1: 10, 2: 20}
+    assert load.calls == [[1, 2]]
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 2
+
+
+def test_expired_entries_are_loaded_again():
+    cache = QuoteCache(ttl_seconds=0)
+    load = CountingLoad()
+    cache.get_many([1], load)
+    cache.get_many([1], load)
+    assert load.calls == [[1], [1]]
+
+
+def test_only_misses_are_loaded_in_one_call():
+    cache = QuoteCache(ttl_seconds=60)
+    load = CountingLoad()
+    cache.get_many([1], load)
+    assert cache.get_many([1, 2, 3, 2], load) == {1: 10, 2: 20, 3: 30}
+    assert load.calls == [[1], [2, 3]]
+
+
+def test_failed_loads_are_not_cached():
+    cache = QuoteCache(ttl_seconds=60)
+    load = CountingLoad(missing={2})
+    assert cache.get_many([1, 2], load) == {1: 10}
+    load.missing.clear()
+    assert cache.get_many([1, 2], load) == {1: 10, 2: 20}
+    assert load.calls == [[1, 2], [2]]
+
+
+def test_failing_load_releases_keys():
+    cache = QuoteCache(ttl_seconds=60)
+
+    def broken(keys):
+        raise RuntimeError('exchange down')
+
+    try:
+        cache.get_many([1], broken)
+    except RuntimeError:
+        pass
+    # The key is not stuck in flight, the next caller loads it
+    assert cache.get(1, lambda: 7) == 7
+
+
+def test_invalidate():
+    cache = QuoteCache(ttl_seconds=60)
+    load = CountingLoad()
+    cache.get_many([1, 2], load)
+    cache.invalidate([1])
+    cache.get_many([1, 2], load)
+    cache.invalidate()
+    cache.get_many([2], load)
+    assert load.calls == [[1, 2], [1], [2]]
+
+
+def test_concurrent_requests_are_coalesced():
+    cache = QuoteCache(ttl_seconds=60)
+    release = threading.Event()
+    calls = []
+
+    def slow_load(keys):
+        calls.append(list(keys))
+        release.wait(5)
+        return {key: 'quote' for key in keys}
+
+    results = {}
+    first = threading.Thread(target=lambda: results.setdefault('first', cache.get_many(['BTC'], slow_load)))
+    first.start()
+    wait_until(lambda: calls)
+    second = threading.Thread(target=lambda: results.setdefault('second', cache.get_many(['BTC'], slow_load)))
+    second.start()
+    wait_until(lambda: cache.stats()['coalesced'] == 1)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert calls == [['BTC']]
+    assert results == {'first': {'BTC': 'quote'}, 'second': {'BTC': 'quote'}}
@@ -0,0 +1,96 @@
+"""
+RateLimiter: weighted token bucket with a priority queue
+
+The ordering test empties the bucket with a penalty, queues one waiter per
+priority (lowest first) and checks they are served highest priority first.
+The bucket holds one request's weight and refills it every 0.1s, so grants
+are spaced out and their order is observable.
+Run with pytest: python -m pytest test_rate_limiter.py
+"""
+import threading
+import time
+
+from src.rate_limiter import Priority, RateLimiter, request_priority
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_no_wait_with_headroom():
+    limiter = RateLimiter(6000)
+    for _ in range(10):
+        assert limiter.acquire(limiter.weight('fetch_ticker')) < 0.05
+    stats = limiter.stats()
+    assert stats['granted'] == 10 and stats['queued'] == 0
+    assert stats['available_weight'] < limiter.capacity
+
+
+def test_endpoint_weights():
+    limiter = RateLimiter(6000)
+    assert limiter.weight('fetch_tickers') > limiter.weight('fetch_ticker')
+    assert limiter.weight('some_unknown_method') == RateLimiter.DEFAULT_WEIGHT
+
+
+def test_higher_priority_served_first():
+    # 1 weight of burst, refilled every 0.1s
+    limiter = RateLimiter(600, burst_seconds=0.1)
+    limiter.penalize(0.3)
+    served = []
+    lock = threading.Lock()
+
+    def wait(priority: Priority):
+        if priority == Priority.ORDER:
+            # Explicit priority, as orders pass it
+            limiter.acquire(1, priority)
+        else:
+            # Priority of the calling context, as the bots and the dashboard set it
+            with request_priority(priority):
+                limiter.acquire(1)
+        with lock:
+            served.append(priority)
+
+    threads = []
+    for priority in (Priority.DASHBOARD, Priority.ANALYSIS, Priority.EXIT, Priority.ORDER):
+        thread = threading.Thread(target=wait, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: limiter.stats()['queued'] == len(threads))
+    for thread in threads:
+        thread.join(5)
+
+    assert served == [Priority.ORDER, Priority.EXIT, Priority.ANALYSIS, Priority.DASHBOARD]
+    assert limiter.stats()['penalties'] == 1
+
+
+def test_same_priority_first_come_first_served():
+    limiter = RateLimiter(600, burst_seconds=0.1)
+    limiter.penalize(0.2)
+    served = []
+    lock = threading.Lock()
+
+    def wait(name: str):
+        limiter.acquire(1, Priority.ANALYSIS)
+        with lock:
+            served.append(name)
+
+    threads = []
+    for name in ('a', 'b', 'c'):
+        thread = threading.Thread(target=wait, args=(name,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: limiter.stats()['queued'] == len(threads))
+    for thread in threads:
+        thread.join(5)
+
+    assert served == ['a', 'b', 'c']
+
+
+def test_penalty_pauses_callers():
+    limiter = RateLimiter(6000)
+    limiter.penalize(0.2)
+    assert limiter.acquire(1) >= 0.15
+    assert limiter.stats()['waited'] == 1
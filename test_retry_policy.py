@@ -0,0 +1,207 @@
+"""
+Circuit breakers and the exchange guard
+
+Breakers run on a fake clock, so open -> half open -> closed/open
+transitions are checked without sleeping; retry backoff uses a zero delay.
+Failing requests come from a MockExchange whose every call errors.
+Run with pytest: python -m pytest test_retry_policy.py
+"""
+import asyncio
+
+import ccxt
+import pytest
+
+from src.mock_exchange import MockExchange
+from src.retry_policy import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ExchangeGuard,
+                              RetryPolicy, retry_attempts)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Flaky:
+    """Raises `error` for the first `failures` calls, then returns 'ok'"""
+
+    def __init__(self, failures: int, error=ccxt.RequestTimeout):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('simulated')
+        return 'ok'
+
+
+def make_breaker(clock: FakeClock, **settings) -> CircuitBreaker:
+    return CircuitBreaker('test.fetch_ticker', **{'window': 10, 'min_calls': 4, 'failure_rate': 0.5,
+                                                  'open_seconds': 30, 'clock': clock, **settings})
+
+
+def make_guard(clock: FakeClock = None, **settings) -> ExchangeGuard:
+    return ExchangeGuard('test', RetryPolicy(attempts=3, base_delay=0, max_delay=0),
+                         **{'window': 10, 'min_calls': 3, 'failure_rate': 0.5, 'open_seconds': 30,
+                            'clock': clock or FakeClock(), **settings})
+
+
+def test_breaker_opens_at_failure_rate():
+    breaker = make_breaker(FakeClock())
+    for ok in (True, False, True):
+        assert breaker.allow()
+        breaker.record(ok)
+    # Three outcomes are fewer than min_calls, one more failure reaches 2/4
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+    assert breaker.retry_after() == 30
+
+
+def test_breaker_stays_closed_below_failure_rate():
+    breaker = make_breaker(FakeClock())
+    for ok in (True, True, False, True, True, False, True):
+        breaker.record(ok)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_success_closes():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(False)
+    clock.now += 29
+    assert breaker.state == OPEN
+    clock.now += 1
+    assert breaker.state == HALF_OPEN
+    # One probe at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.stats()['transitions'] == {'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1}
+
+
+def test_half_open_probe_failure_reopens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(False)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    # The open period starts again from the failed probe
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.state == HALF_OPEN
+
+
+def test_abandoned_probe():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(False)
+    clock.now += 30
+    assert breaker.allow()
+    # The probe was cancelled without an outcome: another one may go
+    breaker.release()
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A probe that never reports back is replaced after open_seconds
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_min_calls_clamped_to_window():
+    breaker = make_breaker(FakeClock(), window=3, min_calls=10)
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == OPEN
+
+
+def test_sync_call_tries_once_by_default():
+    guard = make_guard()
+    flaky = Flaky(failures=1)
+    with pytest.raises(ccxt.RequestTimeout):
+        guard.call('fetch_ticker', flaky)
+    assert flaky.calls == 1
+    assert guard.call('fetch_ticker', flaky) == 'ok'
+
+
+def test_sync_call_retries_when_asked():
+    guard = make_guard()
+    flaky = Flaky(failures=2)
+    with retry_attempts(3):
+        assert guard.call('fetch_ticker', flaky) == 'ok'
+    assert flaky.calls == 3
+    assert guard.stats()['retries'] == 2
+
+
+def test_retry_attempts_nesting():
+    guard = make_guard()
+    flaky = Flaky(failures=5)
+    # An inner block can lower the tries of an outer one but not raise them, None keeps them
+    with retry_attempts(2):
+        with retry_attempts(4), retry_attempts(None):
+            with pytest.raises(ccxt.RequestTimeout):
+                guard.call('fetch_ticker', flaky)
+    assert flaky.calls == 2
+
+
+def test_orders_and_non_network_errors_not_retried():
+    guard = make_guard()
+    order = Flaky(failures=1)
+    bad_symbol = Flaky(failures=1, error=ccxt.BadSymbol)
+    with retry_attempts(3):
+        with pytest.raises(ccxt.RequestTimeout):
+            guard.call('create_market_order', order)
+        with pytest.raises(ccxt.BadSymbol):
+            guard.call('fetch_ticker', bad_symbol)
+    assert (order.calls, bad_symbol.calls) == (1, 1)
+
+
+def test_open_circuit_rejects_without_request():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    exchange = MockExchange(['BTC/USDT'], error_rate=1.0)
+    for _ in range(3):
+        with pytest.raises(ccxt.NetworkError):
+            guard.call('fetch_ticker', lambda: exchange.fetch_ticker('BTC/USDT'))
+    flaky = Flaky(failures=0)
+    with pytest.raises(CircuitOpenError):
+        guard.call('fetch_ticker', flaky)
+    assert flaky.calls == 0
+    assert guard.stats()['open_circuits'] == ['fetch_ticker']
+    # Other endpoints have their own breaker
+    assert guard.call('fetch_ohlcv', flaky) == 'ok'
+    # After open_seconds a probe goes through and closes the circuit
+    clock.now += 30
+    assert guard.call('fetch_ticker', flaky) == 'ok'
+    assert guard.stats()['open_circuits'] == []
+
+
+def test_rate_limits_do_not_open_circuits():
+    guard = make_guard()
+    for _ in range(5):
+        with pytest.raises(ccxt.RateLimitExceeded):
+            guard.call('fetch_ticker', Flaky(failures=1, error=ccxt.RateLimitExceeded))
+    assert guard.breaker('fetch_ticker').state == CLOSED
+
+
+def test_async_call_retries_per_policy():
+    guard = make_guard()
+    flaky = Flaky(failures=2)
+
+    async def request():
+        return flaky()
+
+    assert asyncio.run(guard.call_async('fetch_ticker', request)) == 'ok'
+    assert flaky.calls == 3
@@ -0,0 +1,70 @@
+"""
+Streaming indicators against batch recomputation
+
+Feeds synthetic candles to StreamingIndicators one bar at a time, each
+forming bar evaluated twice before it closes, through a buffer small enough
+to wrap around, and compares the frame with add_all_indicators over the same
+history, mid-stream and at the end. A catch-up through sync() is checked the
+same way. No network.
+Run with pytest: python -m pytest test_streaming_indicators.py
+"""
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher import Candles
+from src.streaming_indicators import StreamingIndicators
+from src.technical_indicators import TechnicalIndicators
+
+ATOL = 1e-7
+# Running sums of the streaming engine drift a little further than pandas' rolling windows
+STREAM_RTOL = 1e-6
+
+
+def make_candles(rows: int, seed: int = 7) -> Candles:
+    """Random-walk 15m candles around 30000"""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, rows)))
+    open_ = np.concatenate((close[:1], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, rows))
+    volume = rng.uniform(1, 100, rows)
+    # A flat stretch exercises the zero-range branches of stochastics, Williams %R and ADX
+    # (shorter than the Bollinger window, whose width would be 0 up to rounding noise)
+    if rows > 60:
+        open_[40:55] = high[40:55] = low[40:55] = close[40:55] = close[39]
+    timestamps = 1_700_000_000_000 + np.arange(rows, dtype=np.int64) * 900_000
+    return Candles(timestamps, np.vstack([open_, high, low, close, volume]))
+
+
+def assert_matches_batch(frame: pd.DataFrame, candles: Candles, err_msg: str):
+    """A streaming frame equals the newest rows of add_all_indicators over the whole history"""
+    expected = TechnicalIndicators.add_all_indicators(candles).iloc[-len(frame):]
+    assert list(frame.columns) == list(expected.columns), f"{err_msg}: columns differ"
+    np.testing.assert_array_equal(frame.index.asi8, expected.index.asi8, err_msg=f"{err_msg}: timestamps")
+    for column in expected.columns:
+        np.testing.assert_allclose(frame[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   rtol=STREAM_RTOL, atol=ATOL, err_msg=f"{err_msg}: {column}")
+
+
+def test_streaming_matches_batch():
+    candles = make_candles(700)
+    # 700 bars through a 250 bar buffer: the window wraps around twice
+    engine = StreamingIndicators(capacity=250)
+    for position in range(len(candles)):
+        timestamp, bar = int(candles.timestamps[position]), candles.values[:, position]
+        # The forming bar is re-evaluated on every tick before it closes
+        opening = np.array([bar[0], bar[0], bar[0], bar[0], bar[4] / 3])
+        engine.set_forming(timestamp, opening)
+        engine.set_forming(timestamp, bar)
+        if position in (260, 699):
+            assert_matches_batch(engine.frame(), candles[:position + 1], f"forming bar {position}")
+        if position < len(candles) - 1:
+            engine.append(timestamp, bar)
+    assert len(engine.frame()) == 250 + 1  # Capacity closed bars and the forming one
+
+    # Catching up with a window in one go (as MarketState does) gives the same values
+    synced = StreamingIndicators(capacity=250)
+    synced.sync(candles[:400])
+    synced.sync(candles)
+    assert_matches_batch(synced.frame(), candles, "sync")
+    assert_matches_batch(synced.frame(100), candles, "sync, limit")
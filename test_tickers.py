@@ -0,0 +1,105 @@
+"""
+Bulk ticker reads (MarketDataFetcher.get_tickers / get_last_prices)
+
+A stub exchange registered in the shared exchange registry answers the
+ticker endpoints and records every call, so the tests check how many
+requests a batch of symbols costs: one fetch_tickers call where the
+exchange has it, one fetch_ticker per symbol otherwise. No network.
+Run with pytest: python -m pytest test_tickers.py
+"""
+import itertools
+
+import ccxt
+
+from config import Config
+from src.data_fetcher import MarketDataFetcher
+from src.exchange_registry import exchange_registry
+
+PRICES = {'BTC/USDT': 60000.0, 'ETH/USDT': 3000.0, 'SOL/USDT': 150.0}
+
+_names = itertools.count()
+
+
+class StubExchange:
+    """Ticker endpoints over PRICES, logging each call"""
+    id = 'stub'
+    markets = {}
+
+    def __init__(self, bulk: bool = True, bulk_error: Exception = None):
+        self.has = {'fetchTickers': bulk}
+        self.bulk_error = bulk_error
+        self.calls = []
+
+    def load_markets(self):
+        return self.markets
+
+    def milliseconds(self) -> int:
+        return 1_700_000_000_000
+
+    def _ticker(self, symbol: str) -> dict:
+        price = PRICES[symbol]
+        return {'symbol': symbol, 'last': price, 'bid': price - 1, 'ask': price + 1,
+                'quoteVolume': 1000.0, 'baseVolume': 10.0, 'percentage': 1.5}
+
+    def fetch_tickers(self, symbols=None):
+        self.calls.append(('fetch_tickers', tuple(symbols)))
+        if self.bulk_error is not None:
+            raise self.bulk_error
+        return {symbol: self._ticker(symbol) for symbol in symbols if symbol in PRICES}
+
+    def fetch_ticker(self, symbol):
+        self.calls.append(('fetch_ticker', symbol))
+        if symbol not in PRICES:
+            raise ccxt.BadSymbol(f"stub does not have market symbol {symbol}")
+        return self._ticker(symbol)
+
+
+def make_fetcher(exchange: StubExchange) -> MarketDataFetcher:
+    """Fetcher on its own registry entry for exchange, without a candle store"""
+    name = f"stub-{next(_names)}"
+    exchange_registry.get_exchange(name, lambda: (name, exchange, {}))
+    previous = Config.CANDLE_STORE_ENABLED
+    Config.CANDLE_STORE_ENABLED = False
+    try:
+        return MarketDataFetcher(name)
+    finally:
+        Config.CANDLE_STORE_ENABLED = previous
+
+
+def test_bulk_endpoint_is_one_request():
+    exchange = StubExchange()
+    tickers = make_fetcher(exchange).get_tickers(['BTC/USDT', 'ETH/USDT', 'BTC/USDT'])
+    assert exchange.calls == [('fetch_tickers', ('BTC/USDT', 'ETH/USDT'))]
+    assert sorted(tickers) == ['BTC/USDT', 'ETH/USDT']
+    assert tickers['ETH/USDT']['last'] == 3000.0
+    assert tickers['ETH/USDT']['change_24h'] == 1.5
+
+
+def test_last_prices_from_one_request():
+    exchange = StubExchange()
+    prices = make_fetcher(exchange).get_last_prices(['BTC/USDT', 'SOL/USDT', 'DOGE/USDT'])
+    assert prices == {'BTC/USDT': 60000.0, 'SOL/USDT': 150.0}
+    assert [call[0] for call in exchange.calls] == ['fetch_tickers']
+
+
+def test_single_requests_without_bulk_endpoint():
+    exchange = StubExchange(bulk=False)
+    tickers = make_fetcher(exchange).get_tickers(['BTC/USDT', 'ETH/USDT', 'DOGE/USDT'])
+    # One request per symbol, the unknown one is left out
+    assert sorted(exchange.calls) == [('fetch_ticker', 'BTC/USDT'), ('fetch_ticker', 'DOGE/USDT'),
+                                      ('fetch_ticker', 'ETH/USDT')]
+    assert sorted(tickers) == ['BTC/USDT', 'ETH/USDT']
+
+
+def test_failed_bulk_request_falls_back():
+    exchange = StubExchange(bulk_error=ccxt.NotSupported('no bulk tickers'))
+    tickers = make_fetcher(exchange).get_tickers(['BTC/USDT', 'ETH/USDT'])
+    assert exchange.calls[0] == ('fetch_tickers', ('BTC/USDT', 'ETH/USDT'))
+    assert sorted(exchange.calls[1:]) == [('fetch_ticker', 'BTC/USDT'), ('fetch_ticker', 'ETH/USDT')]
+    assert tickers['BTC/USDT']['last'] == 60000.0
+
+
+def test_no_symbols_no_request():
+    exchange = StubExchange()
+    assert make_fetcher(exchange).get_tickers([]) == {}
+    assert exchange.calls == []
@@ -0,0 +1,91 @@
+"""
+TradeTape: de-duplication, cursor and rolling buy/sell windows
+
+Window totals are compared with sums over the raw trade list, including
+after the buffer has been compacted many times.
+Run with pytest: python -m pytest test_trade_tape.py
+"""
+import numpy as np
+import pytest
+
+from src.trade_tape import TradeTape
+
+START = 1_700_000_000_000
+
+
+def trade(i: int, timestamp: int, price: float = 100.0, amount: float = 1.0, side: str = 'buy') -> dict:
+    return {'id': str(i), 'timestamp': timestamp, 'price': price, 'amount': amount, 'side': side}
+
+
+def expected_window(trades, seconds: float, now: int) -> dict:
+    inside = [t for t in trades if t['timestamp'] > now - seconds * 1000]
+    volume = sum(t['amount'] for t in inside)
+    return {
+        'buy_volume': sum(t['amount'] for t in inside if t['side'] == 'buy'),
+        'sell_volume': sum(t['amount'] for t in inside if t['side'] == 'sell'),
+        'volume': volume,
+        'trade_count': len(inside),
+        'vwap': sum(t['price'] * t['amount'] for t in inside) / volume if volume else None
+    }
+
+
+def assert_window(tape: TradeTape, trades, seconds: float, now: int):
+    actual = tape.window(seconds, now=now)
+    expected = expected_window(trades, seconds, now)
+    assert actual['trade_count'] == expected['trade_count']
+    for key in ('buy_volume', 'sell_volume', 'volume'):
+        assert actual[key] == pytest.approx(expected[key]), key
+    assert actual['vwap'] == pytest.approx(expected['vwap'])
+
+
+def test_duplicates_and_old_trades_skipped():
+    tape = TradeTape('BTC/USDT')
+    first = [trade(1, START), trade(2, START + 1000), trade(3, START + 2000)]
+    assert tape.add(first) == 3
+    assert tape.cursor == START + 2000
+    # A fetch from the cursor returns the newest trade again, plus one older than the cursor
+    assert tape.add([trade(0, START - 5000), trade(3, START + 2000), trade(4, START + 2000)]) == 1
+    assert len(tape) == 4
+    assert tape.tail(2)['price'].tolist() == [100.0, 100.0]
+
+
+def test_trades_without_id():
+    tape = TradeTape('BTC/USDT')
+    same = {'timestamp': START, 'price': 100.0, 'amount': 1.0, 'side': 'sell'}
+    assert tape.add([same, dict(same)]) == 1
+    assert tape.add([dict(same, amount=2.0)]) == 1
+
+
+def test_windows_match_raw_sums():
+    rng = np.random.default_rng(3)
+    trades = [trade(i, START + i * 500, float(100 + rng.normal()), float(rng.uniform(0.1, 2)),
+                    'buy' if rng.random() < 0.6 else 'sell') for i in range(2000)]
+    tape = TradeTape('BTC/USDT', windows=(60, 300))
+    # Arrives in fetch-sized pages
+    for page in range(0, len(trades), 250):
+        tape.add(trades[page:page + 250])
+    now = trades[-1]['timestamp']
+    for seconds in (1, 60, 300, 10_000):
+        assert_window(tape, trades, seconds, now)
+    assert set(tape.stats(now)) == {60, 300}
+
+
+def test_window_after_compaction():
+    trades = [trade(i, START + i * 1000, 100.0 + i % 7, 1.0 + i % 3, 'buy' if i % 2 else 'sell')
+              for i in range(5000)]
+    # A buffer of 100 trades is compacted many times over 5000 trades
+    tape = TradeTape('BTC/USDT', windows=(60,), capacity=100)
+    for page in range(0, len(trades), 37):
+        tape.add(trades[page:page + 37])
+    now = trades[-1]['timestamp']
+    assert_window(tape, trades, 60, now)
+    assert tape.total == 5000
+    assert len(tape) < 5000
+
+
+def test_empty_window():
+    tape = TradeTape('BTC/USDT')
+    assert tape.cursor is None
+    window = tape.window(60, now=START)
+    assert window['trade_count'] == 0 and window['vwap'] is None
+    assert window['buy_sell_ratio'] == 1.0